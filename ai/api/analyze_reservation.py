@@ -0,0 +1,134 @@
+"""
+API endpoint for a combined reservation analysis
+Called from PHP to score a reservation request in one round trip: risk, purpose
+category, unclear purpose detection and holiday lookup
+
+The reservation date is parsed once and the purpose is cleaned once; each section
+reuses them instead of redoing the work, and answers exactly like the standalone
+endpoint (predict_risk, classify_purpose, detect_unclear_purpose, detect_holidays),
+including its fallbacks. A section that cannot be answered carries its own 'error'
+without failing the others.
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.auto_approval_risk import get_risk_model
+from src.purpose_analysis import get_purpose_model, clean_text
+from src.result_cache import cached
+from src.utils import parse_date
+from api.predict_risk import reservation_kwargs
+from src.holiday_calendar import get_holiday_calendar
+
+
+def risk_section(input_data: dict, res_date):
+    """predict_risk's answer, with the already parsed date"""
+    try:
+        kwargs = reservation_kwargs(input_data)
+        if kwargs is None:
+            return {'error': 'Missing required parameters'}
+        if res_date is not None:
+            kwargs['reservation_date'] = res_date
+
+        model = get_risk_model()
+        if not model.loaded and not model.load_model():
+            return {'error': 'Model not available', 'risk_level': 1, 'risk_probability': 0.5}
+        return model.assess_reservation_risk(**kwargs)
+    except Exception as e:
+        return {'error': str(e), 'risk_level': 1, 'risk_probability': 0.5}
+
+
+def category_section(model, purpose: str, purpose_clean: str):
+    """classify_purpose's answer, sharing its cache entries"""
+    try:
+        if not model.category_loaded:
+            model.load_category_model()
+        return cached('classify_purpose', model.category_version, purpose_clean,
+                      lambda: model.classify_purpose_category(purpose, purpose_clean, fallback=False),
+                      model.category_fallback)
+    except Exception as e:
+        return {'error': str(e), 'category': 'private', 'confidence': 0.0}
+
+
+def unclear_section(model, purpose: str, purpose_clean: str):
+    """detect_unclear_purpose's answer, sharing its cache entries"""
+    try:
+        if not model.unclear_loaded:
+            model.load_unclear_model()
+        result = cached('detect_unclear_purpose', model.unclear_version, purpose_clean,
+                        lambda: model.detect_unclear_purpose(purpose, purpose_clean, fallback=False),
+                        lambda e: model.unclear_fallback(purpose, e))
+
+        # Ensure boolean is Python bool for JSON serialization
+        result['is_unclear'] = bool(result['is_unclear'])
+        result['probability'] = float(result['probability'])
+        result['confidence'] = float(result['confidence'])
+        return result
+    except Exception as e:
+        return {'error': str(e), 'is_unclear': True, 'probability': 0.5, 'confidence': 0.0}
+
+
+def holiday_section(res_date):
+    """detect_holidays' single-date answer"""
+    holiday = get_holiday_calendar().holiday_on(res_date)
+    return {'is_holiday': holiday is not None, 'holiday': holiday}
+
+
+def handle(input_data: dict):
+    """
+    Analyze one reservation request
+
+    Takes predict_risk's fields plus 'purpose'.
+
+    Returns:
+        Tuple of ({'risk', 'purpose_category', 'unclear_purpose', 'holiday'}, exit code)
+    """
+    if not isinstance(input_data, dict):
+        return {'error': 'Invalid input'}, 1
+
+    # Parsed once for the risk features and the holiday lookup
+    res_date = None
+    date_error = 'Missing reservation_date parameter'
+    if input_data.get('reservation_date'):
+        try:
+            res_date = parse_date(input_data['reservation_date'])
+        except Exception as e:
+            date_error = str(e)
+
+    result = {'risk': risk_section(input_data, res_date)}
+
+    purpose = input_data.get('purpose')
+    if purpose:
+        purpose = str(purpose)
+        # Cleaned once for both purpose models and their cache keys
+        purpose_clean = clean_text(purpose)
+        model = get_purpose_model()
+        result['purpose_category'] = category_section(model, purpose, purpose_clean)
+        result['unclear_purpose'] = unclear_section(model, purpose, purpose_clean)
+    else:
+        result['purpose_category'] = {'error': 'Missing purpose parameter'}
+        result['unclear_purpose'] = {'error': 'Missing purpose parameter'}
+
+    if res_date is not None:
+        result['holiday'] = holiday_section(res_date)
+    else:
+        result['holiday'] = {'error': date_error, 'is_holiday': False, 'holiday': None}
+
+    return result, 0
+
+
+if __name__ == "__main__":
+    # Read input from stdin (JSON)
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except:
+        print(json.dumps({'error': 'Invalid input'}))
+        sys.exit(1)
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
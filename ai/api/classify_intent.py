@@ -10,72 +10,51 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import config
-import joblib
-import re
+from src.chatbot_intent import get_intent_model, clean_text
+from src.result_cache import cached
 
 
-def clean_text(text: str):
-    """Clean and normalize text"""
-    if not text:
-        return ""
-    text = str(text).lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+def input_from_args(args: list):
+    """Build the input dict from command line arguments (the question words)"""
+    return {'question': ' '.join(args)}
+
+
+def handle(input_data: dict):
+    """
+    Classify the question in input_data
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
+    question = input_data.get('question', '')
+
+    if not question:
+        return {'error': 'Question is required'}, 1
+
+    try:
+        model = get_intent_model()
+        if not model.loaded and not model.load_model():
+            return {'error': 'Model not found', 'intent': 'unknown', 'confidence': 0.0}, 1
+
+        # Repeated questions are answered from the shared result cache
+        result = cached('classify_intent', model.version, clean_text(question),
+                        lambda: model.classify_intent(question))
+        return result, 0
+    except Exception as e:
+        return {'error': str(e), 'intent': 'unknown', 'confidence': 0.0}, 0
 
 
 if __name__ == "__main__":
     # Read input from command line arguments or stdin
     if len(sys.argv) > 1:
-        question = ' '.join(sys.argv[1:])
+        input_data = input_from_args(sys.argv[1:])
     else:
         try:
             input_data = json.loads(sys.stdin.read())
-            question = input_data.get('question', '')
         except:
             print(json.dumps({'error': 'Invalid input'}))
             sys.exit(1)
-    
-    if not question:
-        print(json.dumps({'error': 'Question is required'}))
-        sys.exit(1)
-    
-    try:
-        # Load model and vectorizer
-        model_path = config.MODELS_DIR / 'chatbot_intent_model.pkl'
-        vectorizer_path = config.MODELS_DIR / 'chatbot_intent_vectorizer.pkl'
-        
-        if not model_path.exists() or not vectorizer_path.exists():
-            print(json.dumps({'error': 'Model not found', 'intent': 'unknown', 'confidence': 0.0}))
-            sys.exit(1)
-        
-        model = joblib.load(model_path)
-        vectorizer = joblib.load(vectorizer_path)
-        
-        # Clean and vectorize question
-        question_clean = clean_text(question)
-        question_vec = vectorizer.transform([question_clean])
-        
-        # Predict
-        intent = model.predict(question_vec)[0]
-        proba = model.predict_proba(question_vec)[0]
-        confidence = proba.max()
-        
-        # Get top 3 intents
-        intent_indices = proba.argsort()[-3:][::-1]
-        intent_classes = model.classes_
-        top_intents = [
-            {'intent': intent_classes[idx], 'confidence': float(proba[idx])}
-            for idx in intent_indices
-        ]
-        
-        result = {
-            'intent': str(intent),
-            'confidence': float(confidence),
-            'top_intents': top_intents,
-        }
-        
-        print(json.dumps(result))
-    except Exception as e:
-        print(json.dumps({'error': str(e), 'intent': 'unknown', 'confidence': 0.0}))
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
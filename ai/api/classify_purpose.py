@@ -10,26 +10,43 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.purpose_analysis import get_purpose_model
+from src.purpose_analysis import get_purpose_model, clean_text
+from src.result_cache import cached
+
+
+def handle(input_data: dict):
+    """
+    Classify the purpose in input_data into a category
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
+    purpose = input_data.get('purpose')
+
+    if not purpose:
+        return {'error': 'Missing purpose parameter'}, 1
+
+    try:
+        model = get_purpose_model()
+        if not model.category_loaded:
+            model.load_category_model()
+        # Repeated purposes are answered from the shared result cache
+        result = cached('classify_purpose', model.category_version, clean_text(purpose),
+                        lambda: model.classify_purpose_category(str(purpose), fallback=False),
+                        model.category_fallback)
+        return result, 0
+    except Exception as e:
+        return {'error': str(e), 'category': 'private', 'confidence': 0.0}, 0
 
 
 if __name__ == "__main__":
     # Read input from stdin (JSON)
     try:
         input_data = json.loads(sys.stdin.read())
-        purpose = input_data.get('purpose')
     except:
         print(json.dumps({'error': 'Invalid input'}))
         sys.exit(1)
-    
-    if not purpose:
-        print(json.dumps({'error': 'Missing purpose parameter'}))
-        sys.exit(1)
-    
-    try:
-        model = get_purpose_model()
-        result = model.classify_purpose_category(str(purpose))
-        
-        print(json.dumps(result))
-    except Exception as e:
-        print(json.dumps({'error': str(e), 'category': 'private', 'confidence': 0.0}))
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
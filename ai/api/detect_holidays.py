@@ -4,248 +4,122 @@ Philippines Holiday Detection API
 
 Detects Philippines national holidays and special non-working days.
 Returns holiday information for a given date or date range.
+The holiday rules live in src/holiday_calendar.py; this script only answers from its table.
 """
 
 import sys
 import json
-from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
 
-class PhilippinesHolidayDetector:
-    """Detects Philippines holidays based on Philippine holiday calendar."""
-    
-    def __init__(self, year: int):
-        self.year = year
-        self.holidays = self._generate_holidays(year)
-    
-    def _generate_holidays(self, year: int) -> Dict[str, Dict]:
-        """
-        Generate Philippines holidays for a given year.
-        
-        Returns dictionary mapping date strings to holiday information.
-        """
-        holidays = {}
-        
-        # Fixed Date Holidays
-        fixed_holidays = {
-            "01-01": ("New Year's Day", "Regular Holiday"),
-            "04-09": ("Araw ng Kagitingan", "Regular Holiday"),
-            "05-01": ("Labor Day", "Regular Holiday"),
-            "06-12": ("Independence Day", "Regular Holiday"),
-            "08-30": ("National Heroes Day", "Regular Holiday"), # Last Monday of August
-            "11-01": ("All Saints' Day", "Special Non-Working Holiday"),
-            "11-02": ("All Souls' Day", "Special Non-Working Holiday"),
-            "11-30": ("Bonifacio Day", "Regular Holiday"),
-            "12-25": ("Christmas Day", "Regular Holiday"),
-            "12-30": ("Rizal Day", "Regular Holiday"),
-        }
-        
-        for date_str, (name, holiday_type) in fixed_holidays.items():
-            full_date = f"{year}-{date_str}"
-            holidays[full_date] = {
-                "name": name,
-                "type": holiday_type,
-                "date": full_date
-            }
-        
-        # Moveable Holidays (need calculation)
-        # Maundy Thursday and Good Friday (varies by year)
-        easter_sunday = self._calculate_easter_sunday(year)
-        if easter_sunday:
-            maundy_thursday = easter_sunday - timedelta(days=3)
-            good_friday = easter_sunday - timedelta(days=2)
-            
-            holidays[maundy_thursday.strftime("%Y-%m-%d")] = {
-                "name": "Maundy Thursday",
-                "type": "Regular Holiday",
-                "date": maundy_thursday.strftime("%Y-%m-%d")
-            }
-            
-            holidays[good_friday.strftime("%Y-%m-%d")] = {
-                "name": "Good Friday",
-                "type": "Regular Holiday",
-                "date": good_friday.strftime("%Y-%m-%d")
-            }
-        
-        # National Heroes Day (Last Monday of August)
-        last_monday_august = self._last_monday_of_month(year, 8)
-        if last_monday_august:
-            holidays[last_monday_august.strftime("%Y-%m-%d")] = {
-                "name": "National Heroes Day",
-                "type": "Regular Holiday",
-                "date": last_monday_august.strftime("%Y-%m-%d")
-            }
-        
-        # Additional Special Non-Working Holidays (common dates)
-        # These may vary by year, using common dates
-        additional_holidays = {
-            "02-14": ("Valentine's Day", "Special Non-Working Holiday"),
-            "02-25": ("EDSA People Power Revolution Anniversary", "Special Non-Working Holiday"),
-            "08-21": ("Ninoy Aquino Day", "Special Non-Working Holiday"),
-            "12-24": ("Christmas Eve", "Special Non-Working Holiday"),
-            "12-31": ("New Year's Eve", "Special Non-Working Holiday"),
-        }
-        
-        for date_str, (name, holiday_type) in additional_holidays.items():
-            full_date = f"{year}-{date_str}"
-            holidays[full_date] = {
-                "name": name,
-                "type": holiday_type,
-                "date": full_date
-            }
-        
-        return holidays
-    
-    def _calculate_easter_sunday(self, year: int) -> Optional[date]:
-        """
-        Calculate Easter Sunday using the Computus algorithm.
-        
-        Returns the date of Easter Sunday for the given year.
-        """
-        try:
-            # Anonymous Gregorian algorithm
-            a = year % 19
-            b = year // 100
-            c = year % 100
-            d = b // 4
-            e = b % 4
-            f = (b + 8) // 25
-            g = (b - f + 1) // 3
-            h = (19 * a + b - d - g + 15) % 30
-            i = c // 4
-            k = c % 4
-            l = (32 + 2 * e + 2 * i - h - k) % 7
-            m = (a + 11 * h + 22 * l) // 451
-            month = (h + l - 7 * m + 114) // 31
-            day = ((h + l - 7 * m + 114) % 31) + 1
-            
-            return date(year, month, day)
-        except:
-            return None
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.holiday_calendar import get_holiday_calendar
+
+
+def date_result(calendar, date_str: str):
+    """Single-date answer: {'is_holiday', 'holiday'}"""
+    holiday = calendar.holiday_on(date_str)
+    return {
+        "is_holiday": holiday is not None,
+        "holiday": holiday
+    }
+
+
+def range_result(calendar, start_date: str, end_date: str):
+    """Date range answer: {'holidays', 'count'}"""
+    holidays = calendar.holidays_between(start_date, end_date)
+    return {
+        "holidays": holidays,
+        "count": len(holidays)
+    }
+
+
+def handle_batch(input_data: dict):
+    """
+    Answer many dates ('dates': [...]) and/or ranges ('ranges': [{'start_date', 'end_date'}, ...]) at once
+
+    An invalid entry gets an error in its slot without failing the others.
+
+    Returns:
+        Tuple of ({'dates': {'results', 'count'}, 'ranges': {'results', 'count'}}, exit code)
+    """
+    calendar = get_holiday_calendar()
+    result = {}
     
-    def _last_monday_of_month(self, year: int, month: int) -> Optional[date]:
-        """
-        Find the last Monday of a given month and year.
-        """
-        try:
-            # Start from the last day of the month
-            last_day = date(year, month + 1, 1) - timedelta(days=1)
-            
-            # Find the last Monday
-            days_back = (last_day.weekday() - 0) % 7  # Monday is 0
-            last_monday = last_day - timedelta(days=days_back)
-            
-            return last_monday
-        except:
-            return None
+    if 'dates' in input_data:
+        dates = input_data['dates']
+        if not isinstance(dates, list):
+            return {'error': 'Invalid input'}, 1
+        results = []
+        for date_str in dates:
+            try:
+                results.append({"date": date_str, **date_result(calendar, date_str)})
+            except Exception as e:
+                results.append({"date": date_str, "error": str(e), "is_holiday": False, "holiday": None})
+        result['dates'] = {'results': results, 'count': len(results)}
     
-    def is_holiday(self, date_str: str) -> Optional[Dict]:
-        """
-        Check if a given date is a holiday.
-        
-        Args:
-            date_str: Date string in YYYY-MM-DD format
-            
-        Returns:
-            Holiday information dict if holiday, None otherwise
-        """
-        return self.holidays.get(date_str)
+    if 'ranges' in input_data:
+        ranges = input_data['ranges']
+        if not isinstance(ranges, list):
+            return {'error': 'Invalid input'}, 1
+        results = []
+        for entry in ranges:
+            entry = entry if isinstance(entry, dict) else {}
+            start_date, end_date = entry.get('start_date'), entry.get('end_date')
+            if not start_date or not end_date:
+                results.append({"start_date": start_date, "end_date": end_date,
+                                "error": "Missing start_date or end_date", "holidays": [], "count": 0})
+                continue
+            try:
+                results.append({"start_date": start_date, "end_date": end_date,
+                                **range_result(calendar, start_date, end_date)})
+            except Exception as e:
+                results.append({"start_date": start_date, "end_date": end_date,
+                                "error": str(e), "holidays": [], "count": 0})
+        result['ranges'] = {'results': results, 'count': len(results)}
     
-    def get_holidays_in_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """
-        Get all holidays within a date range.
-        
-        Args:
-            start_date: Start date string in YYYY-MM-DD format
-            end_date: End date string in YYYY-MM-DD format
-            
-        Returns:
-            List of holiday information dicts
-        """
-        holidays_in_range = []
-        
-        try:
-            start = datetime.strptime(start_date, "%Y-%m-%d").date()
-            end = datetime.strptime(end_date, "%Y-%m-%d").date()
-            
-            current = start
-            while current <= end:
-                date_str = current.strftime("%Y-%m-%d")
-                if date_str in self.holidays:
-                    holidays_in_range.append(self.holidays[date_str])
-                current += timedelta(days=1)
-        except:
-            pass
-        
-        return holidays_in_range
-    
-    def get_all_holidays(self) -> List[Dict]:
-        """
-        Get all holidays for the year.
-        
-        Returns:
-            List of holiday information dicts sorted by date
-        """
-        return sorted(self.holidays.values(), key=lambda x: x['date'])
+    return result, 0
 
-def main():
-    """Main function to handle API requests."""
+def handle(input_data: dict):
+    """
+    Answer a holiday lookup for a single date, a date range or a whole year,
+    or for many dates and ranges at once (see handle_batch)
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
+    if 'dates' in input_data or 'ranges' in input_data:
+        return handle_batch(input_data)
+    
     try:
-        # Read input from stdin
-        input_data = json.loads(sys.stdin.read())
-        
         date_str = input_data.get('date')
         start_date = input_data.get('start_date')
         end_date = input_data.get('end_date')
         year = input_data.get('year')
         
-        # Determine year to use
-        if year:
-            target_year = int(year)
-        elif date_str:
-            target_year = int(date_str.split('-')[0])
-        elif start_date:
-            target_year = int(start_date.split('-')[0])
-        else:
-            target_year = datetime.now().year
-        
-        # Initialize detector
-        detector = PhilippinesHolidayDetector(target_year)
-        
-        result = {}
+        calendar = get_holiday_calendar()
         
         if date_str:
             # Check single date
-            holiday = detector.is_holiday(date_str)
-            if holiday:
-                result = {
-                    "is_holiday": True,
-                    "holiday": holiday
-                }
-            else:
-                result = {
-                    "is_holiday": False,
-                    "holiday": None
-                }
+            result = date_result(calendar, date_str)
         
         elif start_date and end_date:
-            # Get holidays in range
-            holidays = detector.get_holidays_in_range(start_date, end_date)
-            result = {
-                "holidays": holidays,
-                "count": len(holidays)
-            }
+            # Get holidays in range (may span several years)
+            result = range_result(calendar, start_date, end_date)
         
         else:
             # Get all holidays for the year
-            holidays = detector.get_all_holidays()
+            target_year = int(year) if year else datetime.now().year
+            holidays = calendar.holidays_in_year(target_year)
             result = {
                 "year": target_year,
                 "holidays": holidays,
                 "count": len(holidays)
             }
         
-        print(json.dumps(result, indent=2))
+        return result, 0
         
     except Exception as e:
         error_result = {
@@ -253,7 +127,25 @@ def main():
             "holidays": [],
             "count": 0
         }
-        print(json.dumps(error_result, indent=2))
+        return error_result, 0
+
+def main():
+    """Main function to handle API requests."""
+    try:
+        # Read input from stdin
+        input_data = json.loads(sys.stdin.read())
+    except Exception as e:
+        input_data = None
+        result = {
+            "error": str(e),
+            "holidays": [],
+            "count": 0
+        }
+    
+    if input_data is not None:
+        result, _ = handle(input_data)
+    
+    print(json.dumps(result, indent=2))
 
 if __name__ == "__main__":
     main()
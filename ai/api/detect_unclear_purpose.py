@@ -10,31 +10,49 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.purpose_analysis import get_purpose_model
+from src.purpose_analysis import get_purpose_model, clean_text
+from src.result_cache import cached
 
 
-if __name__ == "__main__":
-    # Read input from stdin (JSON)
-    try:
-        input_data = json.loads(sys.stdin.read())
-        purpose = input_data.get('purpose')
-    except:
-        print(json.dumps({'error': 'Invalid input'}))
-        sys.exit(1)
-    
+def handle(input_data: dict):
+    """
+    Detect whether the purpose in input_data is unclear
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
+    purpose = input_data.get('purpose')
+
     if not purpose:
-        print(json.dumps({'error': 'Missing purpose parameter'}))
-        sys.exit(1)
-    
+        return {'error': 'Missing purpose parameter'}, 1
+
     try:
         model = get_purpose_model()
-        result = model.detect_unclear_purpose(str(purpose))
-        
+        if not model.unclear_loaded:
+            model.load_unclear_model()
+        # Repeated purposes are answered from the shared result cache
+        result = cached('detect_unclear_purpose', model.unclear_version, clean_text(purpose),
+                        lambda: model.detect_unclear_purpose(str(purpose), fallback=False),
+                        lambda e: model.unclear_fallback(str(purpose), e))
+
         # Ensure boolean is Python bool for JSON serialization
         result['is_unclear'] = bool(result['is_unclear'])
         result['probability'] = float(result['probability'])
         result['confidence'] = float(result['confidence'])
-        
-        print(json.dumps(result))
+
+        return result, 0
     except Exception as e:
-        print(json.dumps({'error': str(e), 'is_unclear': True, 'probability': 0.5, 'confidence': 0.0}))
+        return {'error': str(e), 'is_unclear': True, 'probability': 0.5, 'confidence': 0.0}, 0
+
+
+if __name__ == "__main__":
+    # Read input from stdin (JSON)
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except:
+        print(json.dumps({'error': 'Invalid input'}))
+        sys.exit(1)
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
@@ -0,0 +1,35 @@
+"""
+API endpoint for model readiness
+Called by a load balancer or from PHP to hold off traffic until the models are warm
+
+Reports, per model, whether it loaded, the load time, artifact size and modification
+time, in-memory footprint and feature count. Run as a script it loads every model
+itself; through the model server it answers from the server's startup preload.
+Exits with status 1 unless every model is loaded.
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model_health import health_report
+
+
+def handle(input_data: dict):
+    """
+    Report model readiness
+
+    Returns:
+        Tuple of (health report, exit code: 0 when ready, 1 otherwise)
+    """
+    report = health_report()
+    return report, 0 if report['ready'] else 1
+
+
+if __name__ == "__main__":
+    result, exit_code = handle({})
+    print(json.dumps(result))
+    sys.exit(exit_code)
@@ -10,73 +10,144 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.auto_approval_risk import AutoApprovalRiskModel
+from src.auto_approval_risk import get_risk_model
+
+
+# Positional command line arguments, in the order PHP passes them
+ARG_NAMES = [
+    'facility_id', 'user_id', 'reservation_date', 'time_slot', 'expected_attendees',
+    'is_commercial', 'facility_auto_approve', 'facility_capacity', 'facility_max_duration_hours',
+    'facility_capacity_threshold', 'user_is_verified', 'user_booking_count', 'user_violation_count',
+]
+
+
+def input_from_args(args: list):
+    """Build the input dict from positional command line arguments"""
+    return dict(zip(ARG_NAMES, args))
+
+
+def reservation_kwargs(input_data: dict):
+    """
+    Convert one reservation's input into assess_reservation_risk keyword arguments
+
+    Returns:
+        Keyword argument dict, or None if a required parameter is missing
+    """
+    facility_id = input_data.get('facility_id')
+    user_id = input_data.get('user_id')
+    reservation_date = input_data.get('reservation_date')
+    time_slot = input_data.get('time_slot')
+    expected_attendees = input_data.get('expected_attendees', 50)
+    is_commercial = input_data.get('is_commercial', False)
+    facility_auto_approve = input_data.get('facility_auto_approve', False)
+    facility_capacity = input_data.get('facility_capacity', '100')
+    facility_max_duration_hours = input_data.get('facility_max_duration_hours', 8.0)
+    facility_capacity_threshold = input_data.get('facility_capacity_threshold', 200)
+    user_is_verified = input_data.get('user_is_verified', True)
+    user_booking_count = input_data.get('user_booking_count', 0)
+    user_violation_count = input_data.get('user_violation_count', 0)
+
+    if not all([facility_id, user_id, reservation_date, time_slot]):
+        return None
+
+    return {
+        'facility_id': int(facility_id),
+        'user_id': int(user_id),
+        'reservation_date': str(reservation_date),
+        'time_slot': str(time_slot),
+        'expected_attendees': int(expected_attendees),
+        'is_commercial': bool(int(is_commercial)) if isinstance(is_commercial, str) else is_commercial,
+        'facility_auto_approve': bool(int(facility_auto_approve)) if isinstance(facility_auto_approve, str) else facility_auto_approve,
+        'facility_capacity': facility_capacity,
+        'facility_max_duration_hours': float(facility_max_duration_hours),
+        'facility_capacity_threshold': int(facility_capacity_threshold) if facility_capacity_threshold != 'null' else None,
+        'user_is_verified': bool(int(user_is_verified)) if isinstance(user_is_verified, str) else user_is_verified,
+        'user_booking_count': int(user_booking_count),
+        'user_violation_count': int(user_violation_count),
+    }
+
+
+def handle_batch(reservations: list):
+    """
+    Assess an array of reservations with one model call
+
+    Returns:
+        Tuple of (response dict with 'results' in input order, exit code)
+    """
+    if not isinstance(reservations, list):
+        return {'error': 'Invalid input'}, 1
+
+    model = get_risk_model()
+    if not model.loaded and not model.load_model():
+        return {'error': 'Model not available', 'risk_level': 1, 'risk_probability': 0.5}, 1
+
+    # Invalid entries get an error in their slot; valid ones are scored together
+    results = [None] * len(reservations)
+    valid_positions = []
+    valid_kwargs = []
+    for position, reservation in enumerate(reservations):
+        try:
+            kwargs = reservation_kwargs(reservation)
+        except Exception as e:
+            results[position] = {'error': str(e), 'risk_level': 1, 'risk_probability': 0.5}
+            continue
+        if kwargs is None:
+            results[position] = {'error': 'Missing required parameters'}
+            continue
+        valid_kwargs.append(kwargs)
+        valid_positions.append(position)
+
+    try:
+        assessments = model.assess_reservations_risk(valid_kwargs)
+    except Exception as e:
+        assessments = [{'error': str(e), 'risk_level': 1, 'risk_probability': 0.5} for _ in valid_kwargs]
+
+    for position, assessment in zip(valid_positions, assessments):
+        results[position] = assessment
+
+    return {'results': results, 'count': len(results)}, 0
+
+
+def handle(input_data: dict):
+    """
+    Assess the risk of the reservation in input_data, or of every entry in
+    input_data['reservations'] when an array is given
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
+    try:
+        if 'reservations' in input_data:
+            return handle_batch(input_data['reservations'])
+        if not all(input_data.get(key) for key in ('facility_id', 'user_id', 'reservation_date', 'time_slot')):
+            return {'error': 'Missing required parameters'}, 1
+    except:
+        return {'error': 'Invalid input'}, 1
+
+    try:
+        kwargs = reservation_kwargs(input_data)
+        model = get_risk_model()
+        if not model.loaded and not model.load_model():
+            return {'error': 'Model not available', 'risk_level': 1, 'risk_probability': 0.5}, 1
+
+        return model.assess_reservation_risk(**kwargs), 0
+    except Exception as e:
+        return {'error': str(e), 'risk_level': 1, 'risk_probability': 0.5}, 0
 
 
 if __name__ == "__main__":
     # Read input from command line arguments or stdin
     if len(sys.argv) > 1:
         # Command line arguments
-        facility_id = sys.argv[1] if len(sys.argv) > 1 else None
-        user_id = sys.argv[2] if len(sys.argv) > 2 else None
-        reservation_date = sys.argv[3] if len(sys.argv) > 3 else None
-        time_slot = sys.argv[4] if len(sys.argv) > 4 else None
-        expected_attendees = sys.argv[5] if len(sys.argv) > 5 else 50
-        is_commercial = sys.argv[6] if len(sys.argv) > 6 else '0'
-        facility_auto_approve = sys.argv[7] if len(sys.argv) > 7 else '0'
-        facility_capacity = sys.argv[8] if len(sys.argv) > 8 else '100'
-        facility_max_duration_hours = sys.argv[9] if len(sys.argv) > 9 else '8.0'
-        facility_capacity_threshold = sys.argv[10] if len(sys.argv) > 10 else '200'
-        user_is_verified = sys.argv[11] if len(sys.argv) > 11 else '1'
-        user_booking_count = sys.argv[12] if len(sys.argv) > 12 else '0'
-        user_violation_count = sys.argv[13] if len(sys.argv) > 13 else '0'
+        input_data = input_from_args(sys.argv[1:])
     else:
         # Read from stdin (JSON)
         try:
             input_data = json.loads(sys.stdin.read())
-            facility_id = input_data.get('facility_id')
-            user_id = input_data.get('user_id')
-            reservation_date = input_data.get('reservation_date')
-            time_slot = input_data.get('time_slot')
-            expected_attendees = input_data.get('expected_attendees', 50)
-            is_commercial = input_data.get('is_commercial', False)
-            facility_auto_approve = input_data.get('facility_auto_approve', False)
-            facility_capacity = input_data.get('facility_capacity', '100')
-            facility_max_duration_hours = input_data.get('facility_max_duration_hours', 8.0)
-            facility_capacity_threshold = input_data.get('facility_capacity_threshold', 200)
-            user_is_verified = input_data.get('user_is_verified', True)
-            user_booking_count = input_data.get('user_booking_count', 0)
-            user_violation_count = input_data.get('user_violation_count', 0)
         except:
             print(json.dumps({'error': 'Invalid input'}))
             sys.exit(1)
-    
-    if not all([facility_id, user_id, reservation_date, time_slot]):
-        print(json.dumps({'error': 'Missing required parameters'}))
-        sys.exit(1)
-    
-    try:
-        model = AutoApprovalRiskModel()
-        if not model.load_model():
-            print(json.dumps({'error': 'Model not available', 'risk_level': 1, 'risk_probability': 0.5}))
-            sys.exit(1)
-        
-        result = model.assess_reservation_risk(
-            facility_id=int(facility_id),
-            user_id=int(user_id),
-            reservation_date=str(reservation_date),
-            time_slot=str(time_slot),
-            expected_attendees=int(expected_attendees),
-            is_commercial=bool(int(is_commercial)) if isinstance(is_commercial, str) else is_commercial,
-            facility_auto_approve=bool(int(facility_auto_approve)) if isinstance(facility_auto_approve, str) else facility_auto_approve,
-            facility_capacity=facility_capacity,
-            facility_max_duration_hours=float(facility_max_duration_hours),
-            facility_capacity_threshold=int(facility_capacity_threshold) if facility_capacity_threshold != 'null' else None,
-            user_is_verified=bool(int(user_is_verified)) if isinstance(user_is_verified, str) else user_is_verified,
-            user_booking_count=int(user_booking_count),
-            user_violation_count=int(user_violation_count),
-        )
-        
-        print(json.dumps(result))
-    except Exception as e:
-        print(json.dumps({'error': str(e), 'risk_level': 1, 'risk_probability': 0.5}))
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
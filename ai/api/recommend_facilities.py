@@ -13,10 +13,14 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.facility_recommendation import get_recommendation_model
 
 
-if __name__ == "__main__":
-    # Read input from stdin (JSON)
+def handle(input_data: dict):
+    """
+    Rank the facilities in input_data for the requested booking
+
+    Returns:
+        Tuple of (response dict, exit code)
+    """
     try:
-        input_data = json.loads(sys.stdin.read())
         facilities = input_data.get('facilities', [])
         user_id = input_data.get('user_id')
         purpose = input_data.get('purpose', '')
@@ -27,13 +31,11 @@ if __name__ == "__main__":
         user_booking_count = input_data.get('user_booking_count', 0)
         limit = input_data.get('limit', 5)
     except Exception as e:
-        print(json.dumps({'error': 'Invalid input: ' + str(e)}))
-        sys.exit(1)
-    
+        return {'error': 'Invalid input: ' + str(e)}, 1
+
     if not facilities or not reservation_date:
-        print(json.dumps({'error': 'Missing required parameters'}))
-        sys.exit(1)
-    
+        return {'error': 'Missing required parameters'}, 1
+
     try:
         model = get_recommendation_model()
         recommendations = model.recommend_facilities(
@@ -47,7 +49,7 @@ if __name__ == "__main__":
             user_booking_count=int(user_booking_count),
             limit=int(limit)
         )
-        
+
         # Convert numpy types to native Python types for JSON serialization
         result = []
         for rec in recommendations:
@@ -60,26 +62,31 @@ if __name__ == "__main__":
                 else:
                     rec_dict[key] = str(value)
             result.append(rec_dict)
-        
-        print(
-            json.dumps(
-                {
-                    'recommendations': result,
-                    'ml_model_loaded': bool(getattr(model, 'loaded', False)),
-                }
-            )
-        )
+
+        return {
+            'recommendations': result,
+            'ml_model_loaded': bool(getattr(model, 'loaded', False)),
+        }, 0
     except Exception as e:
         try:
             _lim = max(1, min(50, int(limit)))
         except (TypeError, ValueError):
             _lim = 5
-        print(
-            json.dumps(
-                {
-                    'error': str(e),
-                    'recommendations': facilities[:_lim],
-                    'ml_model_loaded': False,
-                }
-            )
-        )
+        return {
+            'error': str(e),
+            'recommendations': facilities[:_lim],
+            'ml_model_loaded': False,
+        }, 0
+
+
+if __name__ == "__main__":
+    # Read input from stdin (JSON)
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except Exception as e:
+        print(json.dumps({'error': 'Invalid input: ' + str(e)}))
+        sys.exit(1)
+
+    result, exit_code = handle(input_data)
+    print(json.dumps(result))
+    sys.exit(exit_code)
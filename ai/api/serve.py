@@ -0,0 +1,72 @@
+"""
+Model serving daemon
+Keeps all inference models loaded and answers the api/ endpoints over a Unix socket,
+so callers skip the interpreter start, imports and joblib.load of a fresh process
+
+Usage:
+    python api/serve.py                      # Serve in the foreground until idle
+    python api/serve.py --workers 2:8        # Pre-fork server with 2 to 8 worker processes
+    python api/serve.py --ensure             # Start in the background if not running (first use)
+    python api/serve.py --call classify_purpose < input.json
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src import model_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the AI models over a Unix socket')
+    parser.add_argument('--socket', default=config.MODEL_SERVER['socket_path'], help='Unix socket path')
+    parser.add_argument('--idle-timeout', type=int, default=config.MODEL_SERVER['idle_timeout'],
+                        help='Exit after this many seconds without requests (0 = never)')
+    parser.add_argument('--workers', default=config.MODEL_SERVER['workers'],
+                        help='Pre-fork worker processes, "N" or "MIN:MAX" (default: one threaded process)')
+    parser.add_argument('--batch-window-ms', type=float, default=None,
+                        help='Micro-batching window of the threaded server (negative = off, default from config)')
+    parser.add_argument('--ensure', action='store_true', help='Start a background server if none is running, then exit')
+    parser.add_argument('--call', metavar='ENDPOINT', help='Send stdin JSON to ENDPOINT on the running server')
+    args = parser.parse_args()
+
+    if args.ensure:
+        ok = model_server.ensure_server(args.socket)
+        print(json.dumps({'running': ok, 'socket': args.socket}))
+        sys.exit(0 if ok else 1)
+
+    if args.call:
+        try:
+            input_data = json.loads(sys.stdin.read() or '{}')
+        except:
+            print(json.dumps({'error': 'Invalid input'}))
+            sys.exit(1)
+        if not model_server.ensure_server(args.socket):
+            print(json.dumps({'error': 'Model server not available'}))
+            sys.exit(1)
+        print(json.dumps(model_server.request(args.call, data=input_data, socket_path=args.socket)))
+        return
+
+    if args.workers:
+        from src.prefork import parse_workers, run_prefork_server
+
+        try:
+            min_workers, max_workers = parse_workers(args.workers)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        started = run_prefork_server(args.socket, min_workers, max_workers, args.idle_timeout)
+    else:
+        started = model_server.run_server(args.socket, args.idle_timeout, args.batch_window_ms)
+
+    if not started:
+        print(f"Model server already running on {args.socket}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
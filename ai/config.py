@@ -9,44 +9,146 @@ from pathlib import Path
 # Base directory
 BASE_DIR = Path(__file__).parent
 
-# Load project .env (and optional private/cprf.env) for DB + Python tooling
-try:
-    from dotenv import load_dotenv
-
-    _project_root = BASE_DIR.parent
-    load_dotenv(_project_root / '.env')
-    _private = os.getenv('CPRF_PRIVATE_ENV')
-    if _private:
-        load_dotenv(_private, override=True)
-    else:
-        _home = os.path.expanduser('~')
-        for _candidate in (
-            Path(_home) / 'private' / 'cprf.env',
-            _project_root / 'private' / 'cprf.env',
-        ):
-            if _candidate.is_file():
-                load_dotenv(_candidate, override=True)
-                break
-except ImportError:
-    pass
-
-# Database configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': int(os.getenv('DB_PORT', '3306')),
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASS', os.getenv('DB_PASSWORD', '')),
-    'database': os.getenv('DB_NAME', 'facilities_reservation'),
-    'charset': 'utf8mb4',
-}
+_env_loaded = False
+
+
+def load_env():
+    """
+    Load project .env (and optional private/cprf.env) for DB + Python tooling
+
+    Only code that needs DB credentials calls this (via DB_CONFIG), so the
+    inference endpoints skip dotenv discovery at start-up.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+
+        _project_root = BASE_DIR.parent
+        load_dotenv(_project_root / '.env')
+        _private = os.getenv('CPRF_PRIVATE_ENV')
+        if _private:
+            load_dotenv(_private, override=True)
+        else:
+            _home = os.path.expanduser('~')
+            for _candidate in (
+                Path(_home) / 'private' / 'cprf.env',
+                _project_root / 'private' / 'cprf.env',
+            ):
+                if _candidate.is_file():
+                    load_dotenv(_candidate, override=True)
+                    break
+    except ImportError:
+        pass
+
+
+def __getattr__(name):
+    """Build DB_CONFIG on first access (loads .env then)"""
+    if name == 'DB_CONFIG':
+        load_env()
+        # Database configuration
+        db_config = {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'port': int(os.getenv('DB_PORT', '3306')),
+            'user': os.getenv('DB_USER', 'root'),
+            'password': os.getenv('DB_PASS', os.getenv('DB_PASSWORD', '')),
+            'database': os.getenv('DB_NAME', 'facilities_reservation'),
+            'charset': 'utf8mb4',
+        }
+        globals()['DB_CONFIG'] = db_config
+        return db_config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Model storage directory
 MODELS_DIR = BASE_DIR / 'models'
-MODELS_DIR.mkdir(exist_ok=True)
 
 # Data storage directory
 DATA_DIR = BASE_DIR / 'data'
-DATA_DIR.mkdir(exist_ok=True)
+
+
+def ensure_dirs():
+    """Create MODELS_DIR and DATA_DIR; called by scripts that write artifacts, not at import"""
+    MODELS_DIR.mkdir(exist_ok=True)
+    DATA_DIR.mkdir(exist_ok=True)
+
+
+# Model serving daemon (api/serve.py)
+MODEL_SERVER = {
+    'socket_path': os.getenv('FRS_AI_SOCKET', os.path.join(os.getenv('TMPDIR') or '/tmp', 'frs_ai_model_server.sock')),
+    'idle_timeout': int(os.getenv('FRS_AI_IDLE_TIMEOUT', '900')),  # Seconds without requests before exiting (0 = never)
+    'startup_timeout': 60,  # Seconds a client waits for a freshly spawned server to come up
+    'workers': os.getenv('FRS_AI_WORKERS', ''),  # Pre-fork worker count "N" or "MIN:MAX" (empty = threaded server)
+    'scale_down_after': 30,  # Seconds a pre-fork worker above the minimum may stay idle before it is retired
+    'retire_grace_period': 30,  # Seconds a retired pre-fork worker may finish its request before it is killed
+}
+
+# Model instances of the model server (src/model_manager.py)
+MODEL_MANAGER = {
+    'hot_reload': os.getenv('FRS_AI_HOT_RELOAD', '1') != '0',  # Load retrained artifacts without a restart
+    'poll_interval': float(os.getenv('FRS_AI_RELOAD_INTERVAL', '5')),  # Seconds between artifact checks
+}
+
+# Micro-batching in the threaded model server (src/micro_batcher.py)
+MICRO_BATCHING = {
+    'enabled': os.getenv('FRS_AI_MICRO_BATCHING', '1') != '0',
+    'window_ms': float(os.getenv('FRS_AI_BATCH_WINDOW_MS', '3')),  # Wait this long for more requests after the first
+    'max_batch_size': 256,  # Run the batch early once this many requests are waiting
+}
+
+# Cross-process result cache for the text endpoints (src/result_cache.py)
+RESULT_CACHE = {
+    'enabled': os.getenv('FRS_AI_RESULT_CACHE', '1') != '0',
+    'path': os.getenv('FRS_AI_CACHE_PATH', os.path.join(os.getenv('TMPDIR') or '/tmp', 'frs_ai_result_cache.sqlite3')),
+    'ttl_seconds': int(os.getenv('FRS_AI_CACHE_TTL', str(7 * 24 * 3600))),
+    'max_entries': 10000,  # Least recently used entries beyond this are evicted
+    'evict_interval': 60,  # Seconds between expiry/LRU sweeps
+    'touch_after': 60,  # A hit refreshes an entry's LRU time only if it is older than this
+    'flush_interval': 5,  # Seconds hit/miss counters and LRU times are buffered before writing
+}
+
+# Precomputed holiday table of api/detect_holidays.py (src/holiday_calendar.py)
+HOLIDAY_CALENDAR = {
+    'first_year': 2000,
+    'last_year': 2100,  # Years outside the range are computed on demand
+    'cache_path': os.getenv('FRS_AI_HOLIDAY_CACHE', os.path.join(os.getenv('TMPDIR') or '/tmp', 'frs_ai_holidays.json')),
+}
+
+# Model artifacts (src/model_store.py)
+MODEL_STORE = {
+    # joblib mmap_mode for loading artifacts: 'r' maps plain numpy arrays read-only, 'none' reads
+    # them into private memory. sklearn copies tree arrays out of the mapping when it unpickles
+    # a forest, so only the .npz exports (src/forest_arrays.py) stay shared between workers
+    'mmap_mode': os.getenv('FRS_AI_MMAP_MODE', 'r'),
+}
+
+# Incremental retraining from a data watermark (src/incremental_training.py)
+INCREMENTAL_TRAINING = {
+    'enabled': os.getenv('FRS_AI_INCREMENTAL', '1') != '0',
+    'full_rebuild_days': int(os.getenv('FRS_AI_FULL_REBUILD_DAYS', '7')),  # Full rebuild at least this often
+    'trees_per_update': 10,  # Trees added to a forest per incremental run
+    'max_estimators': 300,  # A forest this large is rebuilt in full instead of grown
+    'min_new_rows': 20,  # Fewer changed rows than this leave the model (and watermark) as is
+}
+
+# Reservation loading (src/data_loader.py)
+DATA_LOADER = {
+    # Read large queries through a server-side cursor, so raw rows never pile up in memory
+    'stream': os.getenv('FRS_AI_STREAM_ROWS', '1') != '0',
+    'chunk_rows': int(os.getenv('FRS_AI_CHUNK_ROWS', '50000')),  # Rows fetched and typed at a time
+    # Categoricals, int32 and bool instead of object/int64 columns (see the schemas in src/data_loader.py)
+    'compact_dtypes': os.getenv('FRS_AI_COMPACT_DTYPES', '1') != '0',
+}
+
+# MySQL connection pool (src/db_pool.py)
+DB_POOL = {
+    'max_size': int(os.getenv('FRS_AI_DB_POOL_SIZE', '4')),  # Connections open at most
+    'max_lifetime': float(os.getenv('FRS_AI_DB_MAX_LIFETIME', '3600')),  # Seconds before a connection is replaced
+    'health_check_after': 30,  # Idle seconds after which a connection is pinged before use
+    'timeout': float(os.getenv('FRS_AI_DB_POOL_TIMEOUT', '30')),  # Seconds to wait for a free connection
+}
 
 # Training parameters
 CONFLICT_DETECTION_PARAMS = {
@@ -87,21 +189,8 @@ TIME_SLOT_BINS = [
     (21, 24),  # Night (21-24)
 ]
 
-# Holidays for Philippines + Barangay Culiat
-PHILIPPINE_HOLIDAYS = [
-    '01-01',  # New Year's Day
-    '02-25',  # EDSA People Power Anniversary
-    '04-09',  # Araw ng Kagitingan
-    '06-12',  # Independence Day
-    '08-21',  # Ninoy Aquino Day
-    '08-26',  # National Heroes Day
-    '11-01',  # All Saints' Day
-    '11-02',  # All Souls' Day
-    '11-30',  # Bonifacio Day
-    '12-25',  # Christmas Day
-    '12-30',  # Rizal Day
-]
-
+# Barangay Culiat events, counted as holidays by src/calendar_features.py on top of
+# the national holidays of src/holiday_calendar.py
 BARANGAY_CULIAT_EVENTS = [
     '09-08',  # Barangay Culiat Fiesta
     '02-11',  # Barangay Culiat Founding Day
@@ -0,0 +1,130 @@
+"""
+Benchmark micro-batching window sizes
+Runs concurrent client threads against one model the way the threaded model server does
+(one single-row prediction per request) and reports throughput and latency per window size
+
+Usage:
+    python scripts/benchmark_micro_batching.py
+    python scripts/benchmark_micro_batching.py --model intent --clients 64 --windows off,0,2,5,10
+
+Requires trained models (see the train_*.py scripts)
+"""
+
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.micro_batcher import MicroBatcher
+from src.auto_approval_risk import get_risk_model
+from src.purpose_analysis import get_purpose_model
+from src.chatbot_intent import get_intent_model
+from scripts.benchmark_risk_batch import synthetic_reservations
+
+
+PURPOSES = [
+    'Basketball Tournament', 'Barangay General Assembly', 'Birthday Party', 'Zumba Class',
+    'Seminar on Disaster Preparedness', 'Wedding Reception', 'test', 'Youth Council Meeting',
+    'Feeding Program', 'Volleyball Practice', 'Church Choir Rehearsal', 'asdf',
+]
+
+QUESTIONS = [
+    'how do I book a facility', 'what are the office hours', 'can I cancel my reservation',
+    'how much is the covered court', 'is my booking approved', 'what documents do I need',
+]
+
+
+def build_target(name: str):
+    """
+    Set up one model
+
+    Returns:
+        Tuple of (single-row call taking a request index, batch function, attribute to attach the batcher to)
+    """
+    if name == 'risk':
+        model = get_risk_model()
+        model.load_model()
+        reservations = synthetic_reservations(1000)
+        return (lambda i: model.assess_reservation_risk(**reservations[i % len(reservations)]),
+                model.predict_risk_batch, (model, 'batcher'))
+    if name == 'purpose':
+        model = get_purpose_model()
+        model.load_category_model()
+        return (lambda i: model.classify_purpose_category(PURPOSES[i % len(PURPOSES)]),
+                model.predict_category_batch, (model, 'category_batcher'))
+    if name == 'unclear':
+        model = get_purpose_model()
+        model.load_unclear_model()
+        return (lambda i: model.detect_unclear_purpose(PURPOSES[i % len(PURPOSES)]),
+                model.predict_unclear_batch, (model, 'unclear_batcher'))
+    if name == 'intent':
+        model = get_intent_model()
+        model.load_model()
+        return (lambda i: model.classify_intent(QUESTIONS[i % len(QUESTIONS)]),
+                model.classify_intents, (model, 'batcher'))
+    raise ValueError(f"Unknown model: {name}")
+
+
+def run_load(call, clients: int, duration: float):
+    """Run clients threads calling call() back to back for duration seconds; returns per-request latencies"""
+    latencies = [[] for _ in range(clients)]
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        i = index
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            call(i)
+            latencies[index].append(time.perf_counter() - start)
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latency for per_client in latencies for latency in per_client)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100.0))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark micro-batching window sizes')
+    parser.add_argument('--model', default='risk', choices=['risk', 'purpose', 'unclear', 'intent'])
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent client threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per window size')
+    parser.add_argument('--windows', default='off,0,1,2,5,10', help="Window sizes in ms ('off' = no batching)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Micro-Batching Benchmark ({args.model}, {args.clients} clients)")
+    print("=" * 60)
+
+    call, batch_fn, (model, attribute) = build_target(args.model)
+    run_load(call, 4, 0.5)  # Warm up
+
+    print(f"\n{'window':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'batch size':>11}")
+    for window in args.windows.split(','):
+        batcher = None
+        if window != 'off':
+            batcher = MicroBatcher(batch_fn, float(window), name=f'bench-{window}')
+        setattr(model, attribute, batcher)
+
+        latencies = run_load(call, args.clients, args.duration)
+        setattr(model, attribute, None)
+
+        mean_batch = f"{batcher.stats()['mean_batch_size']:.1f}" if batcher else '1'
+        print(f"{window:>8} {len(latencies) / args.duration:>10.0f} "
+              f"{percentile(latencies, 50) * 1000:>9.2f} {percentile(latencies, 99) * 1000:>9.2f} {mean_batch:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark the columnar auto-approval feature builder against the row loop it replaced
+Builds the risk training features and labels for N synthetic reservations (10k, 100k and
+1M by default) with both, checks that the feature matrices and labels are identical
+(values and dtypes) and reports the times
+
+The synthetic data has the column types the training script gets from MySQL: DECIMAL
+max_duration_hours, NULL thresholds and attendee counts, unknown facilities and missing
+reservation dates.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from decimal import Decimal
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from scripts.train_auto_approval_risk import prepare_features, risk_labels, extract_capacity_number
+from src.calendar_features import calendar_features
+from src.time_slots import time_slot_features
+
+
+TIME_SLOTS = ['08:00 - 12:00', '13:00 - 17:00', '18:00 - 22:00', '09:30 - 11:00', 'Morning', 'Afternoon', 'Evening']
+STATUSES = ['approved', 'denied', 'cancelled', 'pending', 'Approved']
+
+
+def synthetic_data(count: int, seed: int = 42):
+    """Reservations, facilities and users frames shaped like the training script's"""
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(datetime.now().date(), 'D')
+
+    dates = today + rng.integers(-365, 90, count).astype('timedelta64[D]')
+    dates = pd.Series(dates.astype('datetime64[ns]'))
+    dates[rng.random(count) < 0.01] = pd.NaT
+    attendees = pd.Series(rng.integers(5, 400, count), dtype='float64')
+    attendees[rng.random(count) < 0.05] = np.nan
+
+    reservations = pd.DataFrame({
+        'id': np.arange(1, count + 1),
+        'user_id': rng.integers(1, max(count // 20, 10), count),
+        'facility_id': rng.integers(1, 14, count),  # 13 is not a facility
+        'reservation_date': dates,
+        'time_slot': rng.choice(TIME_SLOTS, count),
+        'purpose': 'Barangay assembly',
+        'status': rng.choice(STATUSES, count),
+        'expected_attendees': attendees,
+        'is_commercial': rng.integers(0, 2, count),
+        'auto_approved': rng.integers(0, 2, count),
+        'user_is_verified': rng.choice([1.0, 0.0], count, p=[0.8, 0.2]),
+    })
+
+    facilities = pd.DataFrame({
+        'id': np.arange(1, 13),
+        'name': [f"Facility {i}" for i in range(1, 13)],
+        'capacity': ['100', '50 persons', 200, None, '300', 'approx. 80', 150, '120', '60', 'n/a', 250, '40'],
+        'auto_approve': [1, 0, 1, 1, 0, 0, 1, 0, 1, 0, 0, 1],
+        'capacity_threshold': [100, None, 150, 0, None, 80, 200, None, 50, 100, None, 30],
+        'max_duration_hours': [Decimal('4.00'), Decimal('8.00'), None, Decimal('0.00'), Decimal('6.50'), None,
+                               Decimal('12.00'), Decimal('3.00'), None, Decimal('8.00'), Decimal('5.25'), None],
+    })
+
+    user_ids = np.arange(1, max(count // 20, 10))
+    users = pd.DataFrame({
+        'id': user_ids,
+        'is_verified': rng.integers(0, 2, len(user_ids)),
+        'violation_count': np.where(rng.random(len(user_ids)) < 0.1, rng.integers(1, 4, len(user_ids)), 0).astype(float),
+    })
+    return reservations, facilities, users
+
+
+def legacy_prepare_features(reservations_df: pd.DataFrame, facilities_df: pd.DataFrame, users_df: pd.DataFrame = None):
+    """The per-row builder prepare_features replaced (iterrows, one dict per reservation)"""
+    features = []
+
+    if 'reservation_date' in reservations_df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(reservations_df['reservation_date']):
+            reservations_df['reservation_date'] = pd.to_datetime(reservations_df['reservation_date'], errors='coerce')
+
+    user_booking_counts = reservations_df.groupby('user_id').size().to_dict()
+
+    user_violations = {}
+    if users_df is not None and 'violation_count' in users_df.columns:
+        user_violations = dict(zip(users_df['id'], users_df['violation_count']))
+
+    facility_dict = {}
+    for _, fac in facilities_df.iterrows():
+        facility_dict[fac['id']] = {
+            'auto_approve': fac.get('auto_approve', 0),
+            'capacity': extract_capacity_number(fac.get('capacity', 100)),
+            'max_duration_hours': fac.get('max_duration_hours', 8.0) if pd.notna(fac.get('max_duration_hours')) else 8.0,
+            'capacity_threshold': fac.get('capacity_threshold', 200) if pd.notna(fac.get('capacity_threshold')) else 200,
+        }
+
+    current_date = datetime.now().date()
+    calendar = calendar_features(reservations_df['reservation_date'])
+    time_slots, _ = time_slot_features(reservations_df['time_slot'])
+
+    for position, (_, row) in enumerate(reservations_df.iterrows()):
+        if pd.isna(row.get('reservation_date')):
+            continue
+
+        reservation_date = row['reservation_date']
+        if isinstance(reservation_date, pd.Timestamp):
+            reservation_date = reservation_date.date()
+        elif isinstance(reservation_date, str):
+            reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
+
+        try:
+            advance_days = (reservation_date - current_date).days
+        except:
+            advance_days = 0
+
+        facility_id = row['facility_id']
+        facility_info = facility_dict.get(facility_id, {
+            'auto_approve': 0,
+            'capacity': 100,
+            'max_duration_hours': 8.0,
+            'capacity_threshold': 200,
+        })
+
+        user_id = row['user_id']
+        user_booking_count = user_booking_counts.get(user_id, 0)
+        user_violation_count = user_violations.get(user_id, 0)
+        is_verified = row.get('user_is_verified', 1) if 'user_is_verified' in row else 1
+
+        expected_attendees = row.get('expected_attendees', 50) if pd.notna(row.get('expected_attendees')) else 50
+        capacity = facility_info['capacity']
+        capacity_ratio = expected_attendees / capacity if capacity > 0 else 0.5
+        duration_hours = int(time_slots['duration_hours'][position])
+        max_duration = facility_info['max_duration_hours']
+        duration_ratio = duration_hours / max_duration if max_duration > 0 else 1.0
+        is_commercial = 1 if row.get('is_commercial', False) else 0
+
+        capacity_threshold = facility_info['capacity_threshold']
+        within_capacity_threshold = 1 if (capacity_threshold is None or expected_attendees <= capacity_threshold) else 0
+        within_duration_limit = 1 if (max_duration is None or duration_hours <= max_duration) else 0
+        within_advance_window = 1 if (0 <= advance_days <= 60) else 0
+
+        features.append({
+            'facility_id': int(facility_id) if pd.notna(facility_id) else 0,
+            'facility_auto_approve': 1 if facility_info['auto_approve'] else 0,
+            'facility_capacity': capacity,
+            'facility_max_duration_hours': max_duration,
+            'facility_capacity_threshold': capacity_threshold if capacity_threshold else 999,
+            'user_id': int(user_id) if pd.notna(user_id) else 0,
+            'user_is_verified': 1 if is_verified else 0,
+            'user_booking_count': user_booking_count,
+            'user_violation_count': user_violation_count,
+            'start_hour': int(time_slots['start_hour'][position]),
+            'end_hour': int(time_slots['end_hour'][position]),
+            'duration_hours': duration_hours,
+            'day_of_week': int(calendar['day_of_week'][position]),
+            'month': int(calendar['month'][position]),
+            'is_weekend': int(calendar['is_weekend'][position]),
+            'is_holiday': int(calendar['is_holiday'][position]),
+            'expected_attendees': int(expected_attendees) if pd.notna(expected_attendees) else 50,
+            'capacity_ratio': capacity_ratio,
+            'duration_ratio': duration_ratio,
+            'is_commercial': is_commercial,
+            'advance_days': advance_days,
+            'within_capacity_threshold': within_capacity_threshold,
+            'within_duration_limit': within_duration_limit,
+            'within_advance_window': within_advance_window,
+        })
+
+    if not features:
+        raise ValueError("No valid features extracted from data.")
+
+    return pd.DataFrame(features)
+
+
+def legacy_risk_label(row: pd.Series):
+    """The per-row label risk_labels replaced"""
+    status = str(row.get('status', '')).lower()
+    auto_approved = row.get('auto_approved', False)
+    if auto_approved and status == 'approved':
+        return 0
+    if status == 'denied':
+        return 1
+    if status == 'cancelled':
+        return 1
+    if status == 'approved' and not auto_approved:
+        return 1
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark columnar vs per-row risk feature building')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated reservation counts')
+    parser.add_argument('--max-legacy-rows', type=int, default=100000,
+                        help='Run the per-row builder on at most this many rows; larger sizes are extrapolated and not compared')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Auto-Approval Risk Feature Building Benchmark")
+    print("=" * 60)
+
+    print(f"\n{'rows':>9} {'per-row (s)':>13} {'columnar (s)':>14} {'speedup':>9}  identical")
+    legacy_rate = None
+    for size in [int(s) for s in args.sizes.split(',')]:
+        reservations, facilities, users = synthetic_data(size)
+        valid = reservations['reservation_date'].notna()
+
+        start = time.perf_counter()
+        X = prepare_features(reservations.copy(), facilities, users)
+        y = risk_labels(reservations[valid])
+        columnar_seconds = time.perf_counter() - start
+
+        if size <= args.max_legacy_rows:
+            start = time.perf_counter()
+            legacy_X = legacy_prepare_features(reservations.copy(), facilities, users)
+            legacy_y = reservations[valid].apply(legacy_risk_label, axis=1)
+            legacy_seconds = time.perf_counter() - start
+            legacy_rate = legacy_seconds / size
+
+            try:
+                pd.testing.assert_frame_equal(X, legacy_X, check_exact=True)
+                pd.testing.assert_series_equal(y, legacy_y, check_exact=True, check_dtype=False)
+                assert y.dtype == np.int64
+                identical = 'yes'
+            except AssertionError as e:
+                identical = 'NO'
+                print(f"   Mismatch at {size} rows: {e}")
+            mark = ' '
+        else:
+            legacy_seconds = legacy_rate * size if legacy_rate else float('nan')
+            identical = '-'
+            mark = '*'
+
+        print(f"{size:>9} {legacy_seconds:>12.2f}{mark} {columnar_seconds:>14.3f} "
+              f"{legacy_seconds / columnar_seconds:>8.0f}x  {identical}")
+
+    print(f"\n* per-row time extrapolated from the largest size it ran on (--max-legacy-rows {args.max_legacy_rows})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark batch vs per-row auto-approval risk scoring
+Compares one assess_reservations_risk call over N reservations against the per-row
+predictor it replaced (copied below: pd.to_datetime, a one-row DataFrame, encoder
+transforms and separate predict/predict_proba calls per reservation, on the sklearn
+pickle) for N = 1, 100 and 10,000, and checks that both give the same risk levels
+
+Requires a trained model (python scripts/train_auto_approval_risk.py)
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.auto_approval_risk import AutoApprovalRiskModel, EXPECTED_FEATURES, extract_capacity_number
+from src.calendar_features import date_features
+from src.model_store import load_artifact
+from src.time_slots import parse_time_slot
+
+
+TIME_SLOTS = ['08:00 - 12:00', '13:00 - 17:00', '18:00 - 22:00', 'Morning', 'Afternoon', 'Evening']
+
+
+def synthetic_reservations(count: int, seed: int = 42):
+    """Generate assess_reservation_risk keyword arguments for count reservations"""
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    reservations = []
+    for _ in range(count):
+        reservations.append({
+            'facility_id': rng.randint(1, 10),
+            'user_id': rng.randint(1, 500),
+            'reservation_date': (today + timedelta(days=rng.randint(-10, 90))).strftime('%Y-%m-%d'),
+            'time_slot': rng.choice(TIME_SLOTS),
+            'expected_attendees': rng.randint(5, 400),
+            'is_commercial': rng.random() < 0.2,
+            'facility_auto_approve': rng.random() < 0.5,
+            'facility_capacity': rng.choice([50, 100, 200, 300]),
+            'facility_max_duration_hours': rng.choice([4.0, 8.0]),
+            'facility_capacity_threshold': rng.choice([100, 200, None]),
+            'user_is_verified': rng.random() < 0.8,
+            'user_booking_count': rng.randint(0, 30),
+            'user_violation_count': rng.randint(0, 2),
+        })
+    return reservations
+
+
+def legacy_predict_risk(model, encoders, features: dict):
+    """The per-row predict_risk the batch path replaced (one-row DataFrame, sklearn model)"""
+    feature_dict = {
+        'facility_id': features.get('facility_id', 0),
+        'facility_auto_approve': 1 if features.get('facility_auto_approve', False) else 0,
+        'facility_capacity': features.get('facility_capacity', 100),
+        'facility_max_duration_hours': features.get('facility_max_duration_hours', 8.0),
+        'facility_capacity_threshold': features.get('facility_capacity_threshold', 200),
+        'user_id': features.get('user_id', 0),
+        'user_is_verified': 1 if features.get('user_is_verified', True) else 0,
+        'user_booking_count': features.get('user_booking_count', 0),
+        'user_violation_count': features.get('user_violation_count', 0),
+        'start_hour': features.get('start_hour', 12),
+        'end_hour': features.get('end_hour', 17),
+        'duration_hours': features.get('duration_hours', 4),
+        'day_of_week': features.get('day_of_week', 0),
+        'month': features.get('month', 1),
+        'is_weekend': features.get('is_weekend', 0),
+        'is_holiday': features.get('is_holiday', 0),
+        'expected_attendees': features.get('expected_attendees', 50),
+        'capacity_ratio': features.get('capacity_ratio', 0.5),
+        'duration_ratio': features.get('duration_ratio', 0.5),
+        'is_commercial': 1 if features.get('is_commercial', False) else 0,
+        'advance_days': features.get('advance_days', 0),
+        'within_capacity_threshold': 1 if features.get('within_capacity_threshold', True) else 0,
+        'within_duration_limit': 1 if features.get('within_duration_limit', True) else 0,
+        'within_advance_window': 1 if features.get('within_advance_window', True) else 0,
+    }
+
+    # Encode categorical features
+    for col in ('facility_id', 'user_id'):
+        value = str(feature_dict.pop(col))
+        if col in encoders and value in encoders[col].classes_:
+            feature_dict[f'{col}_encoded'] = encoders[col].transform([value])[0]
+        else:
+            feature_dict[f'{col}_encoded'] = 0
+
+    feature_df = pd.DataFrame([feature_dict])
+    for col in EXPECTED_FEATURES:
+        if col not in feature_df.columns:
+            feature_df[col] = 0
+    feature_df = feature_df[EXPECTED_FEATURES]
+
+    risk_level = model.predict(feature_df)[0]
+    risk_proba = model.predict_proba(feature_df)[0]
+    high_risk_prob = risk_proba[1] if len(risk_proba) > 1 else risk_proba[0]
+    return {
+        'risk_level': int(risk_level),
+        'risk_probability': float(high_risk_prob),
+        'confidence': float(max(risk_proba)),
+        'is_low_risk': bool(risk_level == 0),
+        'is_high_risk': bool(risk_level == 1),
+    }
+
+
+def legacy_assess_reservation_risk(model, encoders, reservation: dict):
+    """The per-row assess_reservation_risk the batch path replaced (pd.to_datetime per call)"""
+    try:
+        res_date = pd.to_datetime(reservation['reservation_date'])
+        calendar = date_features(res_date.to_pydatetime())
+        advance_days = (res_date.date() - datetime.now().date()).days
+    except Exception:
+        calendar = date_features(None)
+        advance_days = 0
+
+    slot = parse_time_slot(reservation['time_slot'])
+    attendees = reservation['expected_attendees']
+    max_hours = reservation['facility_max_duration_hours']
+    threshold = reservation['facility_capacity_threshold']
+    capacity = extract_capacity_number(reservation['facility_capacity'])
+
+    features = dict(reservation)
+    features.update(calendar)
+    features.update({
+        'facility_capacity': capacity,
+        'facility_capacity_threshold': threshold if threshold else 999,
+        'start_hour': slot.start_hour,
+        'end_hour': slot.end_hour,
+        'duration_hours': slot.duration_hours,
+        'capacity_ratio': attendees / capacity if capacity > 0 else 0.5,
+        'duration_ratio': slot.duration_hours / max_hours if max_hours > 0 else 1.0,
+        'advance_days': advance_days,
+        'within_capacity_threshold': 1 if (threshold is None or attendees <= threshold) else 0,
+        'within_duration_limit': 1 if (max_hours is None or slot.duration_hours <= max_hours) else 0,
+        'within_advance_window': 1 if (0 <= advance_days <= 60) else 0,
+    })
+    return legacy_predict_risk(model, encoders, features)
+
+
+def same_results(batch: list, legacy: list):
+    """Same risk levels, and probabilities equal up to float rounding (the batch path may use the array export)"""
+    return all(
+        new['risk_level'] == old['risk_level'] and abs(new['risk_probability'] - old['risk_probability']) < 1e-9
+        for new, old in zip(batch, legacy)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch risk scoring')
+    parser.add_argument('--sizes', default='1,100,10000', help='Comma-separated batch sizes')
+    parser.add_argument('--max-loop-rows', type=int, default=500,
+                        help='Time the per-row loop on at most this many rows and extrapolate beyond it')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Auto-Approval Risk Batch Scoring Benchmark")
+    print("=" * 60)
+
+    model = AutoApprovalRiskModel()
+    if not model.load_model():
+        print("No trained model found. Run scripts/train_auto_approval_risk.py first.")
+        return
+
+    model_path = config.MODELS_DIR / 'auto_approval_risk_model.pkl'
+    if not model_path.exists():
+        print("The per-row baseline needs the model pickle. Run scripts/train_auto_approval_risk.py first.")
+        return
+    legacy_model = load_artifact(model_path)
+    legacy_encoders = load_artifact(config.MODELS_DIR / 'auto_approval_risk_encoders.pkl')
+
+    # Warm up (first call pays for sklearn thread pool start-up)
+    model.assess_reservations_risk(synthetic_reservations(10))
+    legacy_assess_reservation_risk(legacy_model, legacy_encoders, synthetic_reservations(1)[0])
+
+    print(f"\n{'rows':>8} {'per-row loop (s)':>18} {'batch (s)':>12} {'speedup':>10}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        reservations = synthetic_reservations(size)
+
+        loop_rows = min(size, args.max_loop_rows)
+        start = time.perf_counter()
+        loop_results = [legacy_assess_reservation_risk(legacy_model, legacy_encoders, r)
+                        for r in reservations[:loop_rows]]
+        loop_seconds = (time.perf_counter() - start) * size / loop_rows
+
+        start = time.perf_counter()
+        batch_results = model.assess_reservations_risk(reservations)
+        batch_seconds = time.perf_counter() - start
+
+        if not same_results(batch_results[:loop_rows], loop_results):
+            print(f"   WARNING: batch results differ from per-row results at {size} rows")
+
+        extrapolated = '*' if loop_rows < size else ' '
+        print(f"{size:>8} {loop_seconds:>17.4f}{extrapolated} {batch_seconds:>12.4f} {loop_seconds / batch_seconds:>9.1f}x")
+
+    print(f"\n* per-row time extrapolated from the first {args.max_loop_rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Check the cold-start import budget of the api/ endpoints
+Runs each endpoint once with `python -X importtime` and compares the total
+import time against STARTUP_BUDGET_MS, and the imported modules against
+FORBIDDEN_IMPORTS. Exits with status 1 on any regression.
+
+Usage:
+    python scripts/check_startup_budget.py
+    python scripts/check_startup_budget.py --verbose     # Also list the slowest top-level imports
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+AI_DIR = Path(__file__).parent.parent
+
+# Target total import time per endpoint, in milliseconds, measured with -X importtime
+# (which itself adds overhead). With the models exported to the array format
+# (scripts/export_model_arrays.py) the model endpoints only import numpy; falling back
+# to the pickles pulls in sklearn (and pandas through it) and blows the budget.
+STARTUP_BUDGET_MS = {
+    'predict_risk.py': 400,
+    'recommend_facilities.py': 400,
+    'classify_intent.py': 400,
+    'classify_purpose.py': 400,
+    'detect_unclear_purpose.py': 400,
+    'detect_holidays.py': 100,
+    'analyze_reservation.py': 400,
+    'health.py': 400,
+}
+
+# Modules an endpoint must never import
+_MODEL_ENDPOINT_FORBIDDEN = ['dotenv', 'pymysql', 'pandas', 'sklearn', 'joblib']
+FORBIDDEN_IMPORTS = {
+    'predict_risk.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'recommend_facilities.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'classify_intent.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'classify_purpose.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'detect_unclear_purpose.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'detect_holidays.py': ['dotenv', 'pymysql', 'numpy', 'pandas', 'sklearn', 'joblib'],
+    'analyze_reservation.py': _MODEL_ENDPOINT_FORBIDDEN,
+    'health.py': _MODEL_ENDPOINT_FORBIDDEN,
+}
+
+SAMPLE_INPUTS = {
+    'predict_risk.py': {
+        'facility_id': 1, 'user_id': 1, 'reservation_date': '2026-02-15',
+        'time_slot': '08:00 - 12:00', 'expected_attendees': 50,
+    },
+    'recommend_facilities.py': {
+        'facilities': [{'id': 1, 'name': 'Covered Court', 'capacity': '200', 'amenities': 'Court, Chairs'}],
+        'user_id': 1, 'purpose': 'Basketball Tournament', 'reservation_date': '2026-02-15',
+    },
+    'classify_intent.py': {'question': 'how do I book'},
+    'classify_purpose.py': {'purpose': 'Basketball Tournament'},
+    'detect_unclear_purpose.py': {'purpose': 'Barangay General Assembly'},
+    'detect_holidays.py': {'date': '2026-12-25'},
+    'analyze_reservation.py': {
+        'facility_id': 1, 'user_id': 1, 'reservation_date': '2026-12-25',
+        'time_slot': '08:00 - 12:00', 'expected_attendees': 50, 'purpose': 'Basketball Tournament',
+    },
+    'health.py': {},
+}
+
+
+def measure(script: str):
+    """
+    Run one endpoint under -X importtime
+
+    Returns:
+        Tuple of (total import ms, {top-level module: cumulative ms}, set of all imported modules)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(AI_DIR / 'api' / script)],
+        input=json.dumps(SAMPLE_INPUTS[script]),
+        capture_output=True,
+        text=True,
+        cwd=str(AI_DIR),
+    )
+
+    top_level = {}
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        modules.add(name.strip())
+        # Nested imports are indented; only top-level ones add up to the total
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative_us) / 1000.0
+    return sum(top_level.values()), top_level, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check api/ endpoint import budgets')
+    parser.add_argument('--verbose', action='store_true', help='List the slowest top-level imports')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("API Endpoint Startup Budget (-X importtime)")
+    print("=" * 60)
+
+    failures = []
+    print(f"\n{'endpoint':28} {'import ms':>10} {'budget':>8}")
+    for script, budget in STARTUP_BUDGET_MS.items():
+        total_ms, top_level, modules = measure(script)
+        status = 'OK' if total_ms <= budget else 'OVER'
+        print(f"{script:28} {total_ms:>10.1f} {budget:>8} {status}")
+
+        if total_ms > budget:
+            failures.append(f"{script}: {total_ms:.0f} ms > {budget} ms")
+        forbidden = [m for m in FORBIDDEN_IMPORTS.get(script, [])
+                     if any(name == m or name.startswith(m + '.') for name in modules)]
+        if forbidden:
+            failures.append(f"{script}: imports {', '.join(forbidden)}")
+
+        if args.verbose:
+            for name, ms in sorted(top_level.items(), key=lambda item: -item[1])[:5]:
+                print(f"    {name:40} {ms:8.1f}")
+
+    if failures:
+        print("\nBudget regressions:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("\nAll endpoints within budget.")
+
+
+if __name__ == "__main__":
+    main()
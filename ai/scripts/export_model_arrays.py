@@ -0,0 +1,98 @@
+"""
+Export trained models to the pickle-free array format
+Writes models/<model>.npz next to each model pickle (forest plus its encoders or
+vectorizer) and reports load and single-row inference times. export_model_arrays only
+publishes an export that predicts exactly like the pickle; one that does not is not
+written (and an older one is removed), so the inference modules load the pickle.
+
+The training scripts export automatically; run this for models trained before the
+array format existed.
+
+Usage:
+    python scripts/export_model_arrays.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import joblib
+
+import config
+from src.forest_arrays import arrays_path_for, export_model_arrays, load_model_arrays, verification_input
+
+
+# (model pickle, encoders pickle, vectorizer pickle)
+ARTIFACTS = [
+    ('auto_approval_risk_model.pkl', 'auto_approval_risk_encoders.pkl', None),
+    ('facility_recommendation_model.pkl', 'facility_recommendation_encoders.pkl', None),
+    ('purpose_category_model.pkl', None, 'purpose_category_vectorizer.pkl'),
+    ('purpose_unclear_model.pkl', None, 'purpose_unclear_vectorizer.pkl'),
+    ('chatbot_intent_model.pkl', None, 'chatbot_intent_vectorizer.pkl'),
+]
+
+def time_call(fn, repeat: int = 200):
+    """Median seconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def export_one(model_name, encoders_name, vectorizer_name):
+    model_path = config.MODELS_DIR / model_name
+    if not model_path.exists():
+        print(f"   {model_name}: not trained, skipped")
+        return True
+
+    model = joblib.load(model_path)
+    encoders = joblib.load(config.MODELS_DIR / encoders_name) if encoders_name else None
+    vectorizer = joblib.load(config.MODELS_DIR / vectorizer_name) if vectorizer_name else None
+    # Raises ValueError (and publishes nothing) unless the export predicts like the pickle
+    arrays_path = export_model_arrays(arrays_path_for(model_path), model, encoders=encoders, vectorizer=vectorizer)
+
+    start = time.perf_counter()
+    bundle = load_model_arrays(arrays_path)
+    load_ms = (time.perf_counter() - start) * 1000
+    exported = bundle['model']
+
+    # Time on plain arrays, the way the inference modules call the model
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    X, texts = verification_input(model, vectorizer)
+    X_exported = bundle['vectorizer'].transform(texts) if texts is not None else X
+    row, row_exported = X[:1], X_exported[:1]
+    sklearn_us = time_call(lambda: model.predict(row)) * 1e6
+    exported_us = time_call(lambda: exported.predict(row_exported)) * 1e6
+
+    print(f"   {model_name}: {arrays_path.name} ({arrays_path.stat().st_size / 1024:.0f} KB), "
+          f"load {load_ms:.1f} ms, single row {sklearn_us:.0f} us -> {exported_us:.0f} us, identical")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("Export Models to Array Format")
+    print("=" * 60)
+
+    ok = True
+    for model_name, encoders_name, vectorizer_name in ARTIFACTS:
+        try:
+            ok = export_one(model_name, encoders_name, vectorizer_name) and ok
+        except ValueError as e:
+            print(f"   {model_name}: cannot export ({e})")
+            ok = False
+
+    if not ok:
+        print("\nSome models were not exported; the inference modules load their pickles instead.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
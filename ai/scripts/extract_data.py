@@ -1,86 +1,140 @@
 """
 Script to extract data from database for training
 Run this first to prepare training data
+
+The reservations, facilities, users and historical conflicts queries run at the same
+time, each on its own connection from the pool (src/db_pool.py), so the whole extraction
+takes about as long as the slowest query (usually the conflicts self-join) instead of the
+sum of all four.
+
+Usage:
+    python scripts/extract_data.py
+    python scripts/extract_data.py --workers 1      # one query at a time
 """
 
 import sys
+import time
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.data_loader import DataLoader
+from src.db_pool import get_pool
 import config
 import pandas as pd
 from datetime import datetime, timedelta
 
-def main():
-    """Extract and save training data"""
-    print("=" * 60)
-    print("Data Extraction Script")
-    print("=" * 60)
-    
-    # Initialize data loader
+# name: CSV file; slowest first, so it starts before the others
+EXTRACTIONS = {
+    'conflicts': 'conflicts.csv',
+    'reservations': 'reservations.csv',
+    'users': 'users.csv',
+    'facilities': 'facilities.csv',
+}
+
+
+def run_query(loader: DataLoader, name: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """The DataFrame of one extraction"""
+    if name == 'conflicts':
+        return loader.get_historical_conflicts(lookback_months=12)
+    if name == 'reservations':
+        return loader.load_reservations(start_date=start_date, end_date=end_date)
+    if name == 'users':
+        return loader.load_users()
+    return loader.load_facilities()
+
+
+def extract(name: str, start_date: str, end_date: str):
+    """
+    Run one extraction on its own pooled connection and save it as CSV
+
+    Returns:
+        Dict with name, path, rows, query and save seconds, and error (traceback or None)
+    """
+    result = {'name': name, 'path': config.DATA_DIR / EXTRACTIONS[name], 'rows': 0,
+              'query_seconds': 0.0, 'save_seconds': 0.0, 'error': None}
     loader = DataLoader()
-    
     try:
         loader.connect()
-        
-        # Extract last 12 months of data for training
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-        
-        print(f"\nExtracting data from {start_date} to {end_date}...")
-        
-        # Load reservations
-        print("\n1. Loading reservations...")
-        reservations_df = loader.load_reservations(start_date=start_date, end_date=end_date)
-        reservations_path = config.DATA_DIR / 'reservations.csv'
-        reservations_df.to_csv(reservations_path, index=False)
-        print(f"   Saved to: {reservations_path}")
-        print(f"   Records: {len(reservations_df)}")
-        
-        # Load facilities
-        print("\n2. Loading facilities...")
-        facilities_df = loader.load_facilities()
-        facilities_path = config.DATA_DIR / 'facilities.csv'
-        facilities_df.to_csv(facilities_path, index=False)
-        print(f"   Saved to: {facilities_path}")
-        print(f"   Records: {len(facilities_df)}")
-        
-        # Load users
-        print("\n3. Loading users...")
-        users_df = loader.load_users()
-        users_path = config.DATA_DIR / 'users.csv'
-        users_df.to_csv(users_path, index=False)
-        print(f"   Saved to: {users_path}")
-        print(f"   Records: {len(users_df)}")
-        
-        # Load conflict data
-        print("\n4. Loading historical conflicts...")
-        conflicts_df = loader.get_historical_conflicts(lookback_months=12)
-        conflicts_path = config.DATA_DIR / 'conflicts.csv'
-        conflicts_df.to_csv(conflicts_path, index=False)
-        print(f"   Saved to: {conflicts_path}")
-        print(f"   Records: {len(conflicts_df)}")
-        
-        # Summary
-        print("\n" + "=" * 60)
-        print("Data Extraction Complete!")
-        print("=" * 60)
-        print(f"\nData saved to: {config.DATA_DIR}")
-        print(f"\nSummary:")
-        print(f"  - Reservations: {len(reservations_df)}")
-        print(f"  - Facilities: {len(facilities_df)}")
-        print(f"  - Users: {len(users_df)}")
-        print(f"  - Conflicts: {len(conflicts_df)}")
-        
-    except Exception as e:
-        print(f"\nError during data extraction: {e}")
-        import traceback
-        traceback.print_exc()
+        start = time.perf_counter()
+        df = run_query(loader, name, start_date, end_date)
+        result['query_seconds'] = time.perf_counter() - start
+        result['rows'] = len(df)
+
+        start = time.perf_counter()
+        df.to_csv(result['path'], index=False)
+        result['save_seconds'] = time.perf_counter() - start
+    except Exception:
+        result['error'] = traceback.format_exc()
     finally:
         loader.disconnect()
+    return result
+
+
+def print_report(results: list, total: float):
+    """Rows and seconds per extraction, and the wall time against the sum of the queries"""
+    print("\n" + "=" * 60)
+    print("Timing Report")
+    print("=" * 60)
+    print(f"{'Extraction':<14} {'Rows':>10} {'Query s':>9} {'Save s':>8}")
+    for result in results:
+        status = ' (failed)' if result['error'] else ''
+        print(f"{result['name']:<14} {result['rows']:>10} {result['query_seconds']:9.2f} "
+              f"{result['save_seconds']:8.2f}{status}")
+    busy = sum(result['query_seconds'] + result['save_seconds'] for result in results)
+    print(f"\nWall time: {total:.2f}s (one after another: {busy:.2f}s)")
+
+
+def main():
+    """Extract and save training data"""
+    parser = argparse.ArgumentParser(description='Extract training data to CSV')
+    parser.add_argument('--workers', type=int, default=len(EXTRACTIONS),
+                        help='Queries running at once, each on its own connection (default: all, up to the pool size)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Data Extraction Script")
+    print("=" * 60)
+
+    config.ensure_dirs()
+
+    # Extract last 12 months of data for training
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+
+    # More workers than pooled connections would only wait for one
+    workers = max(1, min(args.workers, len(EXTRACTIONS), get_pool().max_size))
+    print(f"\nExtracting data from {start_date} to {end_date} ({workers} queries at a time)...\n")
+
+    start = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract, name, start_date, end_date) for name in EXTRACTIONS]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['error']:
+                print(f"\nError extracting {result['name']}:\n{result['error'].rstrip()}")
+            else:
+                print(f"   {result['name']}: {result['rows']} records saved to {result['path']}")
+    total = time.perf_counter() - start
+
+    results.sort(key=lambda result: list(EXTRACTIONS).index(result['name']))
+    print_report(results, total)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("Data Extraction Complete!" if not any(result['error'] for result in results)
+          else "Data Extraction Finished With Errors")
+    print("=" * 60)
+    print(f"\nData saved to: {config.DATA_DIR}")
+
+    if any(result['error'] for result in results):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
+import pymysql
 import json
 from src.data_loader import DataLoader
 import config
@@ -46,10 +47,11 @@ def extract_purposes_from_reservations(loader: DataLoader, start_date: str = Non
     
     query += " ORDER BY created_at DESC"
     
-    cursor = loader.connection.cursor()
-    cursor.execute(query, params if params else None)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
+    # Tuple rows, zipped with the column names below
+    with loader.borrow() as connection, connection.cursor(pymysql.cursors.Cursor) as cursor:
+        cursor.execute(query, params if params else None)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
     
     import datetime as dt
     data = []
@@ -98,10 +100,11 @@ def extract_purposes_from_audit_logs(loader: DataLoader, start_date: str = None,
     
     query += " ORDER BY created_at DESC"
     
-    cursor = loader.connection.cursor()
-    cursor.execute(query, params if params else None)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
+    # Tuple rows, zipped with the column names below
+    with loader.borrow() as connection, connection.cursor(pymysql.cursors.Cursor) as cursor:
+        cursor.execute(query, params if params else None)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
     
     import datetime as dt
     data = []
@@ -163,10 +166,11 @@ def extract_from_reservation_history(loader: DataLoader, start_date: str = None,
     
     query += " ORDER BY rh.created_at DESC"
     
-    cursor = loader.connection.cursor()
-    cursor.execute(query, params if params else None)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
+    # Tuple rows, zipped with the column names below
+    with loader.borrow() as connection, connection.cursor(pymysql.cursors.Cursor) as cursor:
+        cursor.execute(query, params if params else None)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
     
     import datetime as dt
     data = []
@@ -0,0 +1,124 @@
+"""
+Measure the memory of the loaded training frames with and without the compact dtypes
+Builds reservations and users frames shaped like DataLoader's (synthetic values, the
+dtypes a plain load gives), converts them with the loader's schemas and reports
+DataFrame.memory_usage(deep=True) per million rows, per column and in total.
+
+Usage:
+    python scripts/measure_frame_memory.py                   # 200,000 rows, scaled to 1M
+    python scripts/measure_frame_memory.py --rows 1000000
+    python scripts/measure_frame_memory.py --columns         # Per-column breakdown
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.data_loader import RESERVATION_SCHEMA, USER_SCHEMA, _apply_schema
+
+TIME_SLOTS = ['08:00-10:00', '10:00-12:00', '13:00-15:00', '15:00-17:00', '18:00-21:00', '08:00-17:00']
+STATUSES = ['approved', 'pending', 'denied', 'cancelled']
+PURPOSES = ['Barangay general assembly', 'Basketball tournament', 'Birthday party celebration',
+            'Zumba fitness class', 'Seminar on disaster preparedness', 'Wedding reception']
+ROLES = ['resident', 'staff', 'admin']
+
+
+def synthetic_reservations(count: int, facilities: int = 40, seed: int = 42):
+    """Reservations frame with the columns and dtypes of a plain load_reservations()"""
+    rng = np.random.default_rng(seed)
+    users = max(count // 20, 10)
+    facility_ids = rng.integers(1, facilities + 1, count)
+    user_ids = rng.integers(1, users + 1, count)
+    today = np.datetime64(datetime.now().date(), 'D')
+    created = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 10**8, count), unit='s')
+    attendees = pd.Series(rng.integers(5, 400, count), dtype='float64')
+    attendees[rng.random(count) < 0.05] = np.nan  # NULL attendees keep the column float64
+
+    def per_facility(values):
+        return pd.Series(np.asarray(values, dtype=object)[facility_ids - 1], dtype='str')
+
+    return pd.DataFrame({
+        'id': np.arange(1, count + 1),
+        'user_id': user_ids,
+        'facility_id': facility_ids,
+        'reservation_date': pd.Series(today + rng.integers(-365, 90, count).astype('timedelta64[D]')).astype('datetime64[ns]'),
+        'time_slot': pd.Series(rng.choice(TIME_SLOTS, count), dtype='str'),
+        'purpose': pd.Series(rng.choice(PURPOSES, count), dtype='str'),
+        'status': pd.Series(rng.choice(STATUSES, count), dtype='str'),
+        'expected_attendees': attendees,
+        'is_commercial': rng.integers(0, 2, count),
+        'auto_approved': rng.integers(0, 2, count),
+        'created_at': created,
+        'updated_at': created + pd.to_timedelta(rng.integers(0, 10**6, count), unit='s'),
+        'facility_name': per_facility([f"Facility {i}" for i in range(1, facilities + 1)]),
+        'facility_capacity': per_facility([f"{50 * (i % 8 + 1)} persons" for i in range(facilities)]),
+        'facility_amenities': per_facility([f"chairs, tables, sound system, room {i}" for i in range(facilities)]),
+        'facility_status': per_facility(['available' if i % 10 else 'maintenance' for i in range(facilities)]),
+        'user_name': pd.Series([f"User {user_id}" for user_id in user_ids], dtype='str'),
+        'user_role': pd.Series(rng.choice(ROLES, count, p=[0.9, 0.08, 0.02]), dtype='str'),
+    })
+
+
+def synthetic_users(count: int, seed: int = 42):
+    """Users frame with the columns and dtypes of a plain load_users()"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(1, count + 1),
+        'name': pd.Series([f"User {i}" for i in range(1, count + 1)], dtype='str'),
+        'email': pd.Series([f"user{i}@example.com" for i in range(1, count + 1)], dtype='str'),
+        'role': pd.Series(rng.choice(ROLES, count, p=[0.9, 0.08, 0.02]), dtype='str'),
+        'status': pd.Series(['active'] * count, dtype='str'),
+        'latitude': rng.uniform(14.5, 14.7, count),
+        'longitude': rng.uniform(120.9, 121.1, count),
+        'created_at': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 10**8, count), unit='s'),
+    })
+
+
+def compact(df: pd.DataFrame, schema: dict):
+    """df converted with the loader's schema, compact dtypes on"""
+    setting = config.DATA_LOADER['compact_dtypes']
+    config.DATA_LOADER['compact_dtypes'] = True
+    try:
+        return _apply_schema(df.copy(), schema)
+    finally:
+        config.DATA_LOADER['compact_dtypes'] = setting
+
+
+def report(name: str, before: pd.DataFrame, after: pd.DataFrame, columns: bool):
+    """Print MB per million rows before and after"""
+    scale = 1_000_000 / len(before) / 2**20
+    usage_before = before.memory_usage(deep=True, index=False) * scale
+    usage_after = after.memory_usage(deep=True, index=False) * scale
+
+    print(f"\n{name} (MB per million rows)")
+    if columns:
+        print(f"{'Column':<22} {'Before':>16} {'After':>16}")
+        for col in before.columns:
+            print(f"{col:<22} {str(before[col].dtype)[:8]:>8} {usage_before[col]:7.1f} "
+                  f"{str(after[col].dtype)[:8]:>8} {usage_after[col]:7.1f}")
+    total_before, total_after = usage_before.sum(), usage_after.sum()
+    print(f"{'Total':<22} {total_before:16.1f} {total_after:16.1f}  ({total_before / total_after:.1f}x smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure loaded frame memory with and without compact dtypes')
+    parser.add_argument('--rows', type=int, default=200_000, help='Rows to generate (results are scaled to 1M)')
+    parser.add_argument('--columns', action='store_true', help='Show every column')
+    args = parser.parse_args()
+
+    reservations = synthetic_reservations(args.rows)
+    report('Reservations', reservations, compact(reservations, RESERVATION_SCHEMA), args.columns)
+    users = synthetic_users(args.rows)
+    report('Users', users, compact(users, USER_SCHEMA), args.columns)
+
+
+if __name__ == "__main__":
+    main()
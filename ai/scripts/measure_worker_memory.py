@@ -0,0 +1,111 @@
+"""
+Measure per-worker memory with all inference models loaded
+Starts N concurrent worker processes (like PHP-FPM fanning out api/ calls), each loading
+every model, and reports Rss / Pss / private / shared memory from /proc/<pid>/smaps_rollup
+
+Usage:
+    python scripts/measure_worker_memory.py                      # 20 workers, config mmap_mode
+    python scripts/measure_worker_memory.py --mmap-mode none     # Baseline without memory mapping
+    python scripts/measure_worker_memory.py --workers 5
+
+Linux only (needs /proc/<pid>/smaps_rollup)
+"""
+
+import sys
+import os
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+AI_DIR = Path(__file__).parent.parent
+
+# Loads every model the way the api/ endpoints do, then waits to be measured
+WORKER_CODE = """
+import sys
+sys.path.insert(0, '.')
+from src.auto_approval_risk import get_risk_model
+from src.facility_recommendation import get_recommendation_model
+from src.purpose_analysis import get_purpose_model
+from src.chatbot_intent import get_intent_model
+get_risk_model().load_model()
+get_recommendation_model().load_model()
+get_purpose_model().load_category_model()
+get_purpose_model().load_unclear_model()
+get_intent_model().load_model()
+print('ready', flush=True)
+sys.stdin.read()
+"""
+
+ROLLUP_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_rollup(pid: int):
+    """Return the smaps_rollup fields of a process in kB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(':') in ROLLUP_FIELDS:
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure per-worker memory of the inference models')
+    parser.add_argument('--workers', type=int, default=20, help='Number of concurrent workers')
+    parser.add_argument('--mmap-mode', default=None, help="joblib mmap_mode for the workers ('r' or 'none')")
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("This script needs /proc/<pid>/smaps_rollup (Linux).")
+        return
+
+    env = dict(os.environ)
+    if args.mmap_mode is not None:
+        env['FRS_AI_MMAP_MODE'] = args.mmap_mode
+
+    print("=" * 60)
+    print("Inference Worker Memory")
+    print("=" * 60)
+    print(f"Workers: {args.workers}, mmap_mode: {env.get('FRS_AI_MMAP_MODE', 'r (config default)')}")
+
+    workers = []
+    try:
+        for _ in range(args.workers):
+            workers.append(subprocess.Popen(
+                [sys.executable, '-c', WORKER_CODE],
+                cwd=str(AI_DIR),
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+            ))
+        for worker in workers:
+            worker.stdout.readline()
+        time.sleep(0.5)
+
+        rollups = [read_rollup(worker.pid) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+
+    def mb(kb):
+        return kb / 1024.0
+
+    avg = {field: sum(r.get(field, 0) for r in rollups) / len(rollups) for field in ROLLUP_FIELDS}
+    private = avg['Private_Clean'] + avg['Private_Dirty']
+    shared = avg['Shared_Clean'] + avg['Shared_Dirty']
+
+    print(f"\nPer worker (average):")
+    print(f"   RSS:     {mb(avg['Rss']):8.1f} MB")
+    print(f"   PSS:     {mb(avg['Pss']):8.1f} MB")
+    print(f"   Private: {mb(private):8.1f} MB")
+    print(f"   Shared:  {mb(shared):8.1f} MB")
+    print(f"\nAll workers: RSS {mb(avg['Rss'] * len(rollups)):.1f} MB, "
+          f"PSS (actual footprint) {mb(avg['Pss'] * len(rollups)):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Show or clear the api/ result cache
+Prints per-endpoint hit/miss counters and the number of cached entries
+
+Usage:
+    python scripts/result_cache_stats.py
+    python scripts/result_cache_stats.py --clear            # Drop all entries
+    python scripts/result_cache_stats.py --clear --reset    # Drop entries and counters
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.result_cache import get_result_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or clear the api/ result cache')
+    parser.add_argument('--clear', action='store_true', help='Remove all cached entries')
+    parser.add_argument('--reset', action='store_true', help='With --clear, also reset the hit/miss counters')
+    args = parser.parse_args()
+
+    cache = get_result_cache()
+    if cache is None:
+        print("Result cache is disabled (FRS_AI_RESULT_CACHE=0) or cannot be opened.")
+        return
+
+    if args.clear:
+        cache.clear(reset_stats=args.reset)
+        print(f"Cleared {config.RESULT_CACHE['path']}")
+
+    stats = cache.stats()
+    print("=" * 60)
+    print("API Result Cache")
+    print("=" * 60)
+    print(f"Path:    {config.RESULT_CACHE['path']}")
+    print(f"Entries: {stats['entries']} (max {config.RESULT_CACHE['max_entries']}, "
+          f"TTL {config.RESULT_CACHE['ttl_seconds']}s)")
+    print(f"\n{'endpoint':26} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+    for endpoint, counts in stats['endpoints'].items():
+        print(f"{endpoint:26} {counts['hits']:>8} {counts['misses']:>8} {counts['hit_rate']:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
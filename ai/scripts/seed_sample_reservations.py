@@ -9,8 +9,9 @@ and its predictions have an explainable story:
     skews assembly/celebration - same category taxonomy already used in
     config/ai_helpers.php's matchPurpose()/frs_event_category_keyword_map()
     so PHP-side and ML-side "categories" agree).
-  - Weekend/holiday demand skew (matches the PH holiday list already used
-    in config/ai_helpers.php + services/PredictionService.php).
+  - Weekend/holiday demand skew (PH holidays + Barangay Culiat events from
+    src/calendar_features.py - the same dates the models' is_holiday feature
+    is computed from).
   - Category-appropriate time slots (fitness/sports lean early-morning or
     evening, assembly/community lean daytime/evening - same peak-hour lists
     already used in getSuggestedTimesForPurpose()).
@@ -32,6 +33,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import pandas as pd
 import pymysql
 from src.data_loader import DataLoader
+from src.calendar_features import date_features
 import config
 
 
@@ -123,18 +125,6 @@ CATEGORY_FILL_RATIO = {
 
 CATEGORIES = list(CATEGORY_PURPOSES.keys())
 
-# PH + Barangay Culiat holiday calendar - mirrors config/ai_helpers.php's
-# calculateConflictRiskSimple() so "holiday demand skew" here lines up with
-# the same dates the live risk/demand scoring already treats as special.
-def _holiday_set(year: int) -> set:
-    d = {
-        f"{year}-01-01", f"{year}-02-25", f"{year}-04-09", f"{year}-06-12",
-        f"{year}-08-21", f"{year}-11-01", f"{year}-11-02", f"{year}-11-30",
-        f"{year}-12-25", f"{year}-12-30", f"{year}-09-08", f"{year}-02-11",
-    }
-    return d
-
-
 def classify_facility(name: str, description: str) -> list:
     """Infer a facility's category affinities from its name/description
     text. Returns ALL categories tied at the top score, not just one - a
@@ -199,7 +189,7 @@ def pick_reservation_date(today) -> "datetime.date":
         days_offset = random.randint(-90, 60)
         candidate = today + timedelta(days=days_offset)
         is_weekend = candidate.weekday() >= 5
-        is_holiday = candidate.strftime('%Y-%m-%d') in _holiday_set(candidate.year)
+        is_holiday = date_features(candidate)['is_holiday'] == 1
         if random.random() < 0.4:
             if is_weekend or is_holiday:
                 return candidate
@@ -0,0 +1,163 @@
+"""
+Train all models from one data load
+Loads the reservations window (with user and facility attributes) and facilities once,
+then trains the risk, recommendation, purpose analysis and chatbot intent models side by
+side in a process pool, each with its own share of the cores the process may use (cgroup
+limits included).
+
+Every job writes to its own staging directory; when it finishes, its artifacts are moved
+into the models directory together (src/training_jobs.py). Job output is printed per job
+as each one finishes, followed by one timing report of every stage.
+
+Usage:
+    python scripts/train_all.py                        # incremental where possible
+    python scripts/train_all.py --full                 # rebuild every model
+    python scripts/train_all.py --only risk purpose    # a subset
+    python scripts/train_all.py --workers 2
+"""
+
+import sys
+import time
+import argparse
+import importlib
+import traceback
+from io import StringIO
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.data_loader import DataLoader
+from src.training_data import load_training_data
+from src.training_jobs import StageTimings, available_cpus, core_budgets, staging_dir, publish, discard
+
+
+# name: (module with train(), needs the loaded data); heaviest first, they get spare cores
+JOBS = {
+    'risk': ('scripts.train_auto_approval_risk', True),
+    'recommendation': ('scripts.train_facility_recommendation', True),
+    'purpose': ('scripts.train_purpose_analysis', True),
+    'chatbot': ('scripts.train_chatbot_intents', False),
+}
+
+
+def run_job(name: str, data, full: bool, n_jobs: int, staging: Path):
+    """
+    Run one model's train() in a pool worker
+
+    Its output is captured and returned with the result, so jobs running at the same time
+    do not interleave their logs. Native thread pools (BLAS, OpenMP) are limited to the
+    job's cores as well.
+
+    Returns:
+        Dict with name, mode ('full', 'incremental' or None), error (traceback or None),
+        stages ({stage: seconds}), seconds (wall time) and log
+    """
+    from threadpoolctl import threadpool_limits
+
+    module = importlib.import_module(JOBS[name][0])
+    timings = StageTimings()
+    log = StringIO()
+    mode, error = None, None
+    start = time.perf_counter()
+    with redirect_stdout(log), redirect_stderr(log), threadpool_limits(limits=n_jobs):
+        try:
+            mode = module.train(data, full=full, n_jobs=n_jobs, output_dir=staging, timings=timings)
+        except Exception:
+            error = traceback.format_exc()
+    return {'name': name, 'mode': mode, 'error': error, 'stages': timings.stages,
+            'seconds': time.perf_counter() - start, 'log': log.getvalue()}
+
+
+def print_report(extraction: StageTimings, results: list, publishing: StageTimings, total: float):
+    """One table with the seconds of every stage of the run"""
+    rows = [(f"extract: {stage}", seconds) for stage, seconds in extraction.stages.items()]
+    for result in results:
+        rows.extend((f"{result['name']}: {stage}", seconds) for stage, seconds in result['stages'].items())
+        status = 'failed' if result['error'] else (result['mode'] or 'skipped')
+        rows.append((f"{result['name']} ({status}, wall)", result['seconds']))
+    rows.extend((f"publish: {stage}", seconds) for stage, seconds in publishing.stages.items())
+    rows.append(('total', total))
+
+    width = max(len(label) for label, _ in rows)
+    print("\n" + "=" * 60)
+    print("Timing Report")
+    print("=" * 60)
+    print(f"{'Stage':<{width}}  {'Seconds':>8}")
+    for label, seconds in rows:
+        print(f"{label:<{width}}  {seconds:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train all models from one data load')
+    parser.add_argument('--full', action='store_true',
+                        help='Rebuild every model instead of updating from the watermarks')
+    parser.add_argument('--only', nargs='+', choices=list(JOBS), help='Models to train (default: all)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Jobs running at once (default: one per job, up to the available cores)')
+    args = parser.parse_args()
+
+    jobs = [name for name in JOBS if not args.only or name in args.only]
+    start = time.perf_counter()
+    config.ensure_dirs()
+
+    print("=" * 60)
+    print("Training All Models")
+    print("=" * 60)
+
+    extraction = StageTimings()
+    data = None
+    if any(JOBS[name][1] for name in jobs):
+        print("\n1. Loading data (once for all models)...")
+        loader = DataLoader()
+        try:
+            loader.connect()
+            data = load_training_data(loader, timings=extraction)
+        finally:
+            loader.disconnect()
+
+    cpus = available_cpus()
+    workers = max(1, min(args.workers or len(jobs), len(jobs), cpus))
+    budgets = core_budgets(jobs, cpus, workers)
+    print(f"\n2. Training {', '.join(jobs)} on {cpus} cores ({workers} at a time)...")
+    for name in jobs:
+        print(f"   {name}: {budgets[name]} cores")
+
+    results = []
+    publishing = StageTimings()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for name in jobs:
+            staging = staging_dir(config.MODELS_DIR, name)
+            future = pool.submit(run_job, name, data if JOBS[name][1] else None, args.full, budgets[name], staging)
+            futures[future] = staging
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"\n{'-' * 20} {result['name']} {'-' * 20}")
+            print(result['log'].rstrip())
+            staging = futures[future]
+            if result['error']:
+                print(result['error'].rstrip())
+                print(f"   {result['name']} failed; the current artifacts are kept")
+                discard(staging)
+            elif result['mode'] is None:
+                print(f"   {result['name']} wrote no model; the current artifacts are kept")
+                discard(staging)
+            else:
+                with publishing.stage(result['name']):
+                    published = publish(staging, config.MODELS_DIR)
+                print(f"   Published {len(published)} artifacts to {config.MODELS_DIR}")
+
+    results.sort(key=lambda result: jobs.index(result['name']))
+    print_report(extraction, results, publishing, time.perf_counter() - start)
+
+    if any(result['error'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
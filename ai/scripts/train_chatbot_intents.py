@@ -15,10 +15,15 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
-import joblib
 import re
 
 import config
+from src.model_store import save_artifact
+from src.forest_arrays import arrays_path_for, export_model_arrays
+from src.training_jobs import StageTimings
+
+MODEL_NAME = 'chatbot_intent_model.pkl'
+VECTORIZER_NAME = 'chatbot_intent_vectorizer.pkl'
 
 
 # Define intents and sample questions for training
@@ -187,14 +192,27 @@ def create_training_data():
     return df
 
 
-def main():
-    """Train chatbot intent classification model"""
-    print("=" * 60)
-    print("Chatbot Intent Classification Model Training")
-    print("=" * 60)
+def train(data=None, full: bool = True, n_jobs: int = -1, output_dir=None, timings: StageTimings = None):
+    """
+    Train the chatbot intent model
+    
+    The intents come from INTENT_TRAINING_DATA, not the database, so data and full are
+    accepted only for the common train() signature (scripts/train_all.py) and ignored.
+    
+    Args:
+        n_jobs: Cores for the forest
+        output_dir: Where to write the artifacts (default: config.MODELS_DIR)
+        timings: Records the seconds each stage takes
+    
+    Returns:
+        'full'
+    """
+    timings = timings or StageTimings()
+    output_dir = Path(output_dir or config.MODELS_DIR)
     
     print("\n1. Creating training data...")
-    df = create_training_data()
+    with timings.stage('features'):
+        df = create_training_data()
     
     print(f"   Total training examples: {len(df)}")
     print(f"   Intents: {df['intent'].nunique()}")
@@ -212,7 +230,8 @@ def main():
         stop_words='english'
     )
     
-    X_text = vectorizer.fit_transform(df['text_clean'])
+    with timings.stage('features'):
+        X_text = vectorizer.fit_transform(df['text_clean'])
     y_intent = df['intent']
     
     print(f"   Feature matrix shape: {X_text.shape}")
@@ -233,16 +252,18 @@ def main():
         n_estimators=100,
         max_depth=10,
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
         class_weight='balanced'
     )
     
-    classifier.fit(X_train, y_train)
+    with timings.stage('fit'):
+        classifier.fit(X_train, y_train)
     print("   Training complete.")
     
     print("\n5. Evaluating model...")
-    y_pred_train = classifier.predict(X_train)
-    y_pred_test = classifier.predict(X_test)
+    with timings.stage('evaluate'):
+        y_pred_train = classifier.predict(X_train)
+        y_pred_test = classifier.predict(X_test)
     
     train_acc = accuracy_score(y_train, y_pred_train)
     test_acc = accuracy_score(y_test, y_pred_test)
@@ -275,14 +296,29 @@ def main():
         print(f"      Intent: {intent_pred} (confidence: {confidence:.2%})")
     
     # Save model
-    model_path = config.MODELS_DIR / 'chatbot_intent_model.pkl'
-    vectorizer_path = config.MODELS_DIR / 'chatbot_intent_vectorizer.pkl'
+    model_path = output_dir / MODEL_NAME
+    vectorizer_path = output_dir / VECTORIZER_NAME
     
-    joblib.dump(classifier, model_path)
-    joblib.dump(vectorizer, vectorizer_path)
+    with timings.stage('save'):
+        save_artifact(classifier, model_path)
+        save_artifact(vectorizer, vectorizer_path)
+        arrays_path = export_model_arrays(arrays_path_for(model_path), classifier, vectorizer=vectorizer)
     
     print(f"\n7. Model saved to: {model_path}")
     print(f"   Vectorizer saved to: {vectorizer_path}")
+    print(f"   Array export saved to: {arrays_path}")
+    return 'full'
+
+
+def main():
+    """Train chatbot intent classification model"""
+    print("=" * 60)
+    print("Chatbot Intent Classification Model Training")
+    print("=" * 60)
+    
+    config.ensure_dirs()
+    
+    train()
     
     print("\n" + "=" * 60)
     print("Training complete!")
@@ -4,6 +4,7 @@ Uses historical booking data to learn which facilities users prefer for differen
 """
 
 import sys
+import argparse
 from pathlib import Path
 
 # Add parent directory to path
@@ -15,13 +16,24 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from sklearn.preprocessing import LabelEncoder
-import joblib
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import re
 
 from src.data_loader import DataLoader
 import config
+from src.model_store import save_artifact
+from src.forest_arrays import arrays_path_for, export_model_arrays
+from src.calendar_features import calendar_features
+from src.time_slots import time_slot_features, report_unparsed
+from src.feature_columns import truthy, settle, positions, ratio, filled
+from src.incremental_training import (plan_training, changed_after, data_watermark, save_watermark,
+                                      enough_changes, with_context, update_saved_model)
+from src.training_data import TrainingData, load_training_data
+from src.training_jobs import StageTimings
+
+MODEL_NAME = 'facility_recommendation_model.pkl'
+ENCODERS_NAME = 'facility_recommendation_encoders.pkl'
 
 
 def extract_capacity_number(capacity_str):
@@ -34,33 +46,6 @@ def extract_capacity_number(capacity_str):
     return int(match.group(1)) if match else 100
 
 
-def extract_time_features(time_slot: str):
-    """Extract start hour, end hour, and duration from time slot string"""
-    if ' - ' in time_slot:
-        try:
-            start_time_str, end_time_str = time_slot.split(' - ')
-            start_hour = int(start_time_str.split(':')[0])
-            end_hour = int(end_time_str.split(':')[0])
-        except:
-            start_hour = 8
-            end_hour = 17
-    elif 'Morning' in time_slot:
-        start_hour = 8
-        end_hour = 12
-    elif 'Afternoon' in time_slot:
-        start_hour = 13
-        end_hour = 17
-    elif 'Evening' in time_slot:
-        start_hour = 18
-        end_hour = 22
-    else:
-        start_hour = 8
-        end_hour = 17
-    
-    duration_hours = end_hour - start_hour
-    return {'start_hour': start_hour, 'end_hour': end_hour, 'duration_hours': duration_hours}
-
-
 def extract_purpose_keywords(purpose: str):
     """Extract common keywords from purpose text"""
     if pd.isna(purpose):
@@ -83,105 +68,89 @@ def extract_purpose_keywords(purpose: str):
     return keywords
 
 
-def calculate_text_match_score(purpose: str, facility_text: str):
+def facility_attributes(facilities_df: pd.DataFrame):
     """
-    Calculate text similarity score between purpose and facility text
-    Uses keyword overlap and semantic matching
-    """
-    if pd.isna(purpose) or pd.isna(facility_text) or not purpose or not facility_text:
-        return 0.0
+    Facility-side features, computed once per facility
     
+    Returns:
+        Tuple of (facility ids, list of per-facility dicts: capacity, amenities_count,
+        text (lowercased description and amenities), words (its words of 3+ letters),
+        has_hours, opens_early, opens_late). The first row wins for a duplicated id.
+    """
+    ids = []
+    attributes = []
+    seen = set()
+    for _, facility in facilities_df.iterrows():
+        facility_id = facility['id']
+        if pd.isna(facility_id) or facility_id in seen:
+            continue
+        seen.add(facility_id)
+        
+        amenities = facility.get('amenities', '')
+        description = facility.get('description', '')
+        operating_hours = facility.get('operating_hours', '')
+        text = f"{description} {amenities}".lower()
+        hours_lower = str(operating_hours).lower()
+        has_hours = not (pd.isna(operating_hours) or not operating_hours)
+        
+        ids.append(facility_id)
+        attributes.append({
+            'capacity': extract_capacity_number(facility['capacity']),
+            'amenities_count': len(str(amenities).split(',')) if amenities else 0,
+            'text': text,
+            'words': set(word for word in text.split() if len(word) >= 3),
+            'has_hours': has_hours,
+            'opens_early': 1 if has_hours and any(x in hours_lower for x in ['6:', '7:', '8:']) else 0,
+            'opens_late': 1 if has_hours and any(x in hours_lower for x in ['20:', '21:', '22:']) else 0,
+        })
+    return ids, attributes
+
+
+def purpose_words(purpose):
+    """Lowercased purpose and its words of 3+ letters, or None for a missing or empty purpose"""
+    if pd.isna(purpose) or not purpose:
+        return None
     purpose_lower = str(purpose).lower()
-    facility_lower = str(facility_text).lower()
-    
-    # Extract meaningful words (length >= 3)
-    purpose_words = set(word for word in purpose_lower.split() if len(word) >= 3)
-    facility_words = set(word for word in facility_lower.split() if len(word) >= 3)
-    
-    if not purpose_words or not facility_words:
+    return purpose_lower, set(word for word in purpose_lower.split() if len(word) >= 3)
+
+
+def match_score(purpose: tuple, facility: dict):
+    """
+    Text similarity score between a purpose and a facility's description and amenities
+    Word overlap plus a bonus per purpose word found in the facility text; the same
+    score as calculate_text_match_score in src/facility_recommendation.py
+    """
+    if purpose is None or not facility['text']:
+        return 0.0
+    purpose_lower, words = purpose
+    if not words or not facility['words']:
         return 0.0
     
-    # Calculate overlap
-    overlap = purpose_words & facility_words
-    overlap_ratio = len(overlap) / len(purpose_words) if purpose_words else 0
+    overlap_ratio = len(words & facility['words']) / len(words)
     
     # Boost for exact phrase matches
     exact_match_bonus = 0.0
-    for word in purpose_words:
-        if word in facility_lower:
+    for word in words:
+        if word in facility['text']:
             exact_match_bonus += 0.1
     
     return min(1.0, overlap_ratio + exact_match_bonus)
 
 
-def extract_operating_hours_features(operating_hours: str, time_slot: str):
-    """
-    Extract operating hours features and check if time slot fits
-    Returns: dict with hours features and match score
-    """
-    if pd.isna(operating_hours) or not operating_hours:
-        return {
-            'opens_early': 0,
-            'opens_late': 0,
-            'hours_match_score': 0.5
-        }
-    
-    # Parse operating hours
-    hours_lower = str(operating_hours).lower()
-    opens_early = 1 if any(x in hours_lower for x in ['6:', '7:', '8:']) else 0
-    opens_late = 1 if any(x in hours_lower for x in ['20:', '21:', '22:']) else 0
-    
-    # Parse time slot
-    try:
-        if ' - ' in time_slot:
-            start_time_str, end_time_str = time_slot.split(' - ')
-            start_hour = int(start_time_str.split(':')[0])
-            end_hour = int(end_time_str.split(':')[0])
-        else:
-            start_hour = 8
-            end_hour = 17
-    except:
-        start_hour = 8
-        end_hour = 17
-    
-    # Check if time slot fits within operating hours
-    hours_match_score = 0.8  # Default moderate score
-    
-    # If facility has extended hours, boost score for evening events
-    if end_hour >= 18 and opens_late:
-        hours_match_score = 1.0
-    # If facility opens early, boost for morning events
-    elif start_hour <= 9 and opens_early:
-        hours_match_score = 1.0
-    # Standard business hours
-    elif 8 <= start_hour and end_hour <= 17:
-        hours_match_score = 0.9
-    
-    return {
-        'opens_early': opens_early,
-        'opens_late': opens_late,
-        'hours_match_score': hours_match_score
-    }
-
-
-def is_holiday(date_input):
-    """Check if date is a holiday (Philippines + Barangay Culiat)"""
-    if isinstance(date_input, pd.Timestamp):
-        date_str = date_input.strftime('%Y-%m-%d')
-    elif isinstance(date_input, str):
-        date_str = date_input
-    else:
-        return 0
-    
-    month_day = '-'.join(date_str.split('-')[1:3])
-    all_holidays = config.PHILIPPINE_HOLIDAYS + config.BARANGAY_CULIAT_EVENTS
-    return 1 if month_day in all_holidays else 0
-
-
-def prepare_features(reservations_df: pd.DataFrame, facilities_df: pd.DataFrame, users_df: pd.DataFrame = None):
+def prepare_features(reservations_df: pd.DataFrame, facilities_df: pd.DataFrame, users_df: pd.DataFrame = None,
+                     user_booking_counts: pd.Series = None):
     """
     Prepare feature matrix for facility recommendation model
     
+    Facility attributes (capacity, amenities, text words, operating hours flags) are
+    computed once per facility and joined to the reservations, so the cost grows with
+    the number of reservations, not reservations x facilities. Text match scores and
+    purpose keywords are computed once per distinct (purpose, facility) pair and purpose.
+    Rows without a reservation date are skipped.
+    
+    user_booking_counts (bookings per user_id) defaults to the counts in reservations_df;
+    incremental training passes the counts over the whole window.
+    
     Features:
     - User features: user_id (encoded), booking history count
     - Facility features: facility_id (encoded), capacity, amenities count, description match score, operating hours features
@@ -189,276 +158,396 @@ def prepare_features(reservations_df: pd.DataFrame, facilities_df: pd.DataFrame,
     - Time features: start_hour, end_hour, duration, day_of_week, month, is_weekend, is_holiday
     - Booking features: expected_attendees, capacity_ratio, is_commercial
     """
-    features = []
-    
     # Ensure reservation_date is datetime
     if 'reservation_date' in reservations_df.columns:
         if not pd.api.types.is_datetime64_any_dtype(reservations_df['reservation_date']):
             reservations_df['reservation_date'] = pd.to_datetime(reservations_df['reservation_date'], errors='coerce')
     
     # Create user booking history count
-    user_booking_counts = reservations_df.groupby('user_id').size().to_dict()
+    if user_booking_counts is None:
+        user_booking_counts = reservations_df.groupby('user_id').size()
     
-    for _, row in reservations_df.iterrows():
-        if pd.isna(row.get('reservation_date')):
-            continue
-        
-        # Time features
-        time_feat = extract_time_features(row['time_slot'])
-        
-        # Date features
-        reservation_date = row['reservation_date']
-        day_of_week = reservation_date.dayofweek  # 0=Monday, 6=Sunday
-        month = reservation_date.month
-        is_weekend = 1 if day_of_week >= 5 else 0
-        holiday = is_holiday(reservation_date)
-        
-        # Facility features
-        facility_info = facilities_df[facilities_df['id'] == row['facility_id']]
-        if not facility_info.empty:
-            capacity = extract_capacity_number(facility_info.iloc[0]['capacity'])
-            amenities = facility_info.iloc[0].get('amenities', '')
-            description = facility_info.iloc[0].get('description', '')
-            operating_hours = facility_info.iloc[0].get('operating_hours', '')
-            amenities_count = len(str(amenities).split(',')) if amenities else 0
-            
-            # Calculate text match score with description
-            facility_text = f"{description} {amenities}"
-            purpose = row.get('purpose', '')
-            description_match_score = calculate_text_match_score(purpose, facility_text)
-            
-            # Extract operating hours features
-            hours_features = extract_operating_hours_features(operating_hours, row['time_slot'])
-        else:
-            capacity = 100
-            amenities_count = 0
-            description_match_score = 0.0
-            hours_features = {
-                'opens_early': 0,
-                'opens_late': 0,
-                'hours_match_score': 0.5
-            }
-        
-        # User features
-        user_id = row['user_id']
-        user_booking_count = user_booking_counts.get(user_id, 0)
-        
-        # Purpose features
-        purpose_keywords = extract_purpose_keywords(purpose)
-        
-        # Booking features
-        expected_attendees = row.get('expected_attendees', 50) if pd.notna(row.get('expected_attendees')) else 50
-        capacity_ratio = expected_attendees / capacity if capacity > 0 else 0.5
-        is_commercial = 1 if row.get('is_commercial', False) else 0
-        
-        feature_row = {
-            'user_id': int(user_id) if pd.notna(user_id) else 0,
-            'facility_id': int(row['facility_id']) if pd.notna(row['facility_id']) else 0,
-            'capacity': capacity,
-            'amenities_count': amenities_count,
-            'description_match_score': description_match_score,
-            'hours_match_score': hours_features['hours_match_score'],
-            'opens_early': hours_features['opens_early'],
-            'opens_late': hours_features['opens_late'],
-            'start_hour': time_feat['start_hour'],
-            'end_hour': time_feat['end_hour'],
-            'duration_hours': time_feat['duration_hours'],
-            'day_of_week': day_of_week,
-            'month': month,
-            'is_weekend': is_weekend,
-            'is_holiday': holiday,
-            'expected_attendees': int(expected_attendees) if pd.notna(expected_attendees) else 50,
-            'capacity_ratio': capacity_ratio,
-            'is_commercial': is_commercial,
-            'user_booking_count': user_booking_count,
-        }
-        
-        # Add purpose keywords
-        feature_row.update(purpose_keywords)
-        
-        features.append(feature_row)
+    # Calendar features of every reservation date in one pass (same table as inference)
+    calendar = calendar_features(reservations_df['reservation_date'])
     
-    if not features:
+    # Time slots: each distinct slot is parsed once
+    time_slots, unparsed = time_slot_features(reservations_df['time_slot'])
+    report_unparsed(unparsed, len(reservations_df))
+    
+    valid = reservations_df['reservation_date'].notna().to_numpy()
+    if not valid.any():
         raise ValueError("No valid features extracted from data.")
+    rows = reservations_df[valid]
+    calendar = {name: values[valid] for name, values in calendar.items()}
+    time_slots = {name: values[valid] for name, values in time_slots.items()}
+    count = len(rows)
+    
+    # Facility features, joined by position (-1: unknown facility)
+    facility_ids, facilities = facility_attributes(facilities_df)
+    facility_position = positions(facility_ids, rows['facility_id'])
+    known = facility_position >= 0
+    
+    def facility_column(key, default):
+        return np.array([facility[key] for facility in facilities] + [default])[facility_position]
+    
+    capacity = facility_column('capacity', 100)
+    amenities_count = facility_column('amenities_count', 0)
+    has_hours = facility_column('has_hours', False)
+    opens_early = facility_column('opens_early', 0)
+    opens_late = facility_column('opens_late', 0)
     
-    return pd.DataFrame(features)
+    # Operating hours fit, from the facility's flags and the slot's hours
+    start_hour = time_slots['start_hour']
+    end_hour = time_slots['end_hour']
+    hours_match_score = np.select(
+        [
+            ~has_hours,
+            (end_hour >= 18) & (opens_late == 1),  # Extended hours: evening events fit
+            (start_hour <= 9) & (opens_early == 1),  # Opens early: morning events fit
+            (8 <= start_hour) & (end_hour <= 17),  # Standard business hours
+        ],
+        [0.5, 1.0, 1.0, 0.9],
+        default=0.8,
+    )
+    
+    # Purpose features, once per distinct purpose and (purpose, facility) pair
+    purposes = rows['purpose'].tolist() if 'purpose' in rows.columns else [''] * count
+    words_by_purpose = {}
+    keywords_by_purpose = {}
+    scores = {}
+    description_match_score = np.zeros(count)
+    keyword_rows = []
+    for index, (purpose, position) in enumerate(zip(purposes, facility_position.tolist())):
+        key = purpose if isinstance(purpose, str) else (repr(purpose),)
+        if key not in keywords_by_purpose:
+            words_by_purpose[key] = purpose_words(purpose)
+            keywords_by_purpose[key] = extract_purpose_keywords(purpose)
+        keyword_rows.append(keywords_by_purpose[key])
+        if position >= 0:
+            score = scores.get((key, position))
+            if score is None:
+                score = scores[(key, position)] = match_score(words_by_purpose[key], facilities[position])
+            description_match_score[index] = score
+    
+    features = {
+        'user_id': rows['user_id'].fillna(0).to_numpy().astype(np.int64),
+        'facility_id': rows['facility_id'].fillna(0).to_numpy().astype(np.int64),
+        'capacity': capacity,
+        'amenities_count': amenities_count,
+        'description_match_score': description_match_score,
+        'hours_match_score': hours_match_score,
+        'opens_early': opens_early,
+        'opens_late': opens_late,
+        'start_hour': start_hour,
+        'end_hour': end_hour,
+        'duration_hours': time_slots['duration_hours'],
+        'day_of_week': calendar['day_of_week'],  # 0=Monday, 6=Sunday
+        'month': calendar['month'],
+        'is_weekend': calendar['is_weekend'],
+        'is_holiday': calendar['is_holiday'],
+    }
+    expected_attendees = filled(rows, 'expected_attendees', 50)
+    features['expected_attendees'] = expected_attendees.astype(np.int64)
+    features['capacity_ratio'] = settle(ratio(expected_attendees, capacity, 0.5))
+    features['is_commercial'] = truthy(rows['is_commercial']) if 'is_commercial' in rows.columns else np.zeros(count, dtype=np.int64)
+    features['user_booking_count'] = rows['user_id'].map(user_booking_counts).fillna(0).to_numpy(dtype=np.int64)
+    
+    # Purpose keywords (missing purposes have none, so their columns hold NaN there)
+    keywords = pd.DataFrame(keyword_rows, index=range(count))
+    return pd.concat([pd.DataFrame(features), keywords], axis=1)
+
+
+def _token_bitmap(rows: np.ndarray, size: int):
+    """Python int with bit i set for each local row index i (for fast unions and counts)"""
+    bits = np.zeros(size, dtype=bool)
+    bits[rows] = True
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def similar_purpose_counts(reservations_df: pd.DataFrame):
+    """
+    For every reservation, how many reservations of the same facility (itself included)
+    share at least one purpose word with it
+    
+    Each facility gets an inverted index from purpose word to a bitmap of its reservations;
+    a purpose's count is the size of the union of its words' bitmaps, computed once per
+    distinct purpose per facility.
+    """
+    count = len(reservations_df)
+    if 'purpose' in reservations_df.columns:
+        purposes = reservations_df['purpose'].tolist()
+    else:
+        purposes = [''] * count
+    tokens = [frozenset(str(purpose).lower().split()) for purpose in purposes]
+    
+    counts = np.zeros(count, dtype=np.int64)
+    facility_rows = pd.Series(np.arange(count)).groupby(reservations_df['facility_id'].to_numpy()).indices
+    for rows in facility_rows.values():
+        postings = {}
+        for local, row in enumerate(rows.tolist()):
+            for token in tokens[row]:
+                postings.setdefault(token, []).append(local)
+        bitmaps = {token: _token_bitmap(np.array(local_rows), len(rows)) for token, local_rows in postings.items()}
+        
+        by_purpose = {}
+        for row in rows.tolist():
+            purpose_tokens = tokens[row]
+            similar = by_purpose.get(purpose_tokens)
+            if similar is None:
+                union = 0
+                for token in purpose_tokens:
+                    union |= bitmaps[token]
+                similar = by_purpose[purpose_tokens] = union.bit_count()
+            counts[row] = similar
+    return counts
 
 
-def calculate_relevance_score(row: pd.Series, reservations_df: pd.DataFrame):
+def relevance_scores(reservations_df: pd.DataFrame, now: datetime = None):
     """
-    Calculate relevance score for a facility-user-purpose combination
+    Calculate relevance scores for facility-user-purpose combinations
     Score based on:
     - How often this facility was booked for similar purposes (higher = more relevant)
     - How often this user booked this facility (higher = more relevant)
     - Recency of bookings (more recent = higher score)
+    
+    Args:
+        reservations_df: Reservations to score (each is scored against all of them)
+        now: Reference time for recency (default: now)
+    
+    Returns:
+        Series of scores (1.0 to 5.0) aligned with reservations_df
     """
-    score = 0.0
+    if now is None:
+        now = datetime.now()
     
     # Base score: facility was booked (1.0)
-    score += 1.0
-    
-    # Purpose similarity: count similar purpose bookings
-    purpose = str(row.get('purpose', '')).lower()
-    similar_purpose_count = 0
-    for _, other_row in reservations_df.iterrows():
-        if other_row['facility_id'] == row['facility_id']:
-            other_purpose = str(other_row.get('purpose', '')).lower()
-            # Simple similarity: check for common words
-            common_words = set(purpose.split()) & set(other_purpose.split())
-            if len(common_words) > 0:
-                similar_purpose_count += 1
-    
-    score += min(similar_purpose_count * 0.1, 2.0)  # Max 2.0 points
-    
-    # User preference: count how many times this user booked this facility
-    user_facility_count = len(reservations_df[
-        (reservations_df['user_id'] == row['user_id']) &
-        (reservations_df['facility_id'] == row['facility_id'])
-    ])
-    score += min(user_facility_count * 0.2, 1.0)  # Max 1.0 points
+    score = np.full(len(reservations_df), 1.0)
+    
+    # Purpose similarity: bookings of the same facility sharing a purpose word
+    score += np.minimum(similar_purpose_counts(reservations_df) * 0.1, 2.0)  # Max 2.0 points
+    
+    # User preference: how many times this user booked this facility
+    user_facility_count = (
+        reservations_df.groupby(['user_id', 'facility_id'])['facility_id'].transform('size')
+        .fillna(0).to_numpy(dtype=np.int64)
+    )
+    score += np.minimum(user_facility_count * 0.2, 1.0)  # Max 1.0 points
     
     # Recency: more recent bookings get higher scores
-    if 'reservation_date' in row and pd.notna(row['reservation_date']):
-        days_ago = (datetime.now() - row['reservation_date']).days
-        recency_score = max(0, 1.0 - (days_ago / 365.0))  # Decay over 1 year
-        score += recency_score * 0.5  # Max 0.5 points
+    if 'reservation_date' in reservations_df.columns:
+        dates = pd.to_datetime(reservations_df['reservation_date'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        dated = ~np.isnat(dates)
+        days_ago = (np.datetime64(now, 'ns') - dates[dated]) // np.timedelta64(1, 'D')
+        recency_score = np.maximum(0, 1.0 - (days_ago / 365.0))  # Decay over 1 year
+        score[dated] += recency_score * 0.5  # Max 0.5 points
     
-    return min(score, 5.0)  # Cap at 5.0
+    return pd.Series(np.minimum(score, 5.0), index=reservations_df.index)  # Cap at 5.0
 
 
-def main():
-    """Train facility recommendation model"""
+def save_model(model, label_encoders, model_path, encoders_path):
+    """Save the model, its encoders and the array export"""
+    save_artifact(model, model_path)
+    save_artifact(label_encoders, encoders_path)
+    arrays_path = export_model_arrays(arrays_path_for(model_path), model, encoders=label_encoders)
+    
+    print(f"   Model saved to: {model_path}")
+    print(f"   Encoders saved to: {encoders_path}")
+    print(f"   Array export saved to: {arrays_path}")
+
+
+def train(data: TrainingData, full: bool = False, n_jobs: int = -1, output_dir=None, timings: StageTimings = None):
+    """
+    Train (or incrementally update) the facility recommendation model from loaded data
+    
+    Booking counts and relevance scores count over every approved reservation of the
+    window, also when only the changed reservations are fitted.
+    
+    Args:
+        data: Reservations window and facilities (src/training_data.py)
+        full: Rebuild from the whole window even if an incremental update is possible
+        n_jobs: Cores for the forest
+        output_dir: Where to write the artifacts (default: config.MODELS_DIR); the
+            previous model and its watermark are always read from config.MODELS_DIR
+        timings: Records the seconds each stage takes
+    
+    Returns:
+        'full' or 'incremental', or None when no model was written
+    """
+    timings = timings or StageTimings()
+    output_dir = output_dir or config.MODELS_DIR
+    previous_path = os.path.join(config.MODELS_DIR, MODEL_NAME)
+    model_path = os.path.join(output_dir, MODEL_NAME)
+    encoders_path = os.path.join(output_dir, ENCODERS_NAME)
+    
+    mode, state, reason = plan_training(previous_path, full)
+    incremental = mode == 'incremental'
+    print(f"   Training mode: {mode} ({reason})")
+    
+    reservations_df = data.reservations
+    facilities_df = data.facilities
+    if incremental:
+        reservations_df = reservations_df[changed_after(reservations_df, state)]
+    # Every changed row counts as seen, approved or not
+    watermark = data_watermark(reservations_df)
+    
+    if reservations_df.empty:
+        print("No reservation data found. Cannot train model.")
+        return None
+    
+    if not incremental and len(reservations_df) < 5:
+        print("\nWarning: Not enough data for training!")
+        print("   Need at least 5 reservations. Current system has rule-based recommendations.")
+        return None
+    
+    print(f"   Using {len(reservations_df)} reservations")
+    print(f"   Using {len(facilities_df)} facilities")
+    
+    # Filter to only approved reservations (successful bookings)
+    reservations_df = reservations_df[reservations_df['status'] == 'approved'].copy()
+    print(f"   Using {len(reservations_df)} approved reservations for training")
+    
+    # Approved bookings per user over the whole window, counted by the database (load_training_view)
+    user_booking_counts = None
+    if 'user_approved_count' in reservations_df.columns:
+        user_booking_counts = reservations_df.drop_duplicates('user_id').set_index('user_id')['user_approved_count']
+    window_df = reservations_df
+    if incremental:
+        if not enough_changes(len(reservations_df)):
+            return None
+        window = data.window
+        window_df = with_context(reservations_df, window[window['status'] == 'approved'])
+        if user_booking_counts is None:
+            user_booking_counts = window_df.groupby('user_id').size()
+    elif len(reservations_df) < 5:
+        print("\nWarning: Not enough approved reservations for training!")
+        print("   Need at least 5 approved reservations.")
+        return None
+    
+    print("\n2. Preparing features...")
+    with timings.stage('features'):
+        X = prepare_features(reservations_df, facilities_df, user_booking_counts=user_booking_counts)
+    print(f"   Features shape: {X.shape}")
+    print(f"   Feature columns: {list(X.columns)}")
+    
+    print("\n3. Calculating relevance scores...")
+    # Same rows as the features (reservations without a date are skipped)
+    with timings.stage('labels'):
+        scores = relevance_scores(window_df).iloc[:len(reservations_df)].set_axis(reservations_df.index)
+        y = scores[reservations_df['reservation_date'].notna()]
+    
+    print(f"   Relevance scores - Min: {y.min():.2f}, Max: {y.max():.2f}, Mean: {y.mean():.2f}")
+    
+    categorical_cols = ['user_id', 'facility_id']
+    
+    if incremental:
+        print(f"\n4. Adding trees for the {len(X)} changed reservations...")
+        with timings.stage('fit'):
+            updated = update_saved_model(previous_path, X, y, os.path.join(config.MODELS_DIR, ENCODERS_NAME),
+                                         categorical_cols, state, n_jobs=n_jobs)
+        if updated is None:
+            return None
+        model, label_encoders, r2_before = updated
+        print(f"   R² of the previous model on these reservations: {r2_before:.4f}")
+        print(f"   Forest now has {len(model.estimators_)} trees")
+        
+        print("\n5. Saving model...")
+        with timings.stage('save'):
+            save_model(model, label_encoders, model_path, encoders_path)
+            save_watermark(model_path, mode, watermark, data.end_date, model, len(X), state)
+        return mode
+    
+    # Encode categorical features
+    print("\n4. Encoding categorical features...")
+    label_encoders = {}
+    
+    for col in categorical_cols:
+        if col in X.columns:
+            le = LabelEncoder()
+            X[col + '_encoded'] = le.fit_transform(X[col].astype(str))
+            label_encoders[col] = le
+    
+    # Drop original categorical columns
+    X = X.drop(columns=categorical_cols, errors='ignore')
+    
+    print("\n5. Splitting data (train/test)...")
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=0.2,
+        random_state=42
+    )
+    
+    print(f"   Train set: {len(X_train)} samples")
+    print(f"   Test set: {len(X_test)} samples")
+    
+    print("\n6. Training Random Forest model...")
+    model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=10,
+        min_samples_leaf=5,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    with timings.stage('fit'):
+        model.fit(X_train, y_train)
+    print("   Model training complete.")
+    
+    print("\n7. Evaluating model...")
+    with timings.stage('evaluate'):
+        y_pred_train = model.predict(X_train)
+        y_pred_test = model.predict(X_test)
+    
+    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
+    test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
+    train_mae = mean_absolute_error(y_train, y_pred_train)
+    test_mae = mean_absolute_error(y_test, y_pred_test)
+    train_r2 = r2_score(y_train, y_pred_train)
+    test_r2 = r2_score(y_test, y_pred_test)
+    
+    print(f"   Train RMSE: {train_rmse:.4f}")
+    print(f"   Test RMSE: {test_rmse:.4f}")
+    print(f"   Train MAE: {train_mae:.4f}")
+    print(f"   Test MAE: {test_mae:.4f}")
+    print(f"   Train R²: {train_r2:.4f}")
+    print(f"   Test R²: {test_r2:.4f}")
+    
+    # Feature importance
+    print("\n8. Feature Importance (Top 10):")
+    feature_importance = pd.DataFrame({
+        'feature': X.columns,
+        'importance': model.feature_importances_
+    }).sort_values('importance', ascending=False)
+    print(feature_importance.head(10).to_string(index=False))
+    
+    # Save model and encoders, then the watermark of the rows they were trained on
+    print("\n9. Saving model...")
+    with timings.stage('save'):
+        save_model(model, label_encoders, model_path, encoders_path)
+        save_watermark(model_path, mode, watermark, data.end_date, model, len(X), state)
+    return mode
+
+
+def main(full: bool = False):
+    """
+    Train facility recommendation model
+    
+    Args:
+        full: Rebuild from the whole window even if an incremental update is possible
+    """
     print("=" * 60)
     print("Facility Recommendation Model Training")
     print("=" * 60)
     
+    config.ensure_dirs()
+    
     loader = DataLoader()
     
     try:
         loader.connect()
         
         print("\n1. Loading data...")
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-        
-        reservations_df = loader.load_reservations(start_date=start_date, end_date=end_date)
-        facilities_df = loader.load_facilities()
-        
-        # Load users for additional features (optional)
-        try:
-            users_query = "SELECT id, role FROM users"
-            cursor = loader.connection.cursor()
-            cursor.execute(users_query)
-            users_rows = cursor.fetchall()
-            users_df = pd.DataFrame([dict(row) for row in users_rows])
-            cursor.close()
-        except:
-            users_df = pd.DataFrame()
-        
-        if reservations_df.empty:
-            print("No reservation data found. Cannot train model.")
-            return
-        
-        if len(reservations_df) < 5:
-            print("\nWarning: Not enough data for training!")
-            print("   Need at least 5 reservations. Current system has rule-based recommendations.")
-            return
-        
-        print(f"   Loaded {len(reservations_df)} reservations")
-        print(f"   Loaded {len(facilities_df)} facilities")
-        
-        # Filter to only approved reservations (successful bookings)
-        reservations_df = reservations_df[reservations_df['status'] == 'approved'].copy()
-        print(f"   Using {len(reservations_df)} approved reservations for training")
-        
-        if len(reservations_df) < 5:
-            print("\nWarning: Not enough approved reservations for training!")
-            print("   Need at least 5 approved reservations.")
-            return
-        
-        print("\n2. Preparing features...")
-        X = prepare_features(reservations_df, facilities_df, users_df)
-        print(f"   Features shape: {X.shape}")
-        print(f"   Feature columns: {list(X.columns)}")
-        
-        print("\n3. Calculating relevance scores...")
-        y = reservations_df.apply(
-            lambda row: calculate_relevance_score(row, reservations_df),
-            axis=1
-        )
-        
-        print(f"   Relevance scores - Min: {y.min():.2f}, Max: {y.max():.2f}, Mean: {y.mean():.2f}")
-        
-        # Encode categorical features
-        print("\n4. Encoding categorical features...")
-        label_encoders = {}
-        categorical_cols = ['user_id', 'facility_id']
-        
-        for col in categorical_cols:
-            if col in X.columns:
-                le = LabelEncoder()
-                X[col + '_encoded'] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
-        
-        # Drop original categorical columns
-        X = X.drop(columns=categorical_cols, errors='ignore')
-        
-        print("\n5. Splitting data (train/test)...")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y,
-            test_size=0.2,
-            random_state=42
-        )
-        
-        print(f"   Train set: {len(X_train)} samples")
-        print(f"   Test set: {len(X_test)} samples")
-        
-        print("\n6. Training Random Forest model...")
-        model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_leaf=5,
-            random_state=42,
-            n_jobs=-1
-        )
-        model.fit(X_train, y_train)
-        print("   Model training complete.")
-        
-        print("\n7. Evaluating model...")
-        y_pred_train = model.predict(X_train)
-        y_pred_test = model.predict(X_test)
-        
-        train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-        test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
-        train_mae = mean_absolute_error(y_train, y_pred_train)
-        test_mae = mean_absolute_error(y_test, y_pred_test)
-        train_r2 = r2_score(y_train, y_pred_train)
-        test_r2 = r2_score(y_test, y_pred_test)
-        
-        print(f"   Train RMSE: {train_rmse:.4f}")
-        print(f"   Test RMSE: {test_rmse:.4f}")
-        print(f"   Train MAE: {train_mae:.4f}")
-        print(f"   Test MAE: {test_mae:.4f}")
-        print(f"   Train R²: {train_r2:.4f}")
-        print(f"   Test R²: {test_r2:.4f}")
-        
-        # Feature importance
-        print("\n8. Feature Importance (Top 10):")
-        feature_importance = pd.DataFrame({
-            'feature': X.columns,
-            'importance': model.feature_importances_
-        }).sort_values('importance', ascending=False)
-        print(feature_importance.head(10).to_string(index=False))
-        
-        # Save model and encoders
-        model_path = os.path.join(config.MODELS_DIR, 'facility_recommendation_model.pkl')
-        encoders_path = os.path.join(config.MODELS_DIR, 'facility_recommendation_encoders.pkl')
-        
-        joblib.dump(model, model_path)
-        joblib.dump(label_encoders, encoders_path)
-        
-        print(f"\n9. Model saved to: {model_path}")
-        print(f"   Encoders saved to: {encoders_path}")
+        mode, state, _ = plan_training(os.path.join(config.MODELS_DIR, MODEL_NAME), full)
+        data = load_training_data(loader, changed_since=state if mode == 'incremental' else None)
+        train(data, full)
         
     except Exception as e:
         print(f"Error during training: {e}")
@@ -469,4 +558,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Train the facility recommendation model')
+    parser.add_argument('--full', action='store_true',
+                        help='Rebuild from the last 365 days instead of updating from the watermark')
+    args = parser.parse_args()
+    main(full=args.full)
@@ -4,6 +4,7 @@ Categorizes reservation purposes and detects unclear/suspicious purposes
 """
 
 import sys
+import argparse
 from pathlib import Path
 
 # Add parent directory to path
@@ -14,13 +15,22 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
-from datetime import datetime, timedelta
+from sklearn.metrics import accuracy_score, classification_report
 import re
 
 from src.data_loader import DataLoader
 import config
+from src.model_store import save_artifact, load_artifact
+from src.forest_arrays import arrays_path_for, export_model_arrays
+from src.incremental_training import (plan_training, earliest_watermark, changed_after, data_watermark,
+                                      save_watermark, enough_changes, update_saved_model)
+from src.training_data import TrainingData, load_training_data
+from src.training_jobs import StageTimings
+
+CATEGORY_MODEL_NAME = 'purpose_category_model.pkl'
+CATEGORY_VECTORIZER_NAME = 'purpose_category_vectorizer.pkl'
+UNCLEAR_MODEL_NAME = 'purpose_unclear_model.pkl'
+UNCLEAR_VECTORIZER_NAME = 'purpose_unclear_vectorizer.pkl'
 
 
 def categorize_purpose(purpose: str, status: str):
@@ -140,174 +150,306 @@ def prepare_features(reservations_df: pd.DataFrame):
     return reservations_df
 
 
-def main():
-    """Train purpose analysis models"""
-    print("=" * 60)
-    print("NLP Purpose Analysis Model Training")
-    print("=" * 60)
+def update_incrementally(df: pd.DataFrame, end_date: str, states: dict, n_jobs: int, output_dir: Path,
+                         timings: StageTimings):
+    """
+    Fit the changed reservations into both saved models
     
-    loader = DataLoader()
+    The saved vectorizers are kept, so words first seen since the last full rebuild are
+    ignored until the next one. Each model has its own watermark: a model that cannot
+    take the rows (a classifier whose classes they do not all cover) keeps its watermark,
+    and the rows are offered again with the next day's.
     
-    try:
-        loader.connect()
-        
-        print("\n1. Loading data...")
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-        
-        reservations_df = loader.load_reservations(start_date=start_date, end_date=end_date)
-        
-        if reservations_df.empty:
-            print("No reservation data found. Cannot train model.")
-            return
-        
-        if len(reservations_df) < 10:
-            print("\nWarning: Not enough data for training!")
-            print("   Need at least 10 reservations with purposes.")
-            return
+    Args:
+        df: prepare_features() of the reservations, including those changed since the
+            earlier watermark
+        end_date: Last reservation date of the window
+        states: {model name: its watermark}
+        n_jobs: Cores for the forests
+        output_dir: Where to write the artifacts
+        timings: Records the seconds each stage takes
+    
+    Returns:
+        True if either model was updated
+    """
+    models = [
+        ('Purpose Category Classifier', CATEGORY_MODEL_NAME, CATEGORY_VECTORIZER_NAME, 'purpose_category', True),
+        ('Unclear Purpose Detector', UNCLEAR_MODEL_NAME, UNCLEAR_VECTORIZER_NAME, 'is_unclear', False),
+    ]
+    updated_any = False
+    for step, (name, model_name, vectorizer_name, label, clear_only) in enumerate(models, start=3):
+        print(f"\n{step}. Updating {name}...")
+        changed = df[changed_after(df, states[model_name])]
+        rows = changed[changed['is_unclear'] == 0] if clear_only else changed
+        if not enough_changes(len(rows)):
+            continue
         
-        print(f"   Loaded {len(reservations_df)} reservations")
+        with timings.stage('fit'):
+            vectorizer = load_artifact(config.MODELS_DIR / vectorizer_name, mmap_mode=None)
+            X_text = vectorizer.transform(rows['purpose_clean'])
+            updated = update_saved_model(config.MODELS_DIR / model_name, X_text, rows[label],
+                                         state=states[model_name], n_jobs=n_jobs)
+        if updated is None:
+            continue
+        model, _, accuracy_before = updated
+        print(f"   Accuracy of the previous model on {len(rows)} changed reservations: {accuracy_before:.4f}")
+        print(f"   Forest now has {len(model.estimators_)} trees")
         
+        model_path = output_dir / model_name
+        with timings.stage('save'):
+            save_artifact(model, model_path)
+            arrays_path = export_model_arrays(arrays_path_for(model_path), model, vectorizer=vectorizer)
+            save_watermark(model_path, 'incremental', data_watermark(changed), end_date, model, len(rows),
+                           states[model_name], labels=rows[label])
+        print(f"   Model saved to: {model_path}")
+        print(f"   Array export saved to: {arrays_path}")
+        updated_any = True
+    return updated_any
+
+
+def plan_models(full: bool = False):
+    """
+    Plan both models together: a full rebuild of both whenever either one needs it
+    
+    Returns:
+        Tuple of ('full' | 'incremental', {model name: watermark}, reason)
+    """
+    plans = {name: plan_training(config.MODELS_DIR / name, full) for name in (CATEGORY_MODEL_NAME, UNCLEAR_MODEL_NAME)}
+    states = {name: state for name, (_, state, _) in plans.items()}
+    for name, (mode, _, reason) in plans.items():
+        if mode == 'full':
+            return 'full', states, f"{Path(name).stem}: {reason}"
+    return 'incremental', states, ', '.join(dict.fromkeys(reason for _, _, reason in plans.values()))
+
+
+def train(data: TrainingData, full: bool = False, n_jobs: int = -1, output_dir=None, timings: StageTimings = None):
+    """
+    Train (or incrementally update) the purpose category and unclear purpose models
+    
+    Args:
+        data: Reservations window (src/training_data.py)
+        full: Rebuild from the whole window even if an incremental update is possible
+        n_jobs: Cores for the forests
+        output_dir: Where to write the artifacts (default: config.MODELS_DIR); the
+            previous models and their watermarks are always read from config.MODELS_DIR
+        timings: Records the seconds each stage takes
+    
+    Returns:
+        'full' or 'incremental', or None when no model was written
+    """
+    timings = timings or StageTimings()
+    output_dir = Path(output_dir or config.MODELS_DIR)
+    end_date = data.end_date
+    
+    mode, states, reason = plan_models(full)
+    print(f"   Training mode: {mode} ({reason})")
+    reservations_df = data.reservations
+    
+    if mode == 'incremental':
+        reservations_df = reservations_df[changed_after(reservations_df, earliest_watermark(list(states.values())))]
+        if not enough_changes(len(reservations_df)):
+            return None
         print("\n2. Preparing features...")
+        with timings.stage('features'):
+            df = prepare_features(reservations_df)
+        return mode if update_incrementally(df, end_date, states, n_jobs, output_dir, timings) else None
+    
+    watermark = data_watermark(reservations_df)
+    
+    if reservations_df.empty:
+        print("No reservation data found. Cannot train model.")
+        return None
+    
+    if len(reservations_df) < 10:
+        print("\nWarning: Not enough data for training!")
+        print("   Need at least 10 reservations with purposes.")
+        return None
+    
+    print(f"   Using {len(reservations_df)} reservations")
+    
+    print("\n2. Preparing features...")
+    with timings.stage('features'):
         df = prepare_features(reservations_df)
-        
-        # Show category distribution
-        print("\n   Purpose Category Distribution:")
-        category_counts = df['purpose_category'].value_counts()
-        for cat, count in category_counts.items():
-            print(f"      {cat}: {count}")
-        
-        print(f"\n   Unclear purposes: {df['is_unclear'].sum()} ({df['is_unclear'].mean()*100:.1f}%)")
-        
-        # Train category classification model
-        print("\n3. Training Purpose Category Classifier...")
-        
-        # Filter out unclear purposes for category classification
-        clear_df = df[df['is_unclear'] == 0].copy()
-        
-        if len(clear_df) < 5:
-            print("   Not enough clear purposes for category classification.")
-        else:
-            # Vectorize purposes
-            vectorizer = TfidfVectorizer(
-                max_features=1000,
-                ngram_range=(1, 2),
-                min_df=2,
-                stop_words='english'
-            )
-            
-            X_text = vectorizer.fit_transform(clear_df['purpose_clean'])
-            y_category = clear_df['purpose_category']
-            
-            # Split data (only stratify if all classes have at least 2 samples)
-            unique_classes = y_category.unique()
-            can_stratify = all(y_category.value_counts()[cat] >= 2 for cat in unique_classes) and len(unique_classes) > 1
-            
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_text, y_category,
-                test_size=0.2,
-                random_state=42,
-                stratify=y_category if can_stratify else None
-            )
-            
-            # Train classifier
-            category_classifier = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1,
-                class_weight='balanced'
-            )
-            
-            category_classifier.fit(X_train, y_train)
-            
-            # Evaluate
-            y_pred_train = category_classifier.predict(X_train)
-            y_pred_test = category_classifier.predict(X_test)
-            
-            train_acc = accuracy_score(y_train, y_pred_train)
-            test_acc = accuracy_score(y_test, y_pred_test)
-            
-            print(f"   Train Accuracy: {train_acc:.4f}")
-            print(f"   Test Accuracy: {test_acc:.4f}")
-            
-            print("\n   Classification Report:")
-            print(classification_report(y_test, y_pred_test))
-            
-            # Save category model
-            category_model_path = config.MODELS_DIR / 'purpose_category_model.pkl'
-            category_vectorizer_path = config.MODELS_DIR / 'purpose_category_vectorizer.pkl'
-            
-            joblib.dump(category_classifier, category_model_path)
-            joblib.dump(vectorizer, category_vectorizer_path)
-            
-            print(f"\n   Category model saved to: {category_model_path}")
-            print(f"   Vectorizer saved to: {category_vectorizer_path}")
-        
-        # Train unclear detection model
-        print("\n4. Training Unclear Purpose Detector...")
-        
-        # Vectorize all purposes
-        unclear_vectorizer = TfidfVectorizer(
-            max_features=500,
+    
+    # Show category distribution
+    print("\n   Purpose Category Distribution:")
+    category_counts = df['purpose_category'].value_counts()
+    for cat, count in category_counts.items():
+        print(f"      {cat}: {count}")
+    
+    print(f"\n   Unclear purposes: {df['is_unclear'].sum()} ({df['is_unclear'].mean()*100:.1f}%)")
+    
+    # Train category classification model
+    print("\n3. Training Purpose Category Classifier...")
+    
+    # Filter out unclear purposes for category classification
+    clear_df = df[df['is_unclear'] == 0].copy()
+    
+    if len(clear_df) < 5:
+        print("   Not enough clear purposes for category classification.")
+    else:
+        # Vectorize purposes
+        vectorizer = TfidfVectorizer(
+            max_features=1000,
             ngram_range=(1, 2),
-            min_df=1
+            min_df=2,
+            stop_words='english'
         )
         
-        X_text_all = unclear_vectorizer.fit_transform(df['purpose_clean'])
-        y_unclear = df['is_unclear']
+        X_text = vectorizer.fit_transform(clear_df['purpose_clean'])
+        y_category = clear_df['purpose_category']
         
-        # Split data (only stratify if both classes have at least 2 samples)
-        unclear_count = y_unclear.sum()
-        clear_count = (y_unclear == 0).sum()
-        can_stratify_u = unclear_count >= 2 and clear_count >= 2
+        # Split data (only stratify if all classes have at least 2 samples)
+        unique_classes = y_category.unique()
+        can_stratify = all(y_category.value_counts()[cat] >= 2 for cat in unique_classes) and len(unique_classes) > 1
         
-        X_train_u, X_test_u, y_train_u, y_test_u = train_test_split(
-            X_text_all, y_unclear,
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_text, y_category,
             test_size=0.2,
             random_state=42,
-            stratify=y_unclear if can_stratify_u else None
+            stratify=y_category if can_stratify else None
         )
         
         # Train classifier
-        unclear_classifier = RandomForestClassifier(
+        category_classifier = RandomForestClassifier(
             n_estimators=100,
             max_depth=10,
             random_state=42,
-            n_jobs=-1,
+            n_jobs=n_jobs,
             class_weight='balanced'
         )
         
-        unclear_classifier.fit(X_train_u, y_train_u)
+        with timings.stage('fit'):
+            category_classifier.fit(X_train, y_train)
         
         # Evaluate
-        y_pred_train_u = unclear_classifier.predict(X_train_u)
-        y_pred_test_u = unclear_classifier.predict(X_test_u)
+        with timings.stage('evaluate'):
+            y_pred_train = category_classifier.predict(X_train)
+            y_pred_test = category_classifier.predict(X_test)
         
-        train_acc_u = accuracy_score(y_train_u, y_pred_train_u)
-        test_acc_u = accuracy_score(y_test_u, y_pred_test_u)
+        train_acc = accuracy_score(y_train, y_pred_train)
+        test_acc = accuracy_score(y_test, y_pred_test)
         
-        print(f"   Train Accuracy: {train_acc_u:.4f}")
-        print(f"   Test Accuracy: {test_acc_u:.4f}")
+        print(f"   Train Accuracy: {train_acc:.4f}")
+        print(f"   Test Accuracy: {test_acc:.4f}")
         
         print("\n   Classification Report:")
-        unique_classes_u = sorted(np.unique(y_test_u))
-        if len(unique_classes_u) == 2:
-            print(classification_report(y_test_u, y_pred_test_u, target_names=['Clear', 'Unclear']))
-        else:
-            class_name = 'Clear' if 0 in unique_classes_u else 'Unclear'
-            print(f"   Only one class present in test set: {class_name}")
-            print(classification_report(y_test_u, y_pred_test_u, labels=unique_classes_u, target_names=[class_name]))
+        print(classification_report(y_test, y_pred_test))
         
-        # Save unclear model
-        unclear_model_path = config.MODELS_DIR / 'purpose_unclear_model.pkl'
-        unclear_vectorizer_path = config.MODELS_DIR / 'purpose_unclear_vectorizer.pkl'
+        # Save category model
+        category_model_path = output_dir / CATEGORY_MODEL_NAME
+        category_vectorizer_path = output_dir / CATEGORY_VECTORIZER_NAME
         
-        joblib.dump(unclear_classifier, unclear_model_path)
-        joblib.dump(unclear_vectorizer, unclear_vectorizer_path)
+        with timings.stage('save'):
+            save_artifact(category_classifier, category_model_path)
+            save_artifact(vectorizer, category_vectorizer_path)
+            category_arrays_path = export_model_arrays(arrays_path_for(category_model_path), category_classifier,
+                                                       vectorizer=vectorizer)
+            save_watermark(category_model_path, 'full', watermark, end_date, category_classifier, len(clear_df),
+                           states[CATEGORY_MODEL_NAME], labels=y_category)
         
-        print(f"\n   Unclear detector saved to: {unclear_model_path}")
-        print(f"   Vectorizer saved to: {unclear_vectorizer_path}")
+        print(f"\n   Category model saved to: {category_model_path}")
+        print(f"   Vectorizer saved to: {category_vectorizer_path}")
+        print(f"   Array export saved to: {category_arrays_path}")
+    
+    # Train unclear detection model
+    print("\n4. Training Unclear Purpose Detector...")
+    
+    # Vectorize all purposes
+    unclear_vectorizer = TfidfVectorizer(
+        max_features=500,
+        ngram_range=(1, 2),
+        min_df=1
+    )
+    
+    X_text_all = unclear_vectorizer.fit_transform(df['purpose_clean'])
+    y_unclear = df['is_unclear']
+    
+    # Split data (only stratify if both classes have at least 2 samples)
+    unclear_count = y_unclear.sum()
+    clear_count = (y_unclear == 0).sum()
+    can_stratify_u = unclear_count >= 2 and clear_count >= 2
+    
+    X_train_u, X_test_u, y_train_u, y_test_u = train_test_split(
+        X_text_all, y_unclear,
+        test_size=0.2,
+        random_state=42,
+        stratify=y_unclear if can_stratify_u else None
+    )
+    
+    # Train classifier
+    unclear_classifier = RandomForestClassifier(
+        n_estimators=100,
+        max_depth=10,
+        random_state=42,
+        n_jobs=n_jobs,
+        class_weight='balanced'
+    )
+    
+    with timings.stage('fit'):
+        unclear_classifier.fit(X_train_u, y_train_u)
+    
+    # Evaluate
+    with timings.stage('evaluate'):
+        y_pred_train_u = unclear_classifier.predict(X_train_u)
+        y_pred_test_u = unclear_classifier.predict(X_test_u)
+    
+    train_acc_u = accuracy_score(y_train_u, y_pred_train_u)
+    test_acc_u = accuracy_score(y_test_u, y_pred_test_u)
+    
+    print(f"   Train Accuracy: {train_acc_u:.4f}")
+    print(f"   Test Accuracy: {test_acc_u:.4f}")
+    
+    print("\n   Classification Report:")
+    unique_classes_u = sorted(np.unique(y_test_u))
+    if len(unique_classes_u) == 2:
+        print(classification_report(y_test_u, y_pred_test_u, target_names=['Clear', 'Unclear']))
+    else:
+        class_name = 'Clear' if 0 in unique_classes_u else 'Unclear'
+        print(f"   Only one class present in test set: {class_name}")
+        print(classification_report(y_test_u, y_pred_test_u, labels=unique_classes_u, target_names=[class_name]))
+    
+    # Save unclear model
+    unclear_model_path = output_dir / UNCLEAR_MODEL_NAME
+    unclear_vectorizer_path = output_dir / UNCLEAR_VECTORIZER_NAME
+    
+    with timings.stage('save'):
+        save_artifact(unclear_classifier, unclear_model_path)
+        save_artifact(unclear_vectorizer, unclear_vectorizer_path)
+        unclear_arrays_path = export_model_arrays(arrays_path_for(unclear_model_path), unclear_classifier,
+                                                  vectorizer=unclear_vectorizer)
+        save_watermark(unclear_model_path, 'full', watermark, end_date, unclear_classifier, len(df),
+                       states[UNCLEAR_MODEL_NAME], labels=y_unclear)
+    
+    print(f"\n   Unclear detector saved to: {unclear_model_path}")
+    print(f"   Vectorizer saved to: {unclear_vectorizer_path}")
+    print(f"   Array export saved to: {unclear_arrays_path}")
+    return mode
+
+
+def main(full: bool = False):
+    """
+    Train purpose analysis models
+    
+    Args:
+        full: Rebuild from the whole window even if an incremental update is possible
+    """
+    print("=" * 60)
+    print("NLP Purpose Analysis Model Training")
+    print("=" * 60)
+    
+    config.ensure_dirs()
+    
+    loader = DataLoader()
+    
+    try:
+        loader.connect()
+        
+        print("\n1. Loading data...")
+        mode, states, _ = plan_models(full)
+        changed_since = earliest_watermark(list(states.values())) if mode == 'incremental' else None
+        data = load_training_data(loader, changed_since=changed_since, load_context=False)
+        train(data, full)
         
     except Exception as e:
         print(f"Error during training: {e}")
@@ -318,4 +460,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Train the purpose analysis models')
+    parser.add_argument('--full', action='store_true',
+                        help='Rebuild from the last 365 days instead of updating from the watermark')
+    args = parser.parse_args()
+    main(full=args.full)
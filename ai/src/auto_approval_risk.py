@@ -5,9 +5,7 @@ Loads trained model and predicts risk level for reservations
 
 import sys
 from pathlib import Path
-import pandas as pd
 import numpy as np
-import joblib
 from datetime import datetime
 import re
 
@@ -15,11 +13,17 @@ import re
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import config
+from src.utils import is_missing, parse_date
+from src.calendar_features import date_features
+from src.time_slots import parse_time_slot
+from src.model_store import load_artifact
+from src.forest_arrays import fresh_arrays_path, load_model_arrays
+from src.model_manager import load_once, get_model
 
 
 def extract_capacity_number(capacity_str):
     """Extract numeric capacity from string"""
-    if pd.isna(capacity_str):
+    if is_missing(capacity_str):
         return 100
     if isinstance(capacity_str, (int, float)):
         return int(capacity_str)
@@ -27,45 +31,22 @@ def extract_capacity_number(capacity_str):
     return int(match.group(1)) if match else 100
 
 
-def extract_time_features(time_slot: str):
-    """Extract start hour, end hour, and duration from time slot string"""
-    if ' - ' in time_slot:
-        try:
-            start_time_str, end_time_str = time_slot.split(' - ')
-            start_hour = int(start_time_str.split(':')[0])
-            end_hour = int(end_time_str.split(':')[0])
-        except:
-            start_hour = 8
-            end_hour = 17
-    elif 'Morning' in time_slot:
-        start_hour = 8
-        end_hour = 12
-    elif 'Afternoon' in time_slot:
-        start_hour = 13
-        end_hour = 17
-    elif 'Evening' in time_slot:
-        start_hour = 18
-        end_hour = 22
-    else:
-        start_hour = 8
-        end_hour = 17
-    
-    duration_hours = end_hour - start_hour
-    return {'start_hour': start_hour, 'end_hour': end_hour, 'duration_hours': duration_hours}
+# Feature order used at training time
+EXPECTED_FEATURES = [
+    'facility_auto_approve', 'facility_capacity', 'facility_max_duration_hours',
+    'facility_capacity_threshold', 'user_is_verified', 'user_booking_count',
+    'user_violation_count', 'start_hour', 'end_hour', 'duration_hours',
+    'day_of_week', 'month', 'is_weekend', 'is_holiday', 'expected_attendees',
+    'capacity_ratio', 'duration_ratio', 'is_commercial', 'advance_days',
+    'within_capacity_threshold', 'within_duration_limit', 'within_advance_window',
+    'facility_id_encoded', 'user_id_encoded'
+]
 
-
-def is_holiday(date_input):
-    """Check if date is a holiday"""
-    if isinstance(date_input, pd.Timestamp):
-        date_str = date_input.strftime('%Y-%m-%d')
-    elif isinstance(date_input, str):
-        date_str = date_input
-    else:
-        return 0
-    
-    month_day = '-'.join(date_str.split('-')[1:3])
-    all_holidays = config.PHILIPPINE_HOLIDAYS + config.BARANGAY_CULIAT_EVENTS
-    return 1 if month_day in all_holidays else 0
+DEFAULT_RISK = {
+    'risk_level': 1,  # Default to high risk if model not available
+    'risk_probability': 0.5,
+    'confidence': 0.0
+}
 
 
 class AutoApprovalRiskModel:
@@ -74,25 +55,87 @@ class AutoApprovalRiskModel:
     def __init__(self):
         self.model = None
         self.encoders = None
+        self.encoder_index = {}
+        self.feature_columns = EXPECTED_FEATURES
         self.loaded = False
+        self.load_error = None  # Why the last load_model() failed, for the health report
+        self.batcher = None  # MicroBatcher over predict_risk_batch, set by the model server
     
+    @load_once('loaded', 'auto_approval_risk_model.pkl', 'auto_approval_risk_encoders.pkl')
     def load_model(self):
         """Load trained model and encoders"""
         try:
             model_path = config.MODELS_DIR / 'auto_approval_risk_model.pkl'
             encoders_path = config.MODELS_DIR / 'auto_approval_risk_encoders.pkl'
             
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model file not found: {model_path}")
-            
-            self.model = joblib.load(model_path)
-            self.encoders = joblib.load(encoders_path)
+            # Prefer the pickle-free export (scripts/export_model_arrays.py): no sklearn import,
+            # memory-mapped arrays, and no per-call input validation
+            arrays_path = fresh_arrays_path(model_path)
+            if arrays_path is not None:
+                bundle = load_model_arrays(arrays_path)
+                self.model = bundle['model']
+                self.feature_columns = bundle['model'].feature_names or EXPECTED_FEATURES
+                encoder_classes = bundle['encoders'] or {}
+            else:
+                if not model_path.exists():
+                    raise FileNotFoundError(f"Model file not found: {model_path}")
+                
+                self.model = load_artifact(model_path)
+                self.encoders = load_artifact(encoders_path)
+                # Rows are built in the training column order, so sklearn's per-call DataFrame
+                # feature-name check is redundant; drop it and predict on plain arrays
+                self.feature_columns = list(getattr(self.model, 'feature_names_in_', EXPECTED_FEATURES))
+                if hasattr(self.model, 'feature_names_in_'):
+                    del self.model.feature_names_in_
+                encoder_classes = {col: encoder.classes_ for col, encoder in self.encoders.items()}
+            # class label -> encoded value, so lookups are a dict hit instead of an array scan + transform
+            self.encoder_index = {
+                col: {label: code for code, label in enumerate(classes.tolist())}
+                for col, classes in encoder_classes.items()
+            }
             self.loaded = True
+            self.load_error = None
             return True
         except Exception as e:
-            print(f"Error loading model: {e}")
+            self.load_error = str(e)
+            print(f"Error loading model: {e}", file=sys.stderr)
             return False
     
+    def _encode(self, col: str, value):
+        """Encode a categorical value, 0 when the column or label was not seen in training"""
+        return self.encoder_index.get(col, {}).get(str(value), 0)
+    
+    def _feature_vector(self, features: dict):
+        """Build one feature row in training column order"""
+        feature_dict = {
+            'facility_auto_approve': 1 if features.get('facility_auto_approve', False) else 0,
+            'facility_capacity': features.get('facility_capacity', 100),
+            'facility_max_duration_hours': features.get('facility_max_duration_hours', 8.0),
+            'facility_capacity_threshold': features.get('facility_capacity_threshold', 200),
+            'user_is_verified': 1 if features.get('user_is_verified', True) else 0,
+            'user_booking_count': features.get('user_booking_count', 0),
+            'user_violation_count': features.get('user_violation_count', 0),
+            'start_hour': features.get('start_hour', 12),
+            'end_hour': features.get('end_hour', 17),
+            'duration_hours': features.get('duration_hours', 4),
+            'day_of_week': features.get('day_of_week', 0),
+            'month': features.get('month', 1),
+            'is_weekend': features.get('is_weekend', 0),
+            'is_holiday': features.get('is_holiday', 0),
+            'expected_attendees': features.get('expected_attendees', 50),
+            'capacity_ratio': features.get('capacity_ratio', 0.5),
+            'duration_ratio': features.get('duration_ratio', 0.5),
+            'is_commercial': 1 if features.get('is_commercial', False) else 0,
+            'advance_days': features.get('advance_days', 0),
+            'within_capacity_threshold': 1 if features.get('within_capacity_threshold', True) else 0,
+            'within_duration_limit': 1 if features.get('within_duration_limit', True) else 0,
+            'within_advance_window': 1 if features.get('within_advance_window', True) else 0,
+            # Encode categorical features
+            'facility_id_encoded': self._encode('facility_id', features.get('facility_id', 0)),
+            'user_id_encoded': self._encode('user_id', features.get('user_id', 0)),
+        }
+        return [feature_dict.get(col, 0) for col in self.feature_columns]
+    
     def predict_risk(self, features: dict):
         """
         Predict risk level for a reservation
@@ -106,164 +149,82 @@ class AutoApprovalRiskModel:
                 - risk_probability: Probability of high risk (0-1)
                 - confidence: Confidence in prediction
         """
+        if self.batcher is not None:
+            return self.batcher.submit(features)
+        return self.predict_risk_batch([features])[0]
+    
+    def predict_risk_batch(self, features_list: list):
+        """
+        Predict risk levels for many reservations with a single predict_proba pass
+        
+        Args:
+            features_list: List of feature dictionaries (same keys as predict_risk)
+        
+        Returns:
+            List of risk dictionaries in input order
+        """
+        if not features_list:
+            return []
+        
         if not self.loaded:
             if not self.load_model():
-                return {
-                    'risk_level': 1,  # Default to high risk if model not available
-                    'risk_probability': 0.5,
-                    'confidence': 0.0
-                }
+                return [dict(DEFAULT_RISK) for _ in features_list]
         
         try:
-            # Prepare feature vector
-            feature_dict = {
-                'facility_id': features.get('facility_id', 0),
-                'facility_auto_approve': 1 if features.get('facility_auto_approve', False) else 0,
-                'facility_capacity': features.get('facility_capacity', 100),
-                'facility_max_duration_hours': features.get('facility_max_duration_hours', 8.0),
-                'facility_capacity_threshold': features.get('facility_capacity_threshold', 200),
-                'user_id': features.get('user_id', 0),
-                'user_is_verified': 1 if features.get('user_is_verified', True) else 0,
-                'user_booking_count': features.get('user_booking_count', 0),
-                'user_violation_count': features.get('user_violation_count', 0),
-                'start_hour': features.get('start_hour', 12),
-                'end_hour': features.get('end_hour', 17),
-                'duration_hours': features.get('duration_hours', 4),
-                'day_of_week': features.get('day_of_week', 0),
-                'month': features.get('month', 1),
-                'is_weekend': features.get('is_weekend', 0),
-                'is_holiday': features.get('is_holiday', 0),
-                'expected_attendees': features.get('expected_attendees', 50),
-                'capacity_ratio': features.get('capacity_ratio', 0.5),
-                'duration_ratio': features.get('duration_ratio', 0.5),
-                'is_commercial': 1 if features.get('is_commercial', False) else 0,
-                'advance_days': features.get('advance_days', 0),
-                'within_capacity_threshold': 1 if features.get('within_capacity_threshold', True) else 0,
-                'within_duration_limit': 1 if features.get('within_duration_limit', True) else 0,
-                'within_advance_window': 1 if features.get('within_advance_window', True) else 0,
-            }
+            X = np.array([self._feature_vector(features) for features in features_list], dtype=np.float64)
             
-            # Encode categorical features
-            if 'facility_id' in self.encoders:
-                facility_id_str = str(feature_dict['facility_id'])
-                if facility_id_str in self.encoders['facility_id'].classes_:
-                    feature_dict['facility_id_encoded'] = self.encoders['facility_id'].transform([facility_id_str])[0]
-                else:
-                    feature_dict['facility_id_encoded'] = 0
-            else:
-                feature_dict['facility_id_encoded'] = 0
+            # predict() is argmax over predict_proba, so one pass gives both
+            probas = self.model.predict_proba(X)
+            risk_levels = self.model.classes_.take(np.argmax(probas, axis=1))
             
-            if 'user_id' in self.encoders:
-                user_id_str = str(feature_dict['user_id'])
-                if user_id_str in self.encoders['user_id'].classes_:
-                    feature_dict['user_id_encoded'] = self.encoders['user_id'].transform([user_id_str])[0]
-                else:
-                    feature_dict['user_id_encoded'] = 0
-            else:
-                feature_dict['user_id_encoded'] = 0
-            
-            # Remove original categorical columns
-            feature_dict.pop('facility_id', None)
-            feature_dict.pop('user_id', None)
-            
-            # Convert to DataFrame
-            feature_df = pd.DataFrame([feature_dict])
-            
-            # Ensure all columns from training are present
-            expected_features = [
-                'facility_auto_approve', 'facility_capacity', 'facility_max_duration_hours',
-                'facility_capacity_threshold', 'user_is_verified', 'user_booking_count',
-                'user_violation_count', 'start_hour', 'end_hour', 'duration_hours',
-                'day_of_week', 'month', 'is_weekend', 'is_holiday', 'expected_attendees',
-                'capacity_ratio', 'duration_ratio', 'is_commercial', 'advance_days',
-                'within_capacity_threshold', 'within_duration_limit', 'within_advance_window',
-                'facility_id_encoded', 'user_id_encoded'
-            ]
-            
-            # Add missing columns with default values
-            for col in expected_features:
-                if col not in feature_df.columns:
-                    feature_df[col] = 0
-            
-            # Reorder columns to match training
-            feature_df = feature_df[expected_features]
-            
-            # Predict
-            risk_level = self.model.predict(feature_df)[0]
-            risk_proba = self.model.predict_proba(feature_df)[0]
-            
-            # Get probability of high risk (class 1)
-            high_risk_prob = risk_proba[1] if len(risk_proba) > 1 else risk_proba[0]
-            confidence = max(risk_proba)
-            
-            return {
-                'risk_level': int(risk_level),
-                'risk_probability': float(high_risk_prob),
-                'confidence': float(confidence),
-                'is_low_risk': bool(risk_level == 0),  # Convert numpy bool to Python bool for JSON
-                'is_high_risk': bool(risk_level == 1),  # Convert numpy bool to Python bool for JSON
-            }
+            results = []
+            for risk_level, risk_proba in zip(risk_levels, probas):
+                # Get probability of high risk (class 1)
+                high_risk_prob = risk_proba[1] if len(risk_proba) > 1 else risk_proba[0]
+                confidence = max(risk_proba)
+                
+                results.append({
+                    'risk_level': int(risk_level),
+                    'risk_probability': float(high_risk_prob),
+                    'confidence': float(confidence),
+                    'is_low_risk': bool(risk_level == 0),  # Convert numpy bool to Python bool for JSON
+                    'is_high_risk': bool(risk_level == 1),  # Convert numpy bool to Python bool for JSON
+                })
+            return results
         
         except Exception as e:
             print(f"Error predicting risk: {e}")
-            return {
-                'risk_level': 1,
-                'risk_probability': 0.5,
-                'confidence': 0.0
-            }
+            return [dict(DEFAULT_RISK) for _ in features_list]
     
-    def assess_reservation_risk(self, facility_id: int, user_id: int, reservation_date: str,
-                              time_slot: str, expected_attendees: int, is_commercial: bool,
-                              facility_auto_approve: bool, facility_capacity: int,
-                              facility_max_duration_hours: float, facility_capacity_threshold: int,
-                              user_is_verified: bool, user_booking_count: int,
-                              user_violation_count: int = 0):
+    def build_features(self, facility_id: int, user_id: int, reservation_date: str,
+                       time_slot: str, expected_attendees: int, is_commercial: bool,
+                       facility_auto_approve: bool, facility_capacity: int,
+                       facility_max_duration_hours: float, facility_capacity_threshold: int,
+                       user_is_verified: bool, user_booking_count: int,
+                       user_violation_count: int = 0):
         """
-        Assess risk for a reservation request
+        Derive the model features for a reservation request
         
-        Args:
-            facility_id: Facility ID
-            user_id: User ID
-            reservation_date: Reservation date (YYYY-MM-DD)
-            time_slot: Time slot string (e.g., "08:00 - 12:00")
-            expected_attendees: Expected number of attendees
-            is_commercial: Whether reservation is commercial
-            facility_auto_approve: Whether facility allows auto-approval
-            facility_capacity: Facility capacity
-            facility_max_duration_hours: Maximum duration allowed
-            facility_capacity_threshold: Capacity threshold for auto-approval
-            user_is_verified: Whether user is verified
-            user_booking_count: User's total booking count
-            user_violation_count: User's violation count
+        Takes the same arguments as assess_reservation_risk.
         
         Returns:
-            Dictionary with risk assessment results
+            Feature dictionary accepted by predict_risk / predict_risk_batch
         """
         # Parse reservation date
         try:
-            res_date = pd.to_datetime(reservation_date)
-            day_of_week = res_date.dayofweek
-            month = res_date.month
-            is_weekend = 1 if day_of_week >= 5 else 0
-            holiday = is_holiday(res_date)
+            res_date = parse_date(reservation_date)
+            calendar = date_features(res_date)
             
             # Calculate advance booking days
             current_date = datetime.now().date()
-            if isinstance(res_date, pd.Timestamp):
-                res_date_obj = res_date.date()
-            else:
-                res_date_obj = datetime.strptime(reservation_date, '%Y-%m-%d').date()
-            advance_days = (res_date_obj - current_date).days
+            advance_days = (res_date.date() - current_date).days
         except:
-            day_of_week = 0
-            month = 1
-            is_weekend = 0
-            holiday = 0
+            calendar = date_features(None)
             advance_days = 0
         
         # Extract time features
-        time_feat = extract_time_features(time_slot)
-        duration_hours = time_feat['duration_hours']
+        slot = parse_time_slot(time_slot)
+        duration_hours = slot.duration_hours
         
         # Calculate ratios and checks
         capacity = extract_capacity_number(facility_capacity)
@@ -274,7 +235,7 @@ class AutoApprovalRiskModel:
         within_advance_window = 1 if (0 <= advance_days <= 60) else 0
         
         # Prepare features
-        features = {
+        return {
             'facility_id': facility_id,
             'facility_auto_approve': facility_auto_approve,
             'facility_capacity': capacity,
@@ -284,13 +245,13 @@ class AutoApprovalRiskModel:
             'user_is_verified': user_is_verified,
             'user_booking_count': user_booking_count,
             'user_violation_count': user_violation_count,
-            'start_hour': time_feat['start_hour'],
-            'end_hour': time_feat['end_hour'],
+            'start_hour': slot.start_hour,
+            'end_hour': slot.end_hour,
             'duration_hours': duration_hours,
-            'day_of_week': day_of_week,
-            'month': month,
-            'is_weekend': is_weekend,
-            'is_holiday': holiday,
+            'day_of_week': calendar['day_of_week'],
+            'month': calendar['month'],
+            'is_weekend': calendar['is_weekend'],
+            'is_holiday': calendar['is_holiday'],
             'expected_attendees': expected_attendees,
             'capacity_ratio': capacity_ratio,
             'duration_ratio': duration_ratio,
@@ -300,17 +261,55 @@ class AutoApprovalRiskModel:
             'within_duration_limit': within_duration_limit,
             'within_advance_window': within_advance_window,
         }
+    
+    def assess_reservation_risk(self, facility_id: int, user_id: int, reservation_date: str,
+                              time_slot: str, expected_attendees: int, is_commercial: bool,
+                              facility_auto_approve: bool, facility_capacity: int,
+                              facility_max_duration_hours: float, facility_capacity_threshold: int,
+                              user_is_verified: bool, user_booking_count: int,
+                              user_violation_count: int = 0):
+        """
+        Assess risk for a reservation request
+        
+        Args:
+            facility_id: Facility ID
+            user_id: User ID
+            reservation_date: Reservation date (YYYY-MM-DD)
+            time_slot: Time slot string (e.g., "08:00 - 12:00")
+            expected_attendees: Expected number of attendees
+            is_commercial: Whether reservation is commercial
+            facility_auto_approve: Whether facility allows auto-approval
+            facility_capacity: Facility capacity
+            facility_max_duration_hours: Maximum duration allowed
+            facility_capacity_threshold: Capacity threshold for auto-approval
+            user_is_verified: Whether user is verified
+            user_booking_count: User's total booking count
+            user_violation_count: User's violation count
         
+        Returns:
+            Dictionary with risk assessment results
+        """
+        features = self.build_features(
+            facility_id, user_id, reservation_date, time_slot, expected_attendees,
+            is_commercial, facility_auto_approve, facility_capacity,
+            facility_max_duration_hours, facility_capacity_threshold,
+            user_is_verified, user_booking_count, user_violation_count
+        )
         return self.predict_risk(features)
-
-
-# Global model instance
-_model_instance = None
+    
+    def assess_reservations_risk(self, reservations: list):
+        """
+        Assess risk for many reservation requests in one model call
+        
+        Args:
+            reservations: List of dicts holding assess_reservation_risk keyword arguments
+        
+        Returns:
+            List of risk assessment results in input order
+        """
+        return self.predict_risk_batch([self.build_features(**reservation) for reservation in reservations])
 
 
 def get_risk_model():
-    """Get or create global model instance"""
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = AutoApprovalRiskModel()
-    return _model_instance
+    """Get the current global model instance (see src/model_manager.py; replaced when the artifacts change)"""
+    return get_model('auto_approval_risk')
@@ -0,0 +1,176 @@
+"""
+Calendar features shared by training and inference
+day_of_week, month, is_weekend and is_holiday for one date or a whole date array
+
+Holidays are the national holidays of src/holiday_calendar.py (the same table
+api/detect_holidays.py answers from, Easter-aware) plus the Barangay Culiat events in
+config.BARANGAY_CULIAT_EVENTS, which drive demand at these facilities just as much.
+They are flattened into one boolean table indexed by day number over the calendar's
+years, so arrays are classified with a single vectorized lookup and single dates with
+one index.
+
+Unparseable or missing dates get day_of_week 0, month 1 and zero flags, like the
+inference fallback always did.
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.holiday_calendar import get_holiday_calendar
+
+
+# 1970-01-01 (day 0 of datetime64[D]) was a Thursday
+_EPOCH_WEEKDAY = 3
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _year_holiday_days(calendar, year: int):
+    """Day numbers (days since 1970-01-01) of the holidays and local events of one year"""
+    days = [date.fromisoformat(holiday['date']).toordinal() - _EPOCH_ORDINAL
+            for holiday in calendar.holidays_in_year(year)]
+    for month_day in config.BARANGAY_CULIAT_EVENTS:
+        month, day = (int(part) for part in month_day.split('-'))
+        days.append(date(year, month, day).toordinal() - _EPOCH_ORDINAL)
+    return days
+
+
+class HolidayTable:
+    """Boolean holiday lookup over the calendar's years, indexed by day number"""
+
+    def __init__(self, calendar=None):
+        calendar = calendar or get_holiday_calendar()
+        self.calendar = calendar
+        self.first_day = date(calendar.first_year, 1, 1).toordinal() - _EPOCH_ORDINAL
+        last_day = date(calendar.last_year, 12, 31).toordinal() - _EPOCH_ORDINAL
+        self.flags = np.zeros(last_day - self.first_day + 1, dtype=np.int64)
+        for year in range(calendar.first_year, calendar.last_year + 1):
+            self.flags[np.asarray(_year_holiday_days(calendar, year)) - self.first_day] = 1
+        self._outside = {}  # year outside the table -> set of holiday day numbers
+
+    def _outside_days(self, year: int):
+        days = self._outside.get(year)
+        if days is None:
+            days = self._outside[year] = set(_year_holiday_days(self.calendar, year))
+        return days
+
+    def lookup(self, days: np.ndarray):
+        """is_holiday (0/1) for an int64 array of day numbers"""
+        index = days - self.first_day
+        inside = (index >= 0) & (index < len(self.flags))
+        result = np.zeros(len(days), dtype=np.int64)
+        result[inside] = self.flags[index[inside]]
+        if not inside.all():
+            for position in np.flatnonzero(~inside).tolist():
+                day = int(days[position])
+                year = date.fromordinal(day + _EPOCH_ORDINAL).year
+                result[position] = 1 if day in self._outside_days(year) else 0
+        return result
+
+    def is_holiday_day(self, day: int):
+        """is_holiday (0/1) for one day number"""
+        index = day - self.first_day
+        if 0 <= index < len(self.flags):
+            return int(self.flags[index])
+        year = date.fromordinal(day + _EPOCH_ORDINAL).year
+        return 1 if day in self._outside_days(year) else 0
+
+
+# Global table instance
+_table_instance = None
+
+
+def get_holiday_table():
+    """Get or build the process-wide holiday lookup table"""
+    global _table_instance
+    if _table_instance is None:
+        _table_instance = HolidayTable()
+    return _table_instance
+
+
+def _to_datetime64(value):
+    """One date/datetime/ISO string as datetime64[s], NaT when it does not parse"""
+    if value is None:
+        return np.datetime64('NaT', 's')
+    try:
+        return np.datetime64(value, 's')
+    except (ValueError, TypeError):
+        return np.datetime64('NaT', 's')
+
+
+def to_day_numbers(dates):
+    """
+    Dates as int64 days since 1970-01-01
+
+    Args:
+        dates: pandas Series/DatetimeIndex, numpy datetime64 array, or a list of
+            date/datetime objects or ISO strings (NaT/None and unparseable strings
+            become invalid dates)
+
+    Returns:
+        Tuple of (int64 day numbers, boolean mask of valid dates)
+    """
+    if hasattr(dates, 'dt') and getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    if hasattr(dates, 'to_numpy'):
+        dates = dates.to_numpy()
+    values = np.asarray(dates)
+    if values.dtype.kind != 'M':
+        items = [None if value is None or value != value else value for value in values.tolist()]
+        try:
+            values = np.array(items, dtype='datetime64[s]')
+        except (ValueError, TypeError):
+            # Some value does not parse; it becomes NaT (and gets the fallback features)
+            values = np.array([_to_datetime64(value) for value in items], dtype='datetime64[s]')
+    days = values.astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    return np.where(valid, days.astype(np.int64), 0), valid
+
+
+def calendar_features(dates):
+    """
+    Calendar features for a whole date array in one vectorized pass
+
+    Returns:
+        Dict of int64 arrays: day_of_week (0 = Monday), month (1-12), is_weekend, is_holiday
+    """
+    days, valid = to_day_numbers(dates)
+    day_of_week = (days + _EPOCH_WEEKDAY) % 7
+    month = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) % 12 + 1
+    is_holiday = get_holiday_table().lookup(days)
+
+    return {
+        'day_of_week': np.where(valid, day_of_week, 0),
+        'month': np.where(valid, month, 1),
+        'is_weekend': np.where(valid, (day_of_week >= 5).astype(np.int64), 0),
+        'is_holiday': np.where(valid, is_holiday, 0),
+    }
+
+
+def date_features(day):
+    """
+    Calendar features of one date (the scalar path of calendar_features, for inference)
+
+    Args:
+        day: date or datetime (None for an unknown date)
+
+    Returns:
+        Dict of ints: day_of_week, month, is_weekend, is_holiday
+    """
+    if day is None:
+        return {'day_of_week': 0, 'month': 1, 'is_weekend': 0, 'is_holiday': 0}
+    if isinstance(day, datetime):
+        day = day.date()
+    day_of_week = day.weekday()
+    return {
+        'day_of_week': day_of_week,
+        'month': day.month,
+        'is_weekend': 1 if day_of_week >= 5 else 0,
+        'is_holiday': get_holiday_table().is_holiday_day(day.toordinal() - _EPOCH_ORDINAL),
+    }
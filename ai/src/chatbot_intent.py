@@ -0,0 +1,119 @@
+"""
+Chatbot Intent Classification Model Inference
+Loads trained model to classify chatbot user questions into intents
+"""
+
+import sys
+from pathlib import Path
+import re
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.model_store import load_artifact, artifact_version
+from src.forest_arrays import fresh_arrays_path, load_model_arrays
+from src.model_manager import load_once, get_model
+
+
+def clean_text(text: str):
+    """Clean and normalize text"""
+    if not text:
+        return ""
+    text = str(text).lower()
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+class ChatbotIntentModel:
+    """Chatbot Intent Classification Model for inference"""
+
+    def __init__(self):
+        self.model = None
+        self.vectorizer = None
+        self.loaded = False
+        self.load_error = None  # Why the last load_model() failed, for the health report
+        self.version = None  # Fingerprint of the loaded artifacts (result cache key)
+        self.batcher = None  # MicroBatcher over classify_intents, set by the model server
+
+    @load_once('loaded', 'chatbot_intent_model.pkl', 'chatbot_intent_vectorizer.pkl')
+    def load_model(self):
+        """Load trained intent model and vectorizer"""
+        try:
+            model_path = config.MODELS_DIR / 'chatbot_intent_model.pkl'
+            vectorizer_path = config.MODELS_DIR / 'chatbot_intent_vectorizer.pkl'
+
+            # Prefer the pickle-free export (scripts/export_model_arrays.py), which loads without sklearn
+            arrays_path = fresh_arrays_path(model_path)
+            if arrays_path is not None:
+                bundle = load_model_arrays(arrays_path)
+                self.model = bundle['model']
+                self.vectorizer = bundle['vectorizer']
+                self.version = artifact_version([arrays_path])
+            else:
+                if not model_path.exists() or not vectorizer_path.exists():
+                    return False
+
+                self.model = load_artifact(model_path)
+                self.vectorizer = load_artifact(vectorizer_path)
+                self.version = artifact_version([model_path, vectorizer_path])
+            self.loaded = True
+            self.load_error = None
+            return True
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"Error loading intent model: {e}", file=sys.stderr)
+            return False
+
+    def classify_intent(self, question: str):
+        """
+        Classify a user question into an intent
+
+        Args:
+            question: User question text
+
+        Returns:
+            Dictionary with:
+                - intent: Predicted intent
+                - confidence: Probability of the predicted intent (0-1)
+                - top_intents: Top 3 intents with their confidence
+        """
+        if self.batcher is not None:
+            return self.batcher.submit(question)
+        return self.classify_intents([question])[0]
+
+    def classify_intents(self, questions: list):
+        """
+        Classify many questions with one vectorizer and one model call
+
+        Returns:
+            List of classify_intent dictionaries in input order
+        """
+        # Clean and vectorize questions
+        questions_vec = self.vectorizer.transform([clean_text(question) for question in questions])
+
+        # predict() is argmax over predict_proba, so one pass gives both
+        probas = self.model.predict_proba(questions_vec)
+        intent_classes = self.model.classes_
+        intents = intent_classes.take(probas.argmax(axis=1))
+
+        results = []
+        for intent, proba in zip(intents, probas):
+            # Get top 3 intents
+            intent_indices = proba.argsort()[-3:][::-1]
+            top_intents = [
+                {'intent': intent_classes[idx], 'confidence': float(proba[idx])}
+                for idx in intent_indices
+            ]
+            results.append({
+                'intent': str(intent),
+                'confidence': float(proba.max()),
+                'top_intents': top_intents,
+            })
+        return results
+
+
+def get_intent_model():
+    """Get the current global model instance (see src/model_manager.py; replaced when the artifacts change)"""
+    return get_model('chatbot_intent')
@@ -1,85 +1,334 @@
 """
 Data loading utilities for training AI models
 Connects to MySQL database and extracts reservation/facility data
+
+Reservations are read as tuples in chunks (config.DATA_LOADER['chunk_rows']). With
+streaming on, the chunks come from a server-side cursor (SSCursor), so only one chunk of
+raw rows is in memory at a time. Each chunk becomes a typed DataFrame right away, with
+DATE and DATETIME values converted from their Python objects directly.
+
+Loaded frames get the dtypes of their schema (RESERVATION_SCHEMA, FACILITY_SCHEMA,
+USER_SCHEMA): categoricals for strings that repeat a handful of values, int32 ids and
+counts, bool flags and datetime64[ns] dates. DATA_LOADER['compact_dtypes'] = False keeps
+only the dates.
+
+Connections come from a pool (src/db_pool.py). Each method borrows one for its query and
+gives it back, unless connect() is holding one for the loader (scripts that run raw SQL
+on loader.connection, or several queries in a row).
 """
 
+import numpy as np
 import pandas as pd
 import pymysql
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator
 import config
+from src.db_pool import ConnectionPool, get_pool
+
+
+# dtype per column of the loaded frames. Integer and bool dtypes are applied only when the
+# values fit (no NULLs, within range, only 0/1); otherwise the column keeps its dtype.
+RESERVATION_SCHEMA = {
+    'id': 'int32',
+    'user_id': 'int32',
+    'facility_id': 'int32',
+    'reservation_date': 'datetime64[ns]',
+    'time_slot': 'category',
+    'status': 'category',
+    'expected_attendees': 'int32',
+    'is_commercial': 'bool',
+    'auto_approved': 'bool',
+    'created_at': 'datetime64[ns]',
+    'updated_at': 'datetime64[ns]',
+    'facility_name': 'category',
+    'facility_capacity': 'category',
+    'facility_amenities': 'category',
+    'facility_status': 'category',
+    'user_name': 'category',
+    'user_role': 'category',
+    # load_training_view
+    'user_booking_count': 'int32',
+    'user_approved_count': 'int32',
+    'user_violation_count': 'int32',
+    'user_is_verified': 'bool',
+    'facility_auto_approve': 'bool',
+}
+
+FACILITY_SCHEMA = {
+    'id': 'int32',
+    'status': 'category',
+    'created_at': 'datetime64[ns]',
+    'updated_at': 'datetime64[ns]',
+}
+
+USER_SCHEMA = {
+    'id': 'int32',
+    'role': 'category',
+    'status': 'category',
+    'created_at': 'datetime64[ns]',
+}
+
+
+# Select list of the reservation queries (reservations r joined with facilities f and users u)
+RESERVATION_COLUMNS = """
+                r.id,
+                r.user_id,
+                r.facility_id,
+                r.reservation_date,
+                r.time_slot,
+                r.purpose,
+                r.status,
+                r.expected_attendees,
+                r.is_commercial,
+                r.auto_approved,
+                r.created_at,
+                r.updated_at,
+                f.name AS facility_name,
+                f.capacity AS facility_capacity,
+                f.amenities AS facility_amenities,
+                f.status AS facility_status,
+                u.name AS user_name,
+                u.role AS user_role"""
+
+# Rows changed since a training watermark (see src/incremental_training.py); {0} is the
+# reservations alias
+CHANGED_SINCE_CONDITION = "({0}.updated_at > %s OR ({0}.updated_at = %s AND {0}.id > %s) OR {0}.reservation_date > %s)"
+
+
+def _changed_since_params(changed_since: Dict) -> list:
+    """Parameters of CHANGED_SINCE_CONDITION"""
+    return [changed_since['updated_at'], changed_since['updated_at'], changed_since['id'], changed_since['end_date']]
+
+
+def _apply_schema(df: pd.DataFrame, schema: Dict, columns=None) -> pd.DataFrame:
+    """Convert the columns of df (or the given ones) to their schema dtype where the values fit"""
+    compact = config.DATA_LOADER['compact_dtypes']
+    for col in columns or schema:
+        dtype = schema.get(col)
+        if dtype is None or col not in df.columns:
+            continue
+        values = df[col]
+        if dtype.startswith('datetime64'):
+            df[col] = pd.to_datetime(values, errors='coerce').astype(dtype)
+        elif not compact:
+            continue
+        elif dtype == 'category':
+            df[col] = values.astype('category')
+        elif dtype == 'bool':
+            if pd.api.types.is_numeric_dtype(values) and values.isin([0, 1]).all():
+                df[col] = values.astype(bool)
+        elif pd.api.types.is_integer_dtype(values):
+            limits = np.iinfo(dtype)
+            if values.empty or (values.min() >= limits.min and values.max() <= limits.max):
+                df[col] = values.astype(dtype)
+    return df
+
+
+def _typed_frame(rows: list, columns: list, schema: Dict) -> pd.DataFrame:
+    """DataFrame of one chunk of tuple rows, converted to the schema"""
+    return _apply_schema(pd.DataFrame.from_records(rows, columns=columns), schema)
+
+
+def _concat_chunks(chunks: Iterator[pd.DataFrame], schema: Dict) -> pd.DataFrame:
+    """
+    Concatenate typed chunks into one frame with the dtypes a single read would give
+    
+    Categoricals are concatenated over the union of the chunks' categories. A numeric or
+    bool column whose dtype differs between chunks (say bool in one, float64 with NULLs in
+    another) is concatenated as numpy arrays, which promote to the dtype one frame of all
+    the rows gets (float64 once there is a NULL), and the schema is applied again. Any
+    other mismatched column is inferred again from its concatenated values.
+    """
+    chunks = list(chunks)
+    if len(chunks) == 1:
+        return chunks[0]
+    for col in chunks[0].columns:
+        if all(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks):
+            categories = pd.Index(sorted(set().union(*(chunk[col].cat.categories for chunk in chunks))))
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    df = pd.concat(chunks, ignore_index=True)
+    for col in df.columns:
+        dtypes = [chunk[col].dtype for chunk in chunks]
+        if len({str(dtype) for dtype in dtypes}) > 1:
+            if all(isinstance(dtype, np.dtype) and dtype.kind in 'biuf' for dtype in dtypes):
+                values = np.concatenate([chunk[col].to_numpy() for chunk in chunks])
+            else:
+                values = df[col].to_numpy(dtype=object).tolist()
+            df[col] = pd.Series(values, index=df.index)
+            _apply_schema(df, schema, [col])
+    return df
 
 
 class DataLoader:
     """Load data from MySQL database for ML training"""
     
-    def __init__(self, db_config: Dict = None):
+    def __init__(self, db_config: Dict = None, pool: ConnectionPool = None):
         """
         Initialize data loader with database configuration
         
         Args:
             db_config: Database configuration dictionary
+            pool: Connection pool (default: the process's pool for db_config)
         """
         self.db_config = db_config or config.DB_CONFIG
+        self._pool = pool
         self.connection = None
     
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            self._pool = get_pool(self.db_config)
+        return self._pool
+    
     def connect(self):
-        """Establish database connection"""
+        """Borrow a pooled connection and hold it (as self.connection) until disconnect()"""
+        if self.connection is not None:
+            return
         try:
-            self.connection = pymysql.connect(
-                host=self.db_config['host'],
-                port=self.db_config['port'],
-                user=self.db_config['user'],
-                password=self.db_config['password'],
-                database=self.db_config['database'],
-                charset=self.db_config['charset'],
-                cursorclass=pymysql.cursors.DictCursor
-            )
+            self.connection = self.pool.borrow()
             print(f"Connected to database: {self.db_config['database']}")
         except Exception as e:
             print(f"Error connecting to database: {e}")
             raise
     
     def disconnect(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
-            print("Database connection closed")
+        """Return the held connection to the pool"""
+        if self.connection is not None:
+            self.pool.release(self.connection)
+            self.connection = None
+            print("Database connection returned to the pool")
+    
+    @contextmanager
+    def borrow(self):
+        """The connection held since connect(), or one borrowed from the pool for the with block"""
+        if self.connection is not None:
+            yield self.connection
+        else:
+            with self.pool.connection() as connection:
+                yield connection
+    
+    def _iter_chunks(self, query: str, params: list, schema: Dict, chunk_rows: int = None,
+                     stream: bool = None) -> Iterator[pd.DataFrame]:
+        """
+        Run a query and yield its rows as typed DataFrames of up to chunk_rows rows
+        
+        While a streamed query is being read the connection cannot run another one, so
+        consume (or close) the iterator before the next query.
+        
+        Args:
+            query: SQL with %s placeholders
+            params: Placeholder values
+            schema: dtype per column (unparseable dates become NaT)
+            chunk_rows: Rows per chunk (default: config.DATA_LOADER['chunk_rows'])
+            stream: Read through a server-side cursor (default: config.DATA_LOADER['stream'])
+        """
+        chunk_rows = chunk_rows or config.DATA_LOADER['chunk_rows']
+        stream = config.DATA_LOADER['stream'] if stream is None else stream
+        
+        with self.borrow() as connection:
+            cursor = connection.cursor(pymysql.cursors.SSCursor if stream else pymysql.cursors.Cursor)
+            try:
+                cursor.execute(query, tuple(params) if params else None)
+                columns = [column[0] for column in cursor.description]
+                empty = True
+                while True:
+                    rows = cursor.fetchmany(chunk_rows)
+                    if not rows:
+                        break
+                    empty = False
+                    yield _typed_frame(rows, columns, schema)
+                    del rows
+                if empty:
+                    yield _typed_frame([], columns, schema)
+            finally:
+                cursor.close()
+    
+    def _reservations_query(self, start_date: str = None, end_date: str = None, changed_since: Dict = None):
+        """SQL and parameters of load_reservations"""
+        query = f"""
+            SELECT {RESERVATION_COLUMNS}
+            FROM reservations r
+            JOIN facilities f ON r.facility_id = f.id
+            JOIN users u ON r.user_id = u.id
+            WHERE 1=1
+        """
+        
+        params = []
+        if start_date:
+            query += " AND r.reservation_date >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND r.reservation_date <= %s"
+            params.append(end_date)
+        if changed_since:
+            query += " AND " + CHANGED_SINCE_CONDITION.format('r')
+            params.extend(_changed_since_params(changed_since))
+        
+        query += " ORDER BY r.reservation_date, r.created_at"
+        return query, params
     
-    def load_reservations(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+    def iter_reservations(self, start_date: str = None, end_date: str = None, changed_since: Dict = None,
+                          chunk_rows: int = None, stream: bool = None) -> Iterator[pd.DataFrame]:
+        """
+        Reservation data as typed DataFrame chunks, for processing more rows than fit in memory
+        
+        Each chunk is typed on its own rows, so a column can differ in dtype between chunks
+        (an integer column with NULLs in one chunk stays float64, categoricals have only
+        that chunk's categories); load_reservations() reconciles them.
+        
+        Args:
+            start_date, end_date, changed_since: As for load_reservations
+            chunk_rows: Rows per chunk (default: config.DATA_LOADER['chunk_rows'])
+            stream: Read through a server-side cursor (default: config.DATA_LOADER['stream'])
+        """
+        query, params = self._reservations_query(start_date, end_date, changed_since)
+        return self._iter_chunks(query, params, RESERVATION_SCHEMA, chunk_rows, stream)
+    
+    def load_reservations(self, start_date: str = None, end_date: str = None,
+                          changed_since: Dict = None, chunk_rows: int = None, stream: bool = None) -> pd.DataFrame:
         """
         Load reservation data from database
         
         Args:
             start_date: Start date for filtering (YYYY-MM-DD format)
             end_date: End date for filtering (YYYY-MM-DD format)
+            changed_since: Training watermark ({'updated_at', 'id', 'end_date'}, see
+                src/incremental_training.py); only rows updated after it, or whose
+                reservation date is past its end_date, are loaded
+            chunk_rows: Rows read and typed at a time (default: config.DATA_LOADER['chunk_rows'])
+            stream: Read through a server-side cursor (default: config.DATA_LOADER['stream'])
             
         Returns:
             DataFrame with reservation data
         """
-        if not self.connection:
-            self.connect()
+        try:
+            query, params = self._reservations_query(start_date, end_date, changed_since)
+            df = _concat_chunks(self._iter_chunks(query, params, RESERVATION_SCHEMA, chunk_rows, stream),
+                                RESERVATION_SCHEMA)
+            print(f"Loaded {len(df)} reservations")
+            return df
+        except Exception as e:
+            print(f"Error loading reservations: {e}")
+            raise
+    
+    def load_reservation_context(self, start_date: str = None, end_date: str = None,
+                                 status: str = None) -> pd.DataFrame:
+        """
+        Load the few columns of every reservation in a window that incremental training
+        needs to compute the changed rows' history features and labels
         
+        Args:
+            start_date: Start date for filtering (YYYY-MM-DD format)
+            end_date: End date for filtering (YYYY-MM-DD format)
+            status: Only reservations with this status
+            
+        Returns:
+            DataFrame with id, user_id, facility_id, purpose, status and reservation_date
+        """
         query = """
-            SELECT 
-                r.id,
-                r.user_id,
-                r.facility_id,
-                r.reservation_date,
-                r.time_slot,
-                r.purpose,
-                r.status,
-                r.expected_attendees,
-                r.is_commercial,
-                r.auto_approved,
-                r.created_at,
-                r.updated_at,
-                f.name AS facility_name,
-                f.capacity AS facility_capacity,
-                f.amenities AS facility_amenities,
-                f.status AS facility_status,
-                u.name AS user_name,
-                u.role AS user_role
+            SELECT r.id, r.user_id, r.facility_id, r.purpose, r.status, r.reservation_date
             FROM reservations r
             JOIN facilities f ON r.facility_id = f.id
             JOIN users u ON r.user_id = u.id
@@ -93,42 +342,117 @@ class DataLoader:
         if end_date:
             query += " AND r.reservation_date <= %s"
             params.append(end_date)
-        
-        query += " ORDER BY r.reservation_date, r.created_at"
+        if status:
+            query += " AND r.status = %s"
+            params.append(status)
         
         try:
-            # Use cursor to get data and convert dates properly
-            # Connection was created with DictCursor, so fetchall returns dicts
-            cursor = self.connection.cursor()
-            cursor.execute(query, tuple(params) if params else None)
-            rows = cursor.fetchall()
-            
-            # Convert to list of dicts and handle dates
-            import datetime as dt
-            data = []
-            for row in rows:
-                # row is already a dict because of DictCursor
-                row_dict = dict(row)
-                # Convert datetime.date objects to strings for pandas
-                if 'reservation_date' in row_dict and isinstance(row_dict['reservation_date'], dt.date):
-                    row_dict['reservation_date'] = row_dict['reservation_date'].isoformat()
-                data.append(row_dict)
-            
-            df = pd.DataFrame(data)
-            
-            # Convert date strings to datetime
-            if 'reservation_date' in df.columns:
-                df['reservation_date'] = pd.to_datetime(df['reservation_date'], format='%Y-%m-%d', errors='coerce')
-            if 'created_at' in df.columns:
-                df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-            if 'updated_at' in df.columns:
-                df['updated_at'] = pd.to_datetime(df['updated_at'], errors='coerce')
+            df = _concat_chunks(self._iter_chunks(query, params, RESERVATION_SCHEMA), RESERVATION_SCHEMA)
+            print(f"Loaded {len(df)} reservations for context")
+            return df
+        except Exception as e:
+            print(f"Error loading reservation context: {e}")
+            raise
+    
+    def table_columns(self, *tables: str) -> Dict[str, set]:
+        """
+        Columns of the given tables in the current database
+        
+        Returns:
+            {table: set of column names}; tables that do not exist are left out
+        """
+        placeholders = ', '.join(['%s'] * len(tables))
+        with self.borrow() as connection, connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+            """, tables)
+            columns = {}
+            for row in cursor.fetchall():
+                columns.setdefault(row['table_name'], set()).add(row['column_name'])
+            return columns
+    
+    def load_training_view(self, start_date: str = None, end_date: str = None, changed_since: Dict = None,
+                           violation_days: int = 365, chunk_rows: int = None, stream: bool = None) -> pd.DataFrame:
+        """
+        Load reservations together with the user and facility attributes the training
+        scripts use, computed by the database in one query
+        
+        Besides the load_reservations() columns, every row has:
+        - user_booking_count, user_approved_count: the user's reservations (all, approved)
+          in the window, as window functions (COUNT(...) OVER (PARTITION BY user_id))
+        - user_violation_count: the user's high and critical violations of the last
+          violation_days days (0 without a user_violations table)
+        - user_is_verified: users.is_verified (1 when the column does not exist)
+        - facility_auto_approve, facility_capacity_threshold, facility_max_duration_hours
+        
+        The counts are over the whole window, also when changed_since limits the rows
+        returned.
+        
+        Args:
+            start_date: Start date for filtering (YYYY-MM-DD format)
+            end_date: End date for filtering (YYYY-MM-DD format)
+            changed_since: Training watermark; only rows changed since it are returned
+            violation_days: Days of violations counted
+            chunk_rows: Rows read and typed at a time (default: config.DATA_LOADER['chunk_rows'])
+            stream: Read through a server-side cursor (default: config.DATA_LOADER['stream'])
             
-            cursor.close()
-            print(f"Loaded {len(df)} reservations")
+        Returns:
+            DataFrame with one row per reservation
+        """
+        columns = self.table_columns('users', 'user_violations')
+        verified = 'u.is_verified' if 'is_verified' in columns.get('users', ()) else '1'
+        params = []
+        violations_join = ''
+        violation_count = '0'
+        if 'user_violations' in columns:
+            violations_join = """
+                LEFT JOIN (
+                    SELECT user_id, COUNT(*) AS violation_count
+                    FROM user_violations
+                    WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+                      AND severity IN ('high', 'critical')
+                    GROUP BY user_id
+                ) v ON v.user_id = r.user_id"""
+            violation_count = 'COALESCE(v.violation_count, 0)'
+            params.append(violation_days)
+        
+        # The counts are computed over the window in the inner query; the outer query
+        # only picks the changed rows
+        query = f"""
+            SELECT w.* FROM (
+                SELECT {RESERVATION_COLUMNS},
+                COUNT(*) OVER (PARTITION BY r.user_id) AS user_booking_count,
+                COUNT(CASE WHEN r.status = 'approved' THEN 1 END) OVER (PARTITION BY r.user_id) AS user_approved_count,
+                {violation_count} AS user_violation_count,
+                {verified} AS user_is_verified,
+                f.auto_approve AS facility_auto_approve,
+                f.capacity_threshold AS facility_capacity_threshold,
+                f.max_duration_hours AS facility_max_duration_hours
+                FROM reservations r
+                JOIN facilities f ON r.facility_id = f.id
+                JOIN users u ON r.user_id = u.id{violations_join}
+                WHERE 1=1"""
+        if start_date:
+            query += " AND r.reservation_date >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND r.reservation_date <= %s"
+            params.append(end_date)
+        query += "\n            ) w\n            WHERE 1=1"
+        if changed_since:
+            query += " AND " + CHANGED_SINCE_CONDITION.format('w')
+            params.extend(_changed_since_params(changed_since))
+        query += " ORDER BY w.reservation_date, w.created_at"
+        
+        try:
+            df = _concat_chunks(self._iter_chunks(query, params, RESERVATION_SCHEMA, chunk_rows, stream),
+                                RESERVATION_SCHEMA)
+            print(f"Loaded {len(df)} reservations with user and facility attributes")
             return df
         except Exception as e:
-            print(f"Error loading reservations: {e}")
+            print(f"Error loading training view: {e}")
             raise
     
     def load_facilities(self) -> pd.DataFrame:
@@ -138,9 +462,6 @@ class DataLoader:
         Returns:
             DataFrame with facility data
         """
-        if not self.connection:
-            self.connect()
-        
         query = """
             SELECT 
                 id,
@@ -163,14 +484,13 @@ class DataLoader:
         
         try:
             # Use cursor directly - DictCursor returns dictionaries
-            cursor = self.connection.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            cursor.close()
+            with self.borrow() as connection, connection.cursor() as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
             
             # Rows are already dictionaries (DictCursor)
             data = [row for row in rows]
-            df = pd.DataFrame(data)
+            df = _apply_schema(pd.DataFrame(data), FACILITY_SCHEMA)
             
             print(f"Loaded {len(df)} facilities")
             return df
@@ -185,9 +505,6 @@ class DataLoader:
         Returns:
             DataFrame with user data
         """
-        if not self.connection:
-            self.connect()
-        
         query = """
             SELECT 
                 id,
@@ -204,7 +521,8 @@ class DataLoader:
         """
         
         try:
-            df = pd.read_sql(query, self.connection)
+            with self.borrow() as connection:
+                df = _apply_schema(pd.read_sql(query, connection), USER_SCHEMA)
             print(f"Loaded {len(df)} users")
             return df
         except Exception as e:
@@ -221,9 +539,6 @@ class DataLoader:
         Returns:
             DataFrame with conflict information
         """
-        if not self.connection:
-            self.connect()
-        
         start_date = (datetime.now() - timedelta(days=lookback_months * 30)).strftime('%Y-%m-%d')
         
         # This query finds overlapping reservations (conflicts)
@@ -254,7 +569,8 @@ class DataLoader:
         """
         
         try:
-            df = pd.read_sql(query, self.connection, params=[start_date])
+            with self.borrow() as connection:
+                df = pd.read_sql(query, connection, params=[start_date])
             print(f"Loaded {len(df)} potential conflicts")
             return df
         except Exception as e:
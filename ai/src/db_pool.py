@@ -0,0 +1,229 @@
+"""
+Bounded MySQL connection pool behind DataLoader
+Scripts and long-lived processes (the model server, anything that needs live features)
+borrow connections instead of opening one per request, so a query does not pay a TCP
+handshake and authentication each time.
+
+- At most max_size connections are open; a borrower waits up to timeout seconds for a
+  free one and then gets PoolTimeoutError.
+- A connection idle for health_check_after seconds is pinged before it is handed out;
+  one that fails the ping, or is older than max_lifetime, is closed and replaced.
+- Returned connections are rolled back, so no transaction (or its snapshot) is carried
+  over to the next borrower; a connection returned after an error is closed.
+- get_pool() keeps one pool per database configuration and process. A forked child gets
+  a new pool and leaves the parent's sockets alone.
+
+Usage:
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM reservations WHERE user_id = %s", (user_id,))
+"""
+
+import os
+import sys
+import time
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+import pymysql
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+class PoolTimeoutError(RuntimeError):
+    """No connection became free within the pool's timeout"""
+
+
+class _Pooled:
+    """A pooled connection with its creation and last-use times"""
+
+    __slots__ = ('connection', 'created', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections (DictCursor, like DataLoader always used)"""
+
+    def __init__(self, db_config: Dict = None, max_size: int = None, max_lifetime: float = None,
+                 health_check_after: float = None, timeout: float = None):
+        """
+        Args:
+            db_config: Database configuration dictionary (default: config.DB_CONFIG)
+            max_size, max_lifetime, health_check_after, timeout: Default: config.DB_POOL
+        """
+        settings = config.DB_POOL
+        self.db_config = db_config or config.DB_CONFIG
+        self.max_size = max_size or settings['max_size']
+        self.max_lifetime = settings['max_lifetime'] if max_lifetime is None else max_lifetime
+        self.health_check_after = settings['health_check_after'] if health_check_after is None else health_check_after
+        self.timeout = settings['timeout'] if timeout is None else timeout
+
+        self._idle = deque()  # most recently returned last
+        self._borrowed = {}  # id(connection) -> _Pooled
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0  # Connections opened over the pool's life
+        self.replaced = 0  # Connections closed for age, a failed ping or an error
+
+    def _open(self):
+        connection = pymysql.connect(
+            host=self.db_config['host'],
+            port=self.db_config['port'],
+            user=self.db_config['user'],
+            password=self.db_config['password'],
+            database=self.db_config['database'],
+            charset=self.db_config['charset'],
+            cursorclass=pymysql.cursors.DictCursor
+        )
+        with self._lock:
+            self.created += 1
+        return _Pooled(connection)
+
+    def _usable(self, pooled: _Pooled):
+        """Whether an idle connection can be handed out (pinging it if it sat idle)"""
+        now = time.monotonic()
+        if self.max_lifetime and now - pooled.created > self.max_lifetime:
+            return False
+        if now - pooled.last_used > self.health_check_after:
+            try:
+                pooled.connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, pooled: _Pooled):
+        with self._lock:
+            self.replaced += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass  # Already broken
+
+    def borrow(self, timeout: float = None):
+        """
+        Take a connection from the pool (open a new one if none is idle)
+
+        Give it back with release(); connection() does both.
+
+        Raises:
+            PoolTimeoutError: All max_size connections stayed in use for timeout seconds
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeoutError(f"No database connection free within {timeout}s (pool size {self.max_size})")
+        try:
+            while True:
+                with self._lock:
+                    pooled = self._idle.pop() if self._idle else None
+                if pooled is None:
+                    pooled = self._open()
+                    break
+                if self._usable(pooled):
+                    break
+                self._discard(pooled)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._borrowed[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def release(self, connection, broken: bool = False):
+        """
+        Give a borrowed connection back
+
+        Args:
+            connection: A connection from borrow()
+            broken: Close it instead of keeping it (after an error, the connection state
+                is unknown)
+        """
+        with self._lock:
+            pooled = self._borrowed.pop(id(connection), None)
+        if pooled is None:
+            return  # Not ours, or released twice
+        try:
+            if not broken:
+                try:
+                    connection.rollback()  # End the transaction and its read snapshot
+                except Exception:
+                    broken = True
+            too_old = self.max_lifetime and time.monotonic() - pooled.created > self.max_lifetime
+            if broken or too_old or self._closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Borrow a connection for the with block"""
+        connection = self.borrow(timeout)
+        broken = False
+        try:
+            yield connection
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(connection, broken)
+
+    def close(self):
+        """Close the idle connections; borrowed ones are closed when they come back"""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            try:
+                pooled.connection.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Pool size, idle and borrowed counts, and how many connections were opened and replaced"""
+        with self._lock:
+            return {'max_size': self.max_size, 'idle': len(self._idle), 'borrowed': len(self._borrowed),
+                    'created': self.created, 'replaced': self.replaced}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: Dict = None):
+    """The process's pool for db_config (default: config.DB_CONFIG)"""
+    db_config = db_config or config.DB_CONFIG
+    key = (os.getpid(),) + tuple(sorted((name, str(value)) for name, value in db_config.items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                # Pools inherited from a parent process share its sockets; drop them unclosed
+                for other in [other for other in _pools if other[0] != os.getpid()]:
+                    del _pools[other]
+                pool = _pools[key] = ConnectionPool(db_config)
+    return pool
+
+
+@atexit.register
+def close_pools():
+    """Close every pool of this process"""
+    for key, pool in list(_pools.items()):
+        if key[0] == os.getpid():
+            pool.close()
@@ -5,9 +5,7 @@ Loads trained model and provides recommendations for new queries
 
 import sys
 from pathlib import Path
-import pandas as pd
 import numpy as np
-import joblib
 from datetime import datetime
 import re
 
@@ -15,11 +13,17 @@ import re
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import config
+from src.utils import is_missing, parse_date
+from src.calendar_features import date_features
+from src.time_slots import parse_time_slot
+from src.model_store import load_artifact
+from src.forest_arrays import fresh_arrays_path, load_model_arrays
+from src.model_manager import load_once, get_model
 
 
 def extract_capacity_number(capacity_str):
     """Extract numeric capacity from string"""
-    if pd.isna(capacity_str):
+    if is_missing(capacity_str):
         return 100
     if isinstance(capacity_str, (int, float)):
         return int(capacity_str)
@@ -27,36 +31,9 @@ def extract_capacity_number(capacity_str):
     return int(match.group(1)) if match else 100
 
 
-def extract_time_features(time_slot: str):
-    """Extract start hour, end hour, and duration from time slot string"""
-    if ' - ' in time_slot:
-        try:
-            start_time_str, end_time_str = time_slot.split(' - ')
-            start_hour = int(start_time_str.split(':')[0])
-            end_hour = int(end_time_str.split(':')[0])
-        except:
-            start_hour = 8
-            end_hour = 17
-    elif 'Morning' in time_slot:
-        start_hour = 8
-        end_hour = 12
-    elif 'Afternoon' in time_slot:
-        start_hour = 13
-        end_hour = 17
-    elif 'Evening' in time_slot:
-        start_hour = 18
-        end_hour = 22
-    else:
-        start_hour = 8
-        end_hour = 17
-    
-    duration_hours = end_hour - start_hour
-    return {'start_hour': start_hour, 'end_hour': end_hour, 'duration_hours': duration_hours}
-
-
 def extract_purpose_keywords(purpose: str):
     """Extract common keywords from purpose text"""
-    if pd.isna(purpose) or not purpose:
+    if is_missing(purpose) or not purpose:
         return {}
     
     purpose_lower = str(purpose).lower()
@@ -80,7 +57,7 @@ def calculate_text_match_score(purpose: str, facility_text: str):
     Calculate text similarity score between purpose and facility text
     Uses keyword overlap and semantic matching
     """
-    if pd.isna(purpose) or pd.isna(facility_text) or not purpose or not facility_text:
+    if is_missing(purpose) or is_missing(facility_text) or not purpose or not facility_text:
         return 0.0
     
     purpose_lower = str(purpose).lower()
@@ -111,7 +88,7 @@ def extract_operating_hours_features(operating_hours: str, time_slot: str):
     Extract operating hours features and check if time slot fits
     Returns: dict with hours features and match score
     """
-    if pd.isna(operating_hours) or not operating_hours:
+    if is_missing(operating_hours) or not operating_hours:
         return {
             'opens_early': 0,
             'opens_late': 0,
@@ -124,17 +101,8 @@ def extract_operating_hours_features(operating_hours: str, time_slot: str):
     opens_late = 1 if any(x in hours_lower for x in ['20:', '21:', '22:']) else 0
     
     # Parse time slot
-    try:
-        if ' - ' in time_slot:
-            start_time_str, end_time_str = time_slot.split(' - ')
-            start_hour = int(start_time_str.split(':')[0])
-            end_hour = int(end_time_str.split(':')[0])
-        else:
-            start_hour = 8
-            end_hour = 17
-    except:
-        start_hour = 8
-        end_hour = 17
+    slot = parse_time_slot(time_slot)
+    start_hour, end_hour = slot.start_hour, slot.end_hour
     
     # Check if time slot fits within operating hours
     # This is a simplified check - real implementation would parse actual hours
@@ -157,18 +125,38 @@ def extract_operating_hours_features(operating_hours: str, time_slot: str):
     }
 
 
-def is_holiday(date_input):
-    """Check if date is a holiday"""
-    if isinstance(date_input, pd.Timestamp):
-        date_str = date_input.strftime('%Y-%m-%d')
-    elif isinstance(date_input, str):
-        date_str = date_input
-    else:
-        return 0
+# Feature order used at training time
+EXPECTED_FEATURES = [
+    'capacity', 'amenities_count', 'description_match_score', 'hours_match_score',
+    'opens_early', 'opens_late', 'start_hour', 'end_hour', 'duration_hours',
+    'day_of_week', 'month', 'is_weekend', 'is_holiday', 'expected_attendees',
+    'capacity_ratio', 'is_commercial', 'user_booking_count',
+    'meeting', 'celebration', 'sports', 'education', 'religious',
+    'community', 'feeding', 'commercial',
+    'user_id_encoded', 'facility_id_encoded'
+]
+
+
+def top_k_indices(scores, k: int):
+    """
+    Indices of the k highest scores, highest first, ties in input order
+
+    Same order as a stable descending sort truncated to k, but only the
+    selected candidates are sorted (argpartition instead of a full sort).
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    if k <= 0 or k >= n:
+        # Mirror list.sort(reverse=True)[:k] exactly, including its slicing edge cases
+        order = sorted(range(n), key=lambda i: scores[i], reverse=True)
+        return order[:k]
     
-    month_day = '-'.join(date_str.split('-')[1:3])
-    all_holidays = config.PHILIPPINE_HOLIDAYS + config.BARANGAY_CULIAT_EVENTS
-    return 1 if month_day in all_holidays else 0
+    # k-th largest score; everything above it is in, ties are filled in input order
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.lexsort((selected, -scores[selected]))].tolist()
 
 
 class FacilityRecommendationModel:
@@ -177,25 +165,86 @@ class FacilityRecommendationModel:
     def __init__(self):
         self.model = None
         self.encoders = None
+        self.encoder_index = {}
+        self.feature_columns = EXPECTED_FEATURES
         self.loaded = False
+        self.load_error = None  # Why the last load_model() failed, for the health report
     
+    @load_once('loaded', 'facility_recommendation_model.pkl', 'facility_recommendation_encoders.pkl')
     def load_model(self):
         """Load trained model and encoders"""
         try:
             model_path = config.MODELS_DIR / 'facility_recommendation_model.pkl'
             encoders_path = config.MODELS_DIR / 'facility_recommendation_encoders.pkl'
             
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model file not found: {model_path}")
-            
-            self.model = joblib.load(model_path)
-            self.encoders = joblib.load(encoders_path)
+            # Prefer the pickle-free export (scripts/export_model_arrays.py): no sklearn import,
+            # memory-mapped arrays, and no per-call input validation
+            arrays_path = fresh_arrays_path(model_path)
+            if arrays_path is not None:
+                bundle = load_model_arrays(arrays_path)
+                self.model = bundle['model']
+                self.feature_columns = bundle['model'].feature_names or EXPECTED_FEATURES
+                encoder_classes = bundle['encoders'] or {}
+            else:
+                if not model_path.exists():
+                    raise FileNotFoundError(f"Model file not found: {model_path}")
+                
+                self.model = load_artifact(model_path)
+                self.encoders = load_artifact(encoders_path)
+                # Rows are built in the training column order, so sklearn's per-call DataFrame
+                # feature-name check is redundant; drop it and predict on plain arrays
+                self.feature_columns = list(getattr(self.model, 'feature_names_in_', EXPECTED_FEATURES))
+                if hasattr(self.model, 'feature_names_in_'):
+                    del self.model.feature_names_in_
+                encoder_classes = {col: encoder.classes_ for col, encoder in self.encoders.items()}
+            # class label -> encoded value, so lookups are a dict hit instead of an array scan + transform
+            self.encoder_index = {
+                col: {label: code for code, label in enumerate(classes.tolist())}
+                for col, classes in encoder_classes.items()
+            }
             self.loaded = True
+            self.load_error = None
             return True
         except Exception as e:
+            self.load_error = str(e)
             print(f"Error loading model: {e}", file=sys.stderr)
             return False
     
+    def _encode(self, col: str, value):
+        """Encode a categorical value, 0 when the column or label was not seen in training"""
+        return self.encoder_index.get(col, {}).get(str(value), 0)
+    
+    def _feature_vector(self, features: dict, user_booking_count: int = 0):
+        """Build one feature row in training column order"""
+        feature_dict = {
+            'capacity': features.get('capacity', 100),
+            'amenities_count': features.get('amenities_count', 0),
+            'description_match_score': features.get('description_match_score', 0.0),
+            'hours_match_score': features.get('hours_match_score', 0.5),
+            'opens_early': features.get('opens_early', 0),
+            'opens_late': features.get('opens_late', 0),
+            'start_hour': features.get('start_hour', 12),
+            'end_hour': features.get('end_hour', 17),
+            'duration_hours': features.get('duration_hours', 4),
+            'day_of_week': features.get('day_of_week', 0),
+            'month': features.get('month', 1),
+            'is_weekend': features.get('is_weekend', 0),
+            'is_holiday': features.get('is_holiday', 0),
+            'expected_attendees': features.get('expected_attendees', 50),
+            'capacity_ratio': features.get('capacity_ratio', 0.5),
+            'is_commercial': features.get('is_commercial', 0),
+            'user_booking_count': user_booking_count,
+        }
+        
+        # Add purpose keywords
+        feature_dict.update(features.get('purpose_keywords', {}))
+        
+        # Encode categorical features
+        feature_dict['user_id_encoded'] = self._encode('user_id', features.get('user_id', 0))
+        feature_dict['facility_id_encoded'] = self._encode('facility_id', features.get('facility_id', 0))
+        
+        return [feature_dict.get(col, 0) for col in self.feature_columns]
+    
     def predict_relevance(self, features: dict, user_booking_count: int = 0):
         """
         Predict relevance score for a facility-user-purpose combination
@@ -207,91 +256,36 @@ class FacilityRecommendationModel:
         Returns:
             Relevance score (0-5)
         """
+        return self.predict_relevance_batch([features], user_booking_count)[0]
+    
+    def predict_relevance_batch(self, features_list: list, user_booking_count: int = 0):
+        """
+        Predict relevance scores for many facility-user-purpose combinations in one model call
+        
+        Args:
+            features_list: List of feature dictionaries (same keys as predict_relevance)
+            user_booking_count: Number of times user has booked facilities
+        
+        Returns:
+            List of relevance scores (0-5) in input order
+        """
+        if not features_list:
+            return []
+        
         if not self.loaded:
             if not self.load_model():
-                return 0.0
+                return [0.0] * len(features_list)
         
         try:
-            # Prepare feature vector
-            feature_dict = {
-                'user_id': features.get('user_id', 0),
-                'facility_id': features.get('facility_id', 0),
-                'capacity': features.get('capacity', 100),
-                'amenities_count': features.get('amenities_count', 0),
-                'description_match_score': features.get('description_match_score', 0.0),
-                'hours_match_score': features.get('hours_match_score', 0.5),
-                'opens_early': features.get('opens_early', 0),
-                'opens_late': features.get('opens_late', 0),
-                'start_hour': features.get('start_hour', 12),
-                'end_hour': features.get('end_hour', 17),
-                'duration_hours': features.get('duration_hours', 4),
-                'day_of_week': features.get('day_of_week', 0),
-                'month': features.get('month', 1),
-                'is_weekend': features.get('is_weekend', 0),
-                'is_holiday': features.get('is_holiday', 0),
-                'expected_attendees': features.get('expected_attendees', 50),
-                'capacity_ratio': features.get('capacity_ratio', 0.5),
-                'is_commercial': features.get('is_commercial', 0),
-                'user_booking_count': user_booking_count,
-            }
-            
-            # Add purpose keywords
-            purpose_keywords = features.get('purpose_keywords', {})
-            feature_dict.update(purpose_keywords)
-            
-            # Encode categorical features
-            if 'user_id' in self.encoders:
-                user_id_str = str(feature_dict['user_id'])
-                if user_id_str in self.encoders['user_id'].classes_:
-                    feature_dict['user_id_encoded'] = self.encoders['user_id'].transform([user_id_str])[0]
-                else:
-                    feature_dict['user_id_encoded'] = 0
-            else:
-                feature_dict['user_id_encoded'] = 0
-            
-            if 'facility_id' in self.encoders:
-                facility_id_str = str(feature_dict['facility_id'])
-                if facility_id_str in self.encoders['facility_id'].classes_:
-                    feature_dict['facility_id_encoded'] = self.encoders['facility_id'].transform([facility_id_str])[0]
-                else:
-                    feature_dict['facility_id_encoded'] = 0
-            else:
-                feature_dict['facility_id_encoded'] = 0
-            
-            # Remove original categorical columns
-            feature_dict.pop('user_id', None)
-            feature_dict.pop('facility_id', None)
-            
-            # Convert to DataFrame
-            feature_df = pd.DataFrame([feature_dict])
-            
-            # Ensure all columns from training are present
-            # (This should match the training feature order)
-            expected_features = [
-                'capacity', 'amenities_count', 'description_match_score', 'hours_match_score',
-                'opens_early', 'opens_late', 'start_hour', 'end_hour', 'duration_hours',
-                'day_of_week', 'month', 'is_weekend', 'is_holiday', 'expected_attendees',
-                'capacity_ratio', 'is_commercial', 'user_booking_count',
-                'meeting', 'celebration', 'sports', 'education', 'religious',
-                'community', 'feeding', 'commercial',
-                'user_id_encoded', 'facility_id_encoded'
-            ]
-            
-            # Add missing columns with default values
-            for col in expected_features:
-                if col not in feature_df.columns:
-                    feature_df[col] = 0
-            
-            # Reorder columns to match training
-            feature_df = feature_df[expected_features]
-            
-            # Predict
-            score = self.model.predict(feature_df)[0]
-            return float(score)
+            X = np.array(
+                [self._feature_vector(features, user_booking_count) for features in features_list],
+                dtype=np.float64
+            )
+            return [float(score) for score in self.model.predict(X)]
         
         except Exception as e:
             print(f"Error predicting relevance: {e}", file=sys.stderr)
-            return 0.0
+            return [0.0] * len(features_list)
     
     def recommend_facilities(self, facilities: list, user_id: int, purpose: str,
                            expected_attendees: int, time_slot: str, reservation_date: str,
@@ -321,29 +315,29 @@ class FacilityRecommendationModel:
                     reservation_date, is_commercial, user_booking_count, limit
                 )
         
-        # Parse reservation date
+        # Request features are shared by every candidate facility, so compute them once
         try:
-            res_date = pd.to_datetime(reservation_date)
-            day_of_week = res_date.dayofweek
-            month = res_date.month
-            is_weekend = 1 if day_of_week >= 5 else 0
-            holiday = is_holiday(res_date)
+            calendar = date_features(parse_date(reservation_date))
         except:
-            day_of_week = 0
-            month = 1
-            is_weekend = 0
-            holiday = 0
+            calendar = date_features(None)
         
-        # Extract time features
-        time_feat = extract_time_features(time_slot)
-        
-        # Extract purpose keywords
+        slot = parse_time_slot(time_slot)
         purpose_keywords = extract_purpose_keywords(purpose)
         
-        recommendations = []
+        request_features = {
+            'user_id': user_id,
+            'start_hour': slot.start_hour,
+            'end_hour': slot.end_hour,
+            'duration_hours': slot.duration_hours,
+            **calendar,
+            'expected_attendees': expected_attendees,
+            'is_commercial': 1 if is_commercial else 0,
+            'purpose_keywords': purpose_keywords,
+        }
         
+        # Facility features, one row per candidate
+        features_list = []
         for facility in facilities:
-            # Prepare features
             capacity = extract_capacity_number(facility.get('capacity', 100))
             amenities = facility.get('amenities', '')
             description = facility.get('description', '')
@@ -358,8 +352,8 @@ class FacilityRecommendationModel:
             operating_hours = facility.get('operating_hours', '')
             hours_features = extract_operating_hours_features(operating_hours, time_slot)
             
-            features = {
-                'user_id': user_id,
+            features_list.append({
+                **request_features,
                 'facility_id': facility.get('id', 0),
                 'capacity': capacity,
                 'amenities_count': amenities_count,
@@ -367,34 +361,16 @@ class FacilityRecommendationModel:
                 'hours_match_score': hours_features['hours_match_score'],
                 'opens_early': hours_features['opens_early'],
                 'opens_late': hours_features['opens_late'],
-                'start_hour': time_feat['start_hour'],
-                'end_hour': time_feat['end_hour'],
-                'duration_hours': time_feat['duration_hours'],
-                'day_of_week': day_of_week,
-                'month': month,
-                'is_weekend': is_weekend,
-                'is_holiday': holiday,
-                'expected_attendees': expected_attendees,
                 'capacity_ratio': capacity_ratio,
-                'is_commercial': 1 if is_commercial else 0,
-                'purpose_keywords': purpose_keywords,
-            }
-            
-            # Get ML relevance score
-            ml_score = self.predict_relevance(features, user_booking_count)
-            
-            # Combine with facility info
-            recommendation = {
-                **facility,
-                'ml_relevance_score': ml_score,
-            }
-            
-            recommendations.append(recommendation)
+            })
         
-        # Sort by ML relevance score (descending)
-        recommendations.sort(key=lambda x: x.get('ml_relevance_score', 0), reverse=True)
+        # Score every candidate in a single model call, then keep only the top `limit`
+        scores = self.predict_relevance_batch(features_list, user_booking_count)
         
-        return recommendations[:limit]
+        return [
+            {**facilities[i], 'ml_relevance_score': scores[i]}
+            for i in top_k_indices(scores, limit)
+        ]
 
     def _recommend_heuristic(
         self,
@@ -414,10 +390,8 @@ class FacilityRecommendationModel:
         """
         purpose_lower = (purpose or '').lower()
         purpose_keywords = extract_purpose_keywords(purpose)
-        time_feat = extract_time_features(time_slot)
         try:
-            res_date = pd.to_datetime(reservation_date)
-            holiday = is_holiday(res_date)
+            holiday = date_features(parse_date(reservation_date))['is_holiday']
         except Exception:
             holiday = 0
 
@@ -507,13 +481,6 @@ class FacilityRecommendationModel:
         return ranked[:limit]
 
 
-# Global model instance
-_model_instance = None
-
-
 def get_recommendation_model():
-    """Get or create global model instance"""
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = FacilityRecommendationModel()
-    return _model_instance
+    """Get the current global model instance (see src/model_manager.py; replaced when the artifacts change)"""
+    return get_model('facility_recommendation')
@@ -0,0 +1,67 @@
+"""
+Column helpers for the training feature builders
+The training scripts build their feature matrices a column at a time instead of one dict
+per reservation. These helpers reproduce what the per-row code produced (Python
+truthiness, defaults for missing values, the dtype pandas infers for a column of Python
+values) so the columnar matrices stay identical to the row-by-row ones.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def truthy(column: pd.Series):
+    """1/0 per value by Python truthiness, as `1 if value else 0` (NaN counts as true)"""
+    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+        return (column.to_numpy() != 0).astype(np.int64)
+    return np.fromiter((1 if value else 0 for value in column.tolist()), dtype=np.int64, count=len(column))
+
+
+def settle(values: np.ndarray):
+    """Object arrays get the dtype a column of those Python values would get in a DataFrame"""
+    if values.dtype == object:
+        return pd.Series(values).infer_objects().to_numpy()
+    return values
+
+
+def positions(keys: list, values):
+    """
+    Position of each value in keys (-1 when absent), like a left join on a dimension table
+
+    NaN keys never match, as with dict lookups.
+    """
+    keys = [key for key in keys if not pd.isna(key)]
+    return pd.Index(keys).get_indexer(values)
+
+
+def lookup(values: list, rows: np.ndarray):
+    """
+    values[position] for every row (position -1 is the last value, the default), typed as
+    a column of those values would be
+
+    The dtype is settled on the distinct values the rows use (a column's dtype depends on
+    which values it holds, not on how often), so the per-row array is never an object array
+    unless the values themselves need one.
+    """
+    used = np.unique(rows)
+    typed = settle(np.array(values, dtype=object)[used])
+    table = np.empty(len(values), dtype=typed.dtype)
+    table[used] = typed
+    return table[rows]
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray, fallback: float):
+    """numerator / denominator where the denominator is positive, fallback elsewhere"""
+    positive = denominator > 0
+    result = np.full(len(numerator), fallback, dtype=np.result_type(numerator, denominator, np.float64))
+    result[positive] = numerator[positive] / denominator[positive]
+    return result
+
+
+def filled(rows: pd.DataFrame, column: str, default):
+    """A column with missing values (or the whole column, if absent) replaced by default"""
+    if column not in rows.columns:
+        return np.full(len(rows), default)
+    values = rows[column]
+    raw = values.to_numpy() if pd.api.types.is_numeric_dtype(values) else values.to_numpy(dtype=object)
+    return settle(np.where(values.notna().to_numpy(), raw, default))
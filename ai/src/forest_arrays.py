@@ -0,0 +1,414 @@
+"""
+Array-backed RandomForest evaluator and pickle-free model format
+Flattens a trained sklearn forest into contiguous numpy arrays (feature, threshold,
+children, leaf values), stores them with the model's encoders or vectorizer in an
+uncompressed .npz next to the pickle, and evaluates them with plain numpy
+
+Loading needs neither sklearn nor joblib nor pickle, and the arrays are memory-mapped
+straight out of the .npz, so concurrent workers share them. Predictions and
+probabilities are identical to sklearn's: inputs are cast to float32 and compared with
+`<=` against the float64 thresholds like sklearn's tree code, and per-tree leaf values
+are summed in estimator order before dividing by the number of trees.
+"""
+
+import os
+import sys
+import json
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.model_store import atomic_write
+
+
+FORMAT_VERSION = 1
+
+# Rows evaluated at once; bounds the (rows, trees, outputs) leaf value buffer
+_CHUNK_ROWS = 4096
+
+
+def _sklearn_stores_counts():
+    """True if the installed scikit-learn keeps class counts, not fractions, in tree_.value (< 1.4)"""
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+
+def arrays_path_for(model_path):
+    """The .npz path that belongs to a model pickle"""
+    return Path(model_path).with_suffix('.npz')
+
+
+def fresh_arrays_path(model_path):
+    """
+    The exported .npz for a model pickle, if there is one that is not older than the pickle
+
+    A pickle retrained after the last export wins, so a stale export is never served.
+
+    Returns:
+        Path or None
+    """
+    model_path = Path(model_path)
+    arrays_path = arrays_path_for(model_path)
+    if not arrays_path.exists():
+        return None
+    if model_path.exists() and model_path.stat().st_mtime > arrays_path.stat().st_mtime:
+        return None
+    return arrays_path
+
+
+def save_arrays(path, arrays: dict, metadata: dict):
+    """
+    Write arrays plus JSON metadata to an uncompressed .npz (atomically)
+
+    Object arrays are rejected, so the file never needs pickle to load.
+    """
+    for name, array in arrays.items():
+        if np.asarray(array).dtype.hasobject:
+            raise ValueError(f"Array {name} has dtype object and would need pickle")
+
+    payload = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    payload['__meta__'] = np.array(json.dumps(dict(metadata, format_version=FORMAT_VERSION)))
+
+    def write(tmp_path):
+        # A file object, because np.savez appends .npz to path names
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **payload)
+
+    return atomic_write(path, write)
+
+
+def _map_member(path, f, info):
+    """Memory-map one stored (uncompressed) .npy member of an .npz"""
+    # Local file header: 30 fixed bytes, then the file name and extra field
+    f.seek(info.header_offset)
+    header = f.read(30)
+    name_length = int.from_bytes(header[26:28], 'little')
+    extra_length = int.from_bytes(header[28:30], 'little')
+    data_start = info.header_offset + 30 + name_length + extra_length
+    f.seek(data_start)
+
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if dtype.hasobject:
+        raise ValueError(f"{info.filename} needs pickle")
+
+    count = int(np.prod(shape)) if shape else 1
+    if count == 0 or not shape:
+        # Nothing worth mapping (and mmap cannot map zero bytes)
+        f.seek(data_start)
+        return np.lib.format.read_array(f, allow_pickle=False)
+    mapped = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                       order='F' if fortran_order else 'C')
+    # Plain ndarray view of the mapping: indexing np.memmap objects is several times slower
+    return mapped.view(np.ndarray)
+
+
+def load_arrays(path, mmap: bool = True):
+    """
+    Load an .npz written by save_arrays
+
+    Args:
+        path: .npz path
+        mmap: Map the arrays read-only instead of reading them into private memory
+
+    Returns:
+        Tuple of (dict of arrays, metadata dict)
+    """
+    path = str(path)
+    arrays = {}
+    with zipfile.ZipFile(path) as archive:
+        members = archive.infolist()
+        can_map = mmap and all(info.compress_type == zipfile.ZIP_STORED for info in members)
+        if can_map:
+            with open(path, 'rb') as f:
+                for info in members:
+                    arrays[info.filename[:-len('.npy')]] = _map_member(path, f, info)
+        else:
+            for info in members:
+                with archive.open(info) as member:
+                    arrays[info.filename[:-len('.npy')]] = np.lib.format.read_array(member, allow_pickle=False)
+
+    metadata = json.loads(str(arrays.pop('__meta__')))
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model array format: {metadata.get('format_version')}")
+    return arrays, metadata
+
+
+def _label_array(labels):
+    """Class labels as a plain (non-object) array; sklearn keeps string labels as dtype object"""
+    labels = np.asarray(labels)
+    if labels.dtype.hasobject:
+        if not all(isinstance(label, str) for label in labels):
+            raise ValueError("Only string or numeric class labels can be exported")
+        labels = labels.astype(str)
+    return labels
+
+
+def export_forest(model):
+    """
+    Flatten a fitted RandomForestClassifier/RandomForestRegressor (or a single tree)
+
+    Returns:
+        Tuple of (arrays dict, metadata dict) for ArrayForest
+    """
+    estimators = getattr(model, 'estimators_', None) or [model]
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests can be exported")
+    is_classifier = hasattr(model, 'classes_')
+    stores_counts = is_classifier and _sklearn_stores_counts()
+
+    features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_count = tree.node_count
+        is_leaf = tree.children_left == -1
+
+        # Leaves point at themselves, so a fixed number of steps walks every tree to a leaf
+        node_ids = np.arange(offset, offset + node_count, dtype=np.int64)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold.astype(np.float64))
+        state = tree.__getstate__()['nodes']
+        if 'missing_go_to_left' in state.dtype.names:
+            missing_left.append(state['missing_go_to_left'].astype(bool))
+        else:
+            missing_left.append(np.zeros(node_count, dtype=bool))
+
+        # Regressor trees store the mean target, classifier trees per-class fractions, which
+        # predict_proba returns as stored. scikit-learn 1.3 stores weighted counts instead,
+        # and its predict_proba divides each leaf row by its sum; only then is it normalized
+        value = np.asarray(tree.value[:, 0, :], dtype=np.float64)
+        if is_classifier:
+            value = value[:, :len(model.classes_)]
+            if stores_counts:
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+        values.append(value)
+
+        roots.append(offset)
+        max_depth = max(max_depth, int(tree.max_depth))
+        offset += node_count
+
+    arrays = {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds),
+        # children[node] = (left, right), so one lookup indexed by (x > threshold) steps down
+        'children': np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1).astype(np.int32),
+        'missing_left': np.concatenate(missing_left),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+    }
+    metadata = {
+        'kind': 'classifier' if is_classifier else 'regressor',
+        'n_features': int(model.n_features_in_),
+        'max_depth': max_depth,
+        'feature_names': [str(name) for name in getattr(model, 'feature_names_in_', [])],
+    }
+    if is_classifier:
+        arrays['classes'] = _label_array(model.classes_)
+    return arrays, metadata
+
+
+class ArrayForest:
+    """Evaluates a forest exported by export_forest with numpy only"""
+
+    def __init__(self, arrays: dict, metadata: dict):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.kind = metadata['kind']
+        self.max_depth = metadata['max_depth']
+        self.n_features_in_ = metadata['n_features']
+        self.n_estimators = len(self.roots)
+        self.classes_ = arrays.get('classes')
+        if metadata.get('feature_names'):
+            self.feature_names = list(metadata['feature_names'])
+        else:
+            self.feature_names = None
+
+    def _as_matrix(self, X):
+        """Cast input to the float32 matrix sklearn's trees compare against"""
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+        return X
+
+    def apply(self, X):
+        """Leaf node index (into the flattened arrays) of every row in every tree, shape (rows, trees)"""
+        X = self._as_matrix(X)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+        has_missing = bool(np.isnan(X).any())
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_right = x > self.threshold[nodes]
+            if has_missing:
+                # NaN fails every comparison; follow the side sklearn sends missing values to
+                missing = np.isnan(x)
+                go_right = np.where(missing, ~self.missing_left[nodes], go_right)
+            nodes = self.children[nodes, go_right.view(np.uint8)]
+        return nodes
+
+    def _mean_leaf_value(self, X):
+        """Average leaf value over the trees, summed in tree order like sklearn"""
+        X = self._as_matrix(X)
+        out = np.empty((X.shape[0],) + self.value.shape[1:], dtype=np.float64)
+        for start in range(0, X.shape[0], _CHUNK_ROWS):
+            leaves = self.value[self.apply(X[start:start + _CHUNK_ROWS])]
+            # cumsum adds sequentially (tree 0, then 1, ...), unlike sum's pairwise reduction
+            out[start:start + _CHUNK_ROWS] = np.cumsum(leaves, axis=1)[:, -1]
+        out /= self.n_estimators
+        return out
+
+    def predict_proba(self, X):
+        """Class probabilities, shape (rows, classes); classifiers only"""
+        if self.kind != 'classifier':
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_leaf_value(X)
+
+    def predict(self, X):
+        """Predicted class (classifiers) or value (regressors) per row"""
+        if self.kind == 'classifier':
+            return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+        return self._mean_leaf_value(X)[:, 0]
+
+
+# Texts the exported vectorizer and forest are checked on, next to the pickled ones
+VERIFICATION_TEXTS = [
+    'basketball tournament', 'barangay general assembly', 'birthday party', 'test',
+    'how do i book a facility', 'can i cancel my reservation', 'zumba class', '',
+]
+
+
+def verification_input(model, vectorizer=None, rows: int = 500):
+    """
+    Inputs to compare a model and its export on
+
+    Returns:
+        Tuple of (input for the sklearn model, texts for the vectorizer or None)
+    """
+    if vectorizer is not None:
+        texts = VERIFICATION_TEXTS * (rows // len(VERIFICATION_TEXTS))
+        return vectorizer.transform(texts), texts
+    rng = np.random.default_rng(42)
+    scale = rng.integers(1, 300, size=model.n_features_in_)
+    return np.round(rng.normal(size=(rows, model.n_features_in_)) * scale, 1), None
+
+
+def matches_model(bundle: dict, model, vectorizer=None):
+    """True if an exported bundle transforms and predicts exactly like the sklearn objects"""
+    import warnings
+
+    X, texts = verification_input(model, vectorizer)
+    if texts is not None:
+        X_exported = bundle['vectorizer'].transform(texts)
+        if not np.array_equal(X.toarray(), X_exported):
+            return False
+    else:
+        X_exported = X
+    exported = bundle['model']
+    with warnings.catch_warnings():
+        # Forests fitted on DataFrames warn about plain arrays; the inference modules pass arrays too
+        warnings.simplefilter('ignore', UserWarning)
+        if hasattr(model, 'predict_proba') and not np.array_equal(model.predict_proba(X), exported.predict_proba(X_exported)):
+            return False
+        return np.array_equal(model.predict(X), exported.predict(X_exported))
+
+
+def export_model_arrays(path, model, encoders: dict = None, vectorizer=None):
+    """
+    Write a forest together with its LabelEncoders or TF-IDF vectorizer to one .npz
+
+    The export is written next to the destination, loaded back and compared with the
+    model (matches_model) before it is renamed into place. fresh_arrays_path serves any
+    export not older than its pickle, so one that does not match is never published.
+
+    Args:
+        path: Destination .npz path (usually arrays_path_for(model pickle path))
+        model: Fitted forest
+        encoders: Optional {column: fitted LabelEncoder}
+        vectorizer: Optional fitted TfidfVectorizer
+
+    Returns:
+        Path of the written file
+
+    Raises:
+        ValueError: The model cannot be exported, or the export does not predict like it
+            (any earlier export at path is removed, so the pickle is served)
+    """
+    path = Path(path)
+    arrays, metadata = export_forest(model)
+    arrays = {f'forest/{name}': array for name, array in arrays.items()}
+    metadata = {'forest': metadata}
+
+    if encoders:
+        metadata['encoders'] = sorted(encoders)
+        for col, encoder in encoders.items():
+            arrays[f'encoder/{col}'] = _label_array(encoder.classes_)
+
+    if vectorizer is not None:
+        from src.tfidf_arrays import export_tfidf
+
+        vectorizer_arrays, metadata['vectorizer'] = export_tfidf(vectorizer)
+        for name, array in vectorizer_arrays.items():
+            arrays[f'vectorizer/{name}'] = array
+
+    # Not named .npz, so nothing loads it before it is verified
+    unverified_path = path.with_name(path.name + '.unverified')
+    try:
+        save_arrays(unverified_path, arrays, metadata)
+        if not matches_model(load_model_arrays(unverified_path, mmap=False), model, vectorizer):
+            path.unlink(missing_ok=True)
+            raise ValueError(f"{path.name} does not predict like the model; not exported")
+        os.replace(unverified_path, path)
+    finally:
+        unverified_path.unlink(missing_ok=True)
+    return path
+
+
+def load_model_arrays(path, mmap: bool = True):
+    """
+    Load an .npz written by export_model_arrays
+
+    Returns:
+        Dict with 'model' (ArrayForest), 'encoders' ({column: classes array}, or None)
+        and 'vectorizer' (ArrayTfidf, or None)
+    """
+    arrays, metadata = load_arrays(path, mmap=mmap)
+
+    def section(prefix):
+        return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+    bundle = {
+        'model': ArrayForest(section('forest/'), metadata['forest']),
+        'encoders': None,
+        'vectorizer': None,
+    }
+    if 'encoders' in metadata:
+        encoder_arrays = section('encoder/')
+        bundle['encoders'] = {col: encoder_arrays[col] for col in metadata['encoders']}
+    if 'vectorizer' in metadata:
+        from src.tfidf_arrays import ArrayTfidf
+
+        bundle['vectorizer'] = ArrayTfidf(section('vectorizer/'), metadata['vectorizer'])
+    return bundle
@@ -0,0 +1,266 @@
+"""
+Precomputed Philippines holiday calendar
+Holidays of config.HOLIDAY_CALENDAR's year range (2000-2100 by default) are generated
+once, sorted by date and cached on disk as JSON, so api/detect_holidays.py answers from a
+table instead of recomputing Easter and rebuilding the year's holidays on every call
+
+Single dates are dict lookups; ranges bisect the sorted dates, so they cost O(log n)
+regardless of their length and may span several years. Years outside the table are
+generated on demand.
+"""
+
+import sys
+import json
+import bisect
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+# Bump when the rules in generate_holidays change, so cached tables are rebuilt
+CALENDAR_VERSION = 1
+
+# Fixed Date Holidays
+FIXED_HOLIDAYS = {
+    "01-01": ("New Year's Day", "Regular Holiday"),
+    "04-09": ("Araw ng Kagitingan", "Regular Holiday"),
+    "05-01": ("Labor Day", "Regular Holiday"),
+    "06-12": ("Independence Day", "Regular Holiday"),
+    "08-30": ("National Heroes Day", "Regular Holiday"),  # Last Monday of August
+    "11-01": ("All Saints' Day", "Special Non-Working Holiday"),
+    "11-02": ("All Souls' Day", "Special Non-Working Holiday"),
+    "11-30": ("Bonifacio Day", "Regular Holiday"),
+    "12-25": ("Christmas Day", "Regular Holiday"),
+    "12-30": ("Rizal Day", "Regular Holiday"),
+}
+
+# Additional Special Non-Working Holidays (common dates)
+# These may vary by year, using common dates
+ADDITIONAL_HOLIDAYS = {
+    "02-14": ("Valentine's Day", "Special Non-Working Holiday"),
+    "02-25": ("EDSA People Power Revolution Anniversary", "Special Non-Working Holiday"),
+    "08-21": ("Ninoy Aquino Day", "Special Non-Working Holiday"),
+    "12-24": ("Christmas Eve", "Special Non-Working Holiday"),
+    "12-31": ("New Year's Eve", "Special Non-Working Holiday"),
+}
+
+
+def easter_sunday(year: int):
+    """Easter Sunday of a year (anonymous Gregorian Computus), or None if it cannot be computed"""
+    try:
+        a = year % 19
+        b = year // 100
+        c = year % 100
+        d = b // 4
+        e = b % 4
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i = c // 4
+        k = c % 4
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        month = (h + l - 7 * m + 114) // 31
+        day = ((h + l - 7 * m + 114) % 31) + 1
+
+        return date(year, month, day)
+    except:
+        return None
+
+
+def last_monday_of_month(year: int, month: int):
+    """Last Monday of a month, or None if it cannot be computed"""
+    try:
+        # Start from the last day of the month
+        last_day = date(year, month + 1, 1) - timedelta(days=1)
+
+        # Find the last Monday
+        days_back = (last_day.weekday() - 0) % 7  # Monday is 0
+        return last_day - timedelta(days=days_back)
+    except:
+        return None
+
+
+def generate_holidays(year: int):
+    """
+    Holidays of one year
+
+    Returns:
+        Dict mapping 'YYYY-MM-DD' to {'name', 'type', 'date'}
+    """
+    holidays = {}
+
+    for date_str, (name, holiday_type) in FIXED_HOLIDAYS.items():
+        full_date = f"{year}-{date_str}"
+        holidays[full_date] = {"name": name, "type": holiday_type, "date": full_date}
+
+    # Moveable Holidays: Maundy Thursday and Good Friday (varies by year)
+    easter = easter_sunday(year)
+    if easter:
+        for offset, name in ((3, "Maundy Thursday"), (2, "Good Friday")):
+            full_date = (easter - timedelta(days=offset)).strftime("%Y-%m-%d")
+            holidays[full_date] = {"name": name, "type": "Regular Holiday", "date": full_date}
+
+    # National Heroes Day (Last Monday of August)
+    last_monday_august = last_monday_of_month(year, 8)
+    if last_monday_august:
+        full_date = last_monday_august.strftime("%Y-%m-%d")
+        holidays[full_date] = {"name": "National Heroes Day", "type": "Regular Holiday", "date": full_date}
+
+    for date_str, (name, holiday_type) in ADDITIONAL_HOLIDAYS.items():
+        full_date = f"{year}-{date_str}"
+        holidays[full_date] = {"name": name, "type": holiday_type, "date": full_date}
+
+    return holidays
+
+
+def _date_key(value):
+    """'YYYY-MM-DD' for a date, datetime or date string (ISO strings sort chronologically)"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return datetime.strptime(str(value).strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+class HolidayCalendar:
+    """Sorted holiday table over a range of years"""
+
+    def __init__(self, first_year: int, last_year: int, holidays: list):
+        """
+        Args:
+            first_year, last_year: Years the table covers (inclusive)
+            holidays: Holiday dicts of those years, sorted by date
+        """
+        self.first_year = first_year
+        self.last_year = last_year
+        self.holidays = holidays
+        self.dates = [holiday['date'] for holiday in holidays]
+        self.by_date = {holiday['date']: holiday for holiday in holidays}
+        self._extra_years = {}  # year outside the table -> sorted holidays, generated on demand
+
+    @classmethod
+    def build(cls, first_year: int, last_year: int):
+        holidays = []
+        for year in range(first_year, last_year + 1):
+            holidays.extend(sorted(generate_holidays(year).values(), key=lambda holiday: holiday['date']))
+        return cls(first_year, last_year, holidays)
+
+    def _covers(self, year: int):
+        return self.first_year <= year <= self.last_year
+
+    def _year_outside(self, year: int):
+        holidays = self._extra_years.get(year)
+        if holidays is None:
+            holidays = sorted(generate_holidays(year).values(), key=lambda holiday: holiday['date'])
+            self._extra_years[year] = holidays
+        return holidays
+
+    def holiday_on(self, day):
+        """
+        Holiday on a date
+
+        Args:
+            day: date, datetime or 'YYYY-MM-DD' string
+
+        Returns:
+            Holiday dict ({'name', 'type', 'date'}) or None
+        """
+        key = _date_key(day)
+        year = int(key[:4])
+        if self._covers(year):
+            holiday = self.by_date.get(key)
+        else:
+            holiday = next((holiday for holiday in self._year_outside(year) if holiday['date'] == key), None)
+        return dict(holiday) if holiday is not None else None
+
+    def holidays_between(self, start, end):
+        """
+        Holidays from start to end (inclusive), in date order, across any number of years
+
+        Returns:
+            List of holiday dicts (empty if end is before start)
+        """
+        start_key, end_key = _date_key(start), _date_key(end)
+        if end_key < start_key:
+            return []
+
+        start_year, end_year = int(start_key[:4]), int(end_key[:4])
+        if self._covers(start_year) and self._covers(end_year):
+            low = bisect.bisect_left(self.dates, start_key)
+            high = bisect.bisect_right(self.dates, end_key)
+            return [dict(holiday) for holiday in self.holidays[low:high]]
+
+        holidays = []
+        for year in range(start_year, end_year + 1):
+            if self._covers(year):
+                low = bisect.bisect_left(self.dates, f"{year:04d}-01-01")
+                high = bisect.bisect_right(self.dates, f"{year:04d}-12-31")
+                year_holidays = self.holidays[low:high]
+            else:
+                year_holidays = self._year_outside(year)
+            holidays.extend(dict(holiday) for holiday in year_holidays
+                            if start_key <= holiday['date'] <= end_key)
+        return holidays
+
+    def holidays_in_year(self, year: int):
+        """All holidays of a year, in date order"""
+        return self.holidays_between(date(year, 1, 1), date(year, 12, 31))
+
+
+def _load_cached(path: Path, first_year: int, last_year: int):
+    """The cached table, or None if it is missing, unreadable or for other rules/years"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if (cached.get('version') != CALENDAR_VERSION
+                or cached.get('first_year') != first_year or cached.get('last_year') != last_year):
+            return None
+        holidays = [{'name': name, 'type': holiday_type, 'date': day}
+                    for day, name, holiday_type in cached['holidays']]
+        return HolidayCalendar(first_year, last_year, holidays)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_cached(path: Path, calendar: HolidayCalendar):
+    """Write the table for the next process; a read-only location just skips the cache"""
+    from src.model_store import atomic_write
+
+    payload = {
+        'version': CALENDAR_VERSION,
+        'first_year': calendar.first_year,
+        'last_year': calendar.last_year,
+        'holidays': [[holiday['date'], holiday['name'], holiday['type']] for holiday in calendar.holidays],
+    }
+
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, write)
+    except OSError as e:
+        print(f"Holiday calendar cache not written: {e}", file=sys.stderr)
+
+
+# Global calendar instance
+_calendar_instance = None
+
+
+def get_holiday_calendar():
+    """Get the process-wide calendar, loading it from the disk cache or building (and caching) it"""
+    global _calendar_instance
+    if _calendar_instance is None:
+        settings = config.HOLIDAY_CALENDAR
+        first_year, last_year = settings['first_year'], settings['last_year']
+        path = Path(settings['cache_path'])
+        calendar = _load_cached(path, first_year, last_year)
+        if calendar is None:
+            calendar = HolidayCalendar.build(first_year, last_year)
+            _save_cached(path, calendar)
+        _calendar_instance = calendar
+    return _calendar_instance
@@ -0,0 +1,321 @@
+"""
+Incremental retraining support
+Lets a nightly retrain absorb the reservations that changed since the last run instead
+of rebuilding from a full year of data
+
+- A watermark (the largest (updated_at, id) trained on and the end of the date window)
+  is stored next to each model as <model>.watermark.json.
+- load_reservations(changed_since=...) pulls only the rows updated after the watermark,
+  plus rows whose reservation date has entered the window since the last run.
+- Forests grow: new trees are fitted on the new rows with warm_start and the existing
+  trees are kept. Estimators with partial_fit are updated in place instead.
+- A full rebuild still runs every config.INCREMENTAL_TRAINING['full_rebuild_days'] days,
+  and once a forest reaches 'max_estimators' trees, so trees fitted on superseded rows
+  (a reservation that was pending when fitted and approved later) do not pile up.
+"""
+
+import sys
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.model_store import atomic_write, load_artifact
+
+
+def watermark_path(model_path):
+    """<model>.watermark.json next to the model pickle"""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + '.watermark.json')
+
+
+def load_watermark(model_path):
+    """The stored training state of a model, or None if there is none (or it is unreadable)"""
+    try:
+        with open(watermark_path(model_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def data_watermark(reservations_df: pd.DataFrame):
+    """
+    Largest (updated_at, id) among the rows
+
+    Returns:
+        {'updated_at': ISO timestamp, 'id': int}, or None without usable rows
+    """
+    if reservations_df.empty or 'updated_at' not in reservations_df.columns:
+        return None
+    rows = reservations_df[['updated_at', 'id']].dropna()
+    if rows.empty:
+        return None
+    last = rows.sort_values(['updated_at', 'id']).iloc[-1]
+    return {'updated_at': pd.Timestamp(last['updated_at']).isoformat(sep=' '), 'id': int(last['id'])}
+
+
+def earliest_watermark(states):
+    """
+    The watermark to load changes from for several models trained on the same rows
+
+    Returns:
+        The state with the smallest (updated_at, id), with the earliest end_date
+    """
+    earliest = min(states, key=lambda state: (pd.Timestamp(state['updated_at']), state['id']))
+    return dict(earliest, end_date=min(state['end_date'] for state in states))
+
+
+def changed_after(reservations_df: pd.DataFrame, state: dict):
+    """Boolean mask of the rows load_reservations(changed_since=state) would return"""
+    updated_at = reservations_df['updated_at']
+    last = pd.Timestamp(state['updated_at'])
+    return ((updated_at > last) | ((updated_at == last) & (reservations_df['id'] > state['id']))
+            | (reservations_df['reservation_date'] > pd.Timestamp(state['end_date'])))
+
+
+def plan_training(model_path, full: bool = False):
+    """
+    Decide between a full rebuild and an incremental update
+
+    Args:
+        model_path: Model pickle path
+        full: Force a full rebuild
+
+    Returns:
+        Tuple of ('full' | 'incremental', stored watermark or None, reason)
+    """
+    settings = config.INCREMENTAL_TRAINING
+    state = load_watermark(model_path)
+
+    if full:
+        return 'full', state, 'full rebuild requested'
+    if not settings['enabled']:
+        return 'full', state, 'incremental training disabled'
+    if state is None or not Path(model_path).exists():
+        return 'full', state, 'no previous model or watermark'
+    if not state.get('updated_at'):
+        return 'full', state, 'watermark has no data position'
+
+    last_full = datetime.fromisoformat(state['last_full_at'])
+    if datetime.now() - last_full >= timedelta(days=settings['full_rebuild_days']):
+        return 'full', state, f"last full rebuild was {state['last_full_at']}"
+    if state.get('n_estimators', 0) >= settings['max_estimators']:
+        return 'full', state, f"forest reached {state['n_estimators']} trees"
+    return 'incremental', state, f"changes since {state['updated_at']} (id {state['id']})"
+
+
+def save_watermark(model_path, mode: str, watermark: dict, end_date: str, model, rows: int, previous: dict = None,
+                   labels=None):
+    """
+    Record what a model was trained on, after its artifacts are saved
+
+    Args:
+        model_path: Model pickle path
+        mode: 'full' or 'incremental'
+        watermark: data_watermark() of the rows trained on (the previous one if None)
+        end_date: Last reservation date of the training window (YYYY-MM-DD)
+        model: The saved model (its tree count limits incremental growth)
+        rows: Rows trained on in this run
+        previous: State returned by plan_training
+        labels: Labels trained on in this run, for a classifier; their counts are kept
+            (added up across incremental runs) to weight its classes on later updates
+    """
+    previous = previous or {}
+    if mode == 'incremental' and previous.get('updated_at'):
+        # Rows that only entered the date window can be older than the watermark
+        last = (pd.Timestamp(previous['updated_at']), previous['id'])
+        if watermark is None or (pd.Timestamp(watermark['updated_at']), watermark['id']) < last:
+            watermark = {'updated_at': previous['updated_at'], 'id': previous['id']}
+    watermark = watermark or {'updated_at': None, 'id': None}
+    now = datetime.now().isoformat(timespec='seconds')
+    state = {
+        'updated_at': watermark['updated_at'],
+        'id': watermark['id'],
+        'end_date': end_date,
+        'mode': mode,
+        'trained_at': now,
+        'last_full_at': now if mode == 'full' else previous.get('last_full_at', now),
+        'incremental_runs': 0 if mode == 'full' else previous.get('incremental_runs', 0) + 1,
+        'n_estimators': int(getattr(model, 'n_estimators', 0)),
+        'rows': rows,
+    }
+    if labels is not None:
+        counts = {} if mode == 'full' else dict(previous.get('class_counts') or {})
+        for label, count in pd.Series(labels).astype(str).value_counts().items():
+            counts[label] = counts.get(label, 0) + int(count)
+        state['class_counts'] = counts
+
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+
+    atomic_write(watermark_path(model_path), write)
+    return state
+
+
+def enough_changes(count: int):
+    """Whether this many changed rows warrant an incremental update (prints why not)"""
+    minimum = config.INCREMENTAL_TRAINING['min_new_rows']
+    if count < minimum:
+        print(f"   Only {count} changed reservations (need {minimum}); model and watermark left as they are.")
+        return False
+    return True
+
+
+def with_context(changed_df: pd.DataFrame, context_df: pd.DataFrame):
+    """
+    The changed rows followed by the rest of the window (DataLoader.load_reservation_context),
+    for features and labels that count over all reservations, not only the changed ones
+
+    Returns:
+        DataFrame whose first len(changed_df) rows are the changed rows
+    """
+    rest = context_df[~context_df['id'].isin(changed_df['id'])]
+    columns = [column for column in context_df.columns if column in changed_df.columns]
+    return pd.concat([changed_df[columns], rest[columns]], ignore_index=True)
+
+
+def can_update(model, y):
+    """
+    Whether new rows can update an existing model
+
+    A warm-started classifier refits its classes from the new labels, so the new rows
+    must contain exactly the classes the model already has; partial_fit only needs them
+    to be among the model's classes.
+
+    Returns:
+        Tuple of (bool, reason when False)
+    """
+    if not hasattr(model, 'partial_fit') and not hasattr(model, 'estimators_'):
+        return False, f"{type(model).__name__} supports neither partial_fit nor warm_start"
+
+    classes = getattr(model, 'classes_', None)
+    if classes is not None:
+        known = set(classes.tolist())
+        new_classes = set(pd.unique(pd.Series(y)).tolist())
+        extra = sorted(map(str, new_classes - known))
+        missing = [] if hasattr(model, 'partial_fit') else sorted(map(str, known - new_classes))
+        if extra or missing:
+            detail = '; '.join(part for part in (
+                f"missing {', '.join(missing)}" if missing else '',
+                f"new {', '.join(extra)}" if extra else '',
+            ) if part)
+            return False, f"new rows do not match the model's classes ({detail})"
+    return True, None
+
+
+def balanced_class_weight(model, y, class_counts: dict):
+    """
+    class_weight='balanced' weights over everything the model has been trained on
+    (the watermark's class_counts plus the new rows), not over the new rows alone
+    """
+    counts = pd.Series(y).astype(str).value_counts()
+    weights = {}
+    for label in model.classes_.tolist():
+        weights[label] = class_counts.get(str(label), 0) + int(counts.get(str(label), 0))
+    total = sum(weights.values())
+    return {label: total / (len(weights) * count) for label, count in weights.items()}
+
+
+def update_model(model, X, y, class_counts: dict = None):
+    """
+    Fit new rows into an existing model
+
+    partial_fit when the estimator has it; for forests, config's 'trees_per_update' new
+    trees fitted on the rows with warm_start, next to the existing ones.
+
+    Args:
+        class_counts: Labels trained on so far ({str(label): count}, from the watermark);
+            a forest with class_weight='balanced' weights its new trees by them
+
+    Returns:
+        The updated model
+    """
+    if hasattr(model, 'partial_fit'):
+        model.partial_fit(X, y)
+        return model
+
+    params = {'warm_start': model.warm_start, 'class_weight': getattr(model, 'class_weight', None)}
+    updates = {'warm_start': True, 'n_estimators': len(model.estimators_) + config.INCREMENTAL_TRAINING['trees_per_update']}
+    if params['class_weight'] in ('balanced', 'balanced_subsample') and class_counts:
+        updates['class_weight'] = balanced_class_weight(model, y, class_counts)
+    model.set_params(**updates)
+    try:
+        model.fit(X, y)
+    finally:
+        model.set_params(**{key: value for key, value in params.items() if key in updates})
+    return model
+
+
+def update_saved_model(model_path, X, y, encoders_path=None, categorical_cols=(), state: dict = None,
+                       n_jobs: int = None):
+    """
+    Load a saved model and fit the changed rows into it
+
+    Categorical columns are encoded with the saved encoders, extended with the values
+    they have not seen, and the columns are put in the order the model was fitted on.
+
+    Args:
+        model_path: Saved model
+        X: Features of the changed rows (categorical columns not encoded yet)
+        y: Labels of the changed rows
+        encoders_path: Saved {column: LabelEncoder}, if the model has any
+        categorical_cols: Columns of X to encode (as col + '_encoded')
+        state: The model's watermark (its class counts weight a balanced classifier)
+        n_jobs: Cores to fit with (default: what the model was fitted with)
+
+    Returns:
+        Tuple of (model, encoders, score of the saved model on the changed rows before
+        the update), or None when the model cannot take the rows (reason printed)
+    """
+    # Private copies: the loaded arrays are modified
+    model = load_artifact(model_path, mmap_mode=None)
+    encoders = load_artifact(encoders_path, mmap_mode=None) if encoders_path else None
+    if n_jobs is not None and 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+
+    if encoders is not None:
+        X = X.copy()
+        for col in categorical_cols:
+            if col in X.columns:
+                values = X[col].astype(str)
+                encoder = extend_label_encoder(encoders[col], values)
+                X[col + '_encoded'] = encode_labels(encoder, values)
+        X = X.drop(columns=list(categorical_cols), errors='ignore')
+    if hasattr(X, 'columns') and hasattr(model, 'feature_names_in_'):
+        X = X.reindex(columns=model.feature_names_in_)
+
+    ok, reason = can_update(model, y)
+    if not ok:
+        print(f"   Cannot update the model: {reason}. The rows stay after the watermark for the next run.")
+        return None
+
+    before = model.score(X, y)
+    update_model(model, X, y, (state or {}).get('class_counts'))
+    return model, encoders, before
+
+
+def extend_label_encoder(encoder, values):
+    """
+    Append labels the encoder has not seen, keeping the codes of the known ones
+
+    Trees fitted earlier split on the existing codes, so they must not shift the way
+    refitting (which sorts the labels) would.
+    """
+    known = set(encoder.classes_.tolist())
+    new = [label for label in pd.unique(pd.Series(values)).tolist() if label not in known]
+    if new:
+        encoder.classes_ = np.concatenate([encoder.classes_, np.asarray(new)])
+    return encoder
+
+
+def encode_labels(encoder, values):
+    """Codes of values in an (extended, so possibly unsorted) encoder"""
+    index = {label: code for code, label in enumerate(encoder.classes_.tolist())}
+    return np.array([index[label] for label in values], dtype=np.int64)
@@ -0,0 +1,110 @@
+"""
+Micro-batching for concurrent single-row predictions
+Collects the requests that arrive for one model within a short window and runs them
+as one vectorized call, then hands each caller its own result
+
+Used by the threaded model server (src/model_server.py), where many connections ask
+the same model for one row at a time.
+"""
+
+import time
+import threading
+
+
+class _Slot:
+    """One caller's pending item and, once the batch ran, its result or error"""
+
+    __slots__ = ('item', 'result', 'error', 'done')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Turns concurrent submit(item) calls into batch_fn(items) calls
+
+    The window starts when the first item of a batch arrives; the batch runs when the
+    window closes or max_batch_size items are waiting, whichever comes first. Items
+    that arrive while a batch is running wait for the next one.
+    """
+
+    def __init__(self, batch_fn, window_ms: float = 3.0, max_batch_size: int = 256, name: str = 'batcher'):
+        """
+        Args:
+            batch_fn: Called with a list of items, returns a list of results in the same order
+            window_ms: How long to wait for more items after the first one (0 = no waiting)
+            max_batch_size: Run the batch as soon as this many items are waiting
+            name: Thread name, for debugging
+        """
+        self.batch_fn = batch_fn
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.batches = 0
+        self.items = 0
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queue one item and block until its batch has run
+
+        Returns:
+            batch_fn's result for this item
+
+        Raises:
+            Whatever batch_fn raised for the batch the item was part of
+        """
+        slot = _Slot(item)
+        with self._cond:
+            self._pending.append(slot)
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._cond.notify()
+        slot.done.wait()
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def stats(self):
+        """Batches run, items processed and the mean batch size so far"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _next_batch(self):
+        """Wait for a first item, then for the window to close or the batch to fill"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.batch_fn([slot.item for slot in batch])
+                for slot, result in zip(batch, results):
+                    slot.result = result
+            except Exception as e:
+                for slot in batch:
+                    slot.error = e
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                for slot in batch:
+                    slot.done.set()
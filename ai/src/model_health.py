@@ -0,0 +1,251 @@
+"""
+Model readiness and load reporting
+Loads every inference model in parallel and records, per model, how long the load took,
+which artifacts it came from (size and modification time), its in-memory footprint and
+its feature count
+
+The model server preloads through preload_models() before it binds its socket and
+answers the 'health' endpoint with health_report(); api/health.py prints the same report
+for callers (a load balancer, the PHP side) that want to wait until the models are warm.
+Each report describes the instances ModelManager serves at that moment, so a hot reload
+or a model that loaded lazily after a failed preload shows up right away.
+"""
+
+import os
+import sys
+import mmap
+import time
+import threading
+import importlib
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.model_manager import artifact_files, get_model_manager
+
+
+# name -> (model pickle, companion pickle, module, singleton getter, load method,
+#          loaded flag, load error attribute, attributes holding the loaded objects)
+MODELS = {
+    'auto_approval_risk': (
+        'auto_approval_risk_model.pkl', 'auto_approval_risk_encoders.pkl',
+        'src.auto_approval_risk', 'get_risk_model', 'load_model',
+        'loaded', 'load_error', ('model', 'encoders', 'encoder_index'),
+    ),
+    'facility_recommendation': (
+        'facility_recommendation_model.pkl', 'facility_recommendation_encoders.pkl',
+        'src.facility_recommendation', 'get_recommendation_model', 'load_model',
+        'loaded', 'load_error', ('model', 'encoders', 'encoder_index'),
+    ),
+    'purpose_category': (
+        'purpose_category_model.pkl', 'purpose_category_vectorizer.pkl',
+        'src.purpose_analysis', 'get_purpose_model', 'load_category_model',
+        'category_loaded', 'category_load_error', ('category_model', 'category_vectorizer'),
+    ),
+    'purpose_unclear': (
+        'purpose_unclear_model.pkl', 'purpose_unclear_vectorizer.pkl',
+        'src.purpose_analysis', 'get_purpose_model', 'load_unclear_model',
+        'unclear_loaded', 'unclear_load_error', ('unclear_model', 'unclear_vectorizer'),
+    ),
+    'chatbot_intent': (
+        'chatbot_intent_model.pkl', 'chatbot_intent_vectorizer.pkl',
+        'src.chatbot_intent', 'get_intent_model', 'load_model',
+        'loaded', 'load_error', ('model', 'vectorizer'),
+    ),
+}
+
+
+def _iso_mtime(path: Path):
+    return datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds')
+
+
+def _is_mapped(array):
+    """True if the array's memory belongs to a file mapping (shared, not private)"""
+    base = array
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, 'base', None)
+    return False
+
+
+def memory_footprint(*objects):
+    """
+    Approximate in-memory size of loaded models
+
+    Walks the objects' attributes and containers, counting numpy arrays by nbytes (once
+    each) and other objects by sys.getsizeof. sklearn trees are counted through their
+    node and value arrays.
+
+    Returns:
+        Tuple of (total bytes, bytes of arrays backed by a file mapping)
+    """
+    seen = {}  # id -> object; holding the objects keeps __getstate__ results from reusing ids
+    total = 0
+    mapped = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen[id(obj)] = obj
+
+        if isinstance(obj, np.ndarray):
+            total += obj.nbytes
+            if _is_mapped(obj):
+                mapped += obj.nbytes
+            if obj.dtype.hasobject:
+                stack.extend(obj.ravel().tolist())
+            continue
+
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, bool)):
+            continue
+        elif hasattr(obj, '__dict__'):
+            stack.append(vars(obj))
+        elif hasattr(obj, '__getstate__'):
+            # Extension types such as sklearn's Tree expose their arrays this way
+            try:
+                stack.append(obj.__getstate__())
+            except Exception:
+                pass
+    return total, mapped
+
+
+# name -> (instance, memory_bytes, mapped_bytes, n_features); walking a model's
+# objects takes a while, so it is done once per loaded instance
+_footprints = {}
+
+
+def describe(name: str, load: bool = False):
+    """
+    Describe the instance of one model that is serving now
+
+    Args:
+        load: Load the model first if it is not loaded yet
+
+    Returns:
+        Report dict: loaded, load_ms, format, artifacts, size_bytes, modified,
+        memory_bytes, mapped_bytes, n_features and error (when not loaded)
+    """
+    model_file, companion_file, module, getter, load_method, loaded_flag, error_attr, attributes = MODELS[name]
+    model_path = config.MODELS_DIR / model_file
+
+    owner = getattr(importlib.import_module(module), getter)()
+    if load and not getattr(owner, loaded_flag):
+        getattr(owner, load_method)()
+    loaded = bool(getattr(owner, loaded_flag))
+    load_ms = owner.__dict__.get('_load_ms', {}).get(load_method)
+
+    artifact_format, files = artifact_files(model_file, companion_file)
+    report = {
+        'loaded': loaded,
+        'load_ms': round(load_ms, 1) if load_ms is not None else None,
+        'format': artifact_format,
+        'artifacts': [
+            {'file': path.name, 'size_bytes': path.stat().st_size, 'modified': _iso_mtime(path)}
+            for path in files
+        ],
+        'size_bytes': sum(path.stat().st_size for path in files),
+        # Last retrain: the pickle is what the training scripts write
+        'modified': _iso_mtime(model_path) if model_path.exists() else None,
+    }
+
+    if loaded:
+        cached = _footprints.get(name)
+        if cached is None or cached[0] is not owner:
+            objects = [getattr(owner, attribute) for attribute in attributes]
+            memory_bytes, mapped_bytes = memory_footprint(*objects)
+            n_features = getattr(objects[0], 'n_features_in_', None)
+            cached = _footprints[name] = (owner, memory_bytes, mapped_bytes,
+                                          int(n_features) if n_features is not None else None)
+        report.update({
+            'memory_bytes': cached[1],
+            'mapped_bytes': cached[2],
+            'n_features': cached[3],
+        })
+    else:
+        report['error'] = getattr(owner, error_attr) or (
+            'Model files not found' if not model_path.exists() else 'Model failed to load')
+    return report
+
+
+def load_and_report(name: str):
+    """Load one model (if it is not loaded yet) and describe it (see describe)"""
+    return describe(name, load=True)
+
+
+# Time and duration of the last preload in this process
+_preload = None
+_report_lock = threading.Lock()
+
+
+def preload_models(parallel: bool = True):
+    """
+    Load every model in MODELS, in parallel threads by default, and keep the report
+
+    Loading mostly waits on file reads and numpy, so the models load side by side; the
+    wall time is about that of the slowest model rather than the sum.
+
+    Returns:
+        Health report (see health_report)
+    """
+    global _preload
+
+    start = time.perf_counter()
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(MODELS), thread_name_prefix='preload') as pool:
+            reports = dict(zip(MODELS, pool.map(load_and_report, MODELS)))
+    else:
+        reports = {name: load_and_report(name) for name in MODELS}
+    preload_ms = (time.perf_counter() - start) * 1000
+
+    with _report_lock:
+        _preload = {
+            'preloaded_at': datetime.now().isoformat(timespec='seconds'),
+            'preload_ms': round(preload_ms, 1),
+        }
+    return _summarize(reports)
+
+
+def _summarize(reports: dict):
+    loaded = sum(1 for model in reports.values() if model['loaded'])
+    if loaded == len(reports):
+        status = 'ready'
+    elif loaded:
+        status = 'degraded'
+    else:
+        status = 'unavailable'
+    with _report_lock:
+        preload = dict(_preload)
+    return {'status': status, 'ready': status == 'ready', 'pid': os.getpid(), **preload,
+            'models': reports, 'reloads': get_model_manager().status()}
+
+
+def health_report():
+    """
+    Readiness of this process's models
+
+    Preloads them first if that has not happened yet. Afterwards each call describes the
+    instances serving now (reloaded or lazily loaded ones included) without loading any.
+
+    Returns:
+        {'status': 'ready' | 'degraded' | 'unavailable', 'ready', 'pid', 'preloaded_at',
+         'preload_ms', 'models': {name: report}, 'reloads': hot reloads since the preload}
+    """
+    with _report_lock:
+        preloaded = _preload is not None
+    if not preloaded:
+        return preload_models()
+    return _summarize({name: describe(name) for name in MODELS})
@@ -0,0 +1,266 @@
+"""
+Thread-safe model manager with hot reload
+Owns the process-wide inference model instances behind get_risk_model(),
+get_recommendation_model(), get_purpose_model() and get_intent_model()
+
+- Each model is created once and each load method runs once, even when many threads
+  race on the first request (load_once).
+- check_for_updates() compares the artifacts a model was loaded from against the files
+  on disk (name, size and mtime, see model_store.artifact_version). When they changed and
+  have stayed the same for one poll (a retrain writes the pickle first and the .npz export
+  right after), a new instance is loaded next to the old one and swapped in.
+- The swap replaces one reference, so a request that already holds the old instance
+  finishes on it, and a failed load keeps serving the old version.
+
+The model server polls from a background thread (start_watching); the pre-fork master
+polls between supervision rounds and replaces its workers after a reload.
+"""
+
+import sys
+import time
+import threading
+import functools
+import importlib
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src.forest_arrays import fresh_arrays_path
+from src.model_store import artifact_version
+
+
+# name -> (module, class)
+MODELS = {
+    'auto_approval_risk': ('src.auto_approval_risk', 'AutoApprovalRiskModel'),
+    'facility_recommendation': ('src.facility_recommendation', 'FacilityRecommendationModel'),
+    'purpose_analysis': ('src.purpose_analysis', 'PurposeAnalysisModel'),
+    'chatbot_intent': ('src.chatbot_intent', 'ChatbotIntentModel'),
+}
+
+# Set by the serving process rather than loaded from artifacts; carried over to a reloaded instance
+PROCESS_ATTRIBUTES = ('batcher', 'category_batcher', 'unclear_batcher')
+
+
+def artifact_files(model_file: str, companion_file: str):
+    """
+    The files a model loads from: its .npz export if current, else the pickles that exist
+
+    Returns:
+        Tuple of (format: 'arrays' or 'pickle', list of paths)
+    """
+    model_path = config.MODELS_DIR / model_file
+    arrays_path = fresh_arrays_path(model_path)
+    if arrays_path is not None:
+        return 'arrays', [arrays_path]
+    return 'pickle', [path for path in (model_path, config.MODELS_DIR / companion_file) if path.exists()]
+
+
+def artifact_fingerprint(model_file: str, companion_file: str):
+    """Fingerprint of the files a load would read now, or None if there are none"""
+    _, files = artifact_files(model_file, companion_file)
+    try:
+        return artifact_version(files) if files else None
+    except FileNotFoundError:
+        # Replaced between listing and stat; the next poll sees the new file
+        return None
+
+
+def load_once(loaded_flag: str, model_file: str, companion_file: str):
+    """
+    Decorator for model load methods
+
+    Concurrent callers wait for one load instead of each loading, and a loaded model
+    returns True without loading again. The fingerprint of the artifacts is taken
+    before loading and kept on the instance, so check_for_updates() can tell when the
+    files on disk are newer than what was loaded; the load time is kept next to it for
+    the health report (src/model_health.py).
+
+    Args:
+        loaded_flag: Attribute the method sets to True once loaded
+        model_file, companion_file: Artifact file names in MODELS_DIR
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if getattr(self, loaded_flag):
+                return True
+            # dict.setdefault is atomic, so racing threads end up with the same lock
+            locks = self.__dict__.setdefault('_load_locks', {})
+            with locks.setdefault(method.__name__, threading.Lock()):
+                if getattr(self, loaded_flag):
+                    return True
+                fingerprint = artifact_fingerprint(model_file, companion_file)
+                start = time.perf_counter()
+                loaded = method(self, *args, **kwargs)
+                if loaded:
+                    self.__dict__.setdefault('_artifact_fingerprints', {})[method.__name__] = fingerprint
+                    self.__dict__.setdefault('_load_ms', {})[method.__name__] = (time.perf_counter() - start) * 1000
+                return loaded
+
+        wrapper.loaded_flag = loaded_flag
+        wrapper.artifacts = (model_file, companion_file)
+        return wrapper
+    return decorator
+
+
+def _load_methods(cls):
+    """(method name, loaded flag, artifact files) of a model class's load_once methods"""
+    return [
+        (name, attribute.loaded_flag, attribute.artifacts)
+        for name, attribute in vars(cls).items()
+        if callable(attribute) and hasattr(attribute, 'loaded_flag')
+    ]
+
+
+class ModelManager:
+    """Process-wide registry of model instances with atomic hot reload"""
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = threading.Lock()  # guards _instances
+        self._reload_lock = threading.Lock()  # one check/reload at a time
+        self._pending = {}  # name -> changed fingerprints seen on the last poll
+        self._failed = {}  # name -> fingerprints a reload failed on (not retried until they change)
+        self._reloads = {}  # name -> {'count', 'last', 'error'}
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _model_class(self, name: str):
+        module, class_name = MODELS[name]
+        return getattr(importlib.import_module(module), class_name)
+
+    def get(self, name: str):
+        """The current instance of a model (created on first use, not necessarily loaded)"""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = self._model_class(name)()
+        return instance
+
+    def _changed(self, name: str, instance):
+        """Fingerprints of the loaded parts whose artifacts differ from what was loaded"""
+        loaded_with = instance.__dict__.get('_artifact_fingerprints', {})
+        changed = {}
+        for method, flag, artifacts in _load_methods(type(instance)):
+            if not getattr(instance, flag) or method not in loaded_with:
+                continue
+            current = artifact_fingerprint(*artifacts)
+            if current is not None and current != loaded_with[method]:
+                changed[method] = current
+        return changed
+
+    def reload(self, name: str):
+        """
+        Load a fresh instance of a model from the current artifacts and swap it in
+
+        Only the parts loaded in the current instance are loaded (e.g. just the purpose
+        category model). The current instance keeps serving until the new one is ready,
+        and stays if the new one fails to load.
+
+        Returns:
+            True if the new instance was swapped in
+        """
+        old = self.get(name)
+        new = self._model_class(name)()
+        start = time.perf_counter()
+        for method, flag, _ in _load_methods(type(old)):
+            if getattr(old, flag) and not getattr(new, method)():
+                error = f"{method} failed"
+                self._reloads.setdefault(name, {'count': 0, 'last': None})['error'] = error
+                print(f"Reload of {name} failed ({error}); keeping the loaded version", file=sys.stderr)
+                return False
+
+        for attribute in PROCESS_ATTRIBUTES:
+            if hasattr(old, attribute):
+                setattr(new, attribute, getattr(old, attribute))
+        with self._lock:
+            self._instances[name] = new
+
+        record = self._reloads.setdefault(name, {'count': 0, 'last': None})
+        record.update({'count': record['count'] + 1,
+                       'last': datetime.now().isoformat(timespec='seconds'), 'error': None})
+        print(f"Reloaded {name} in {(time.perf_counter() - start) * 1000:.0f} ms", file=sys.stderr)
+        return True
+
+    def check_for_updates(self):
+        """
+        Poll the artifacts of every loaded model once and reload the ones that changed
+
+        A change is acted on once the files look the same on two consecutive polls, so a
+        retrain that is still writing its artifacts is not loaded half way. Artifacts that
+        failed to load are retried only after they change again.
+
+        Returns:
+            Names of the models that were reloaded
+        """
+        reloaded = []
+        with self._reload_lock:
+            for name in list(self._instances):
+                changed = self._changed(name, self._instances[name])
+                if not changed:
+                    self._pending.pop(name, None)
+                    continue
+                if self._pending.get(name) != changed:
+                    self._pending[name] = changed
+                    continue
+                self._pending.pop(name, None)
+                if self._failed.get(name) == changed:
+                    continue
+                if self.reload(name):
+                    self._failed.pop(name, None)
+                    reloaded.append(name)
+                else:
+                    self._failed[name] = changed
+        return reloaded
+
+    def start_watching(self, interval: float = None):
+        """Poll for changed artifacts every interval seconds in a daemon thread"""
+        if interval is None:
+            interval = config.MODEL_MANAGER['poll_interval']
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    print(f"Model reload check failed: {e}", file=sys.stderr)
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def status(self):
+        """
+        Reload history per model
+
+        Returns:
+            {name: {'count', 'last', 'error'}} for models reloaded (or attempted) so far
+        """
+        return {name: dict(record) for name, record in self._reloads.items()}
+
+
+# Global manager instance
+_manager = ModelManager()
+
+
+def get_model_manager():
+    """Get the process-wide model manager"""
+    return _manager
+
+
+def get_model(name: str):
+    """The current instance of a model in MODELS"""
+    return _manager.get(name)
@@ -0,0 +1,363 @@
+"""
+Long-lived model server
+Keeps the inference models loaded and answers api/ endpoint requests over a Unix socket
+
+Protocol: one JSON object per line in each direction. A request names the endpoint
+(either "predict_risk" or the script path PHP already uses, "api/predict_risk.py")
+and carries the same JSON the script reads from stdin as "data", or its command
+line arguments as "args":
+
+    {"endpoint": "api/classify_purpose.py", "data": {"purpose": "Basketball Tournament"}}
+
+The response line is exactly the JSON document the script would have printed.
+"""
+
+import sys
+import os
+import json
+import time
+import socket
+import socketserver
+import subprocess
+import threading
+import importlib
+import signal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+# Endpoint name -> module exposing handle(input_data) (and optionally input_from_args(args))
+ENDPOINTS = {
+    'predict_risk': 'api.predict_risk',
+    'classify_intent': 'api.classify_intent',
+    'classify_purpose': 'api.classify_purpose',
+    'detect_unclear_purpose': 'api.detect_unclear_purpose',
+    'recommend_facilities': 'api.recommend_facilities',
+    'detect_holidays': 'api.detect_holidays',
+    'analyze_reservation': 'api.analyze_reservation',
+    'health': 'api.health',
+}
+
+
+def normalize_endpoint(name: str):
+    """Map 'api/predict_risk.py' style script paths to endpoint names"""
+    name = str(name or '').replace('\\', '/').strip()
+    if name.startswith('api/'):
+        name = name[len('api/'):]
+    if name.endswith('.py'):
+        name = name[:-len('.py')]
+    return name
+
+
+def dispatch(request: dict):
+    """
+    Run one request against its endpoint handler
+
+    Args:
+        request: Decoded request line ({"endpoint": ..., "data": {...}} or {"endpoint": ..., "args": [...]})
+
+    Returns:
+        Response dict (the endpoint's JSON output)
+    """
+    if not isinstance(request, dict):
+        return {'error': 'Invalid input'}
+
+    endpoint = normalize_endpoint(request.get('endpoint'))
+    if endpoint == 'ping':
+        return {'status': 'ok', 'pid': os.getpid()}
+    if endpoint == 'cache_stats':
+        from src.result_cache import get_result_cache
+
+        cache = get_result_cache()
+        return cache.stats() if cache is not None else {'error': 'Result cache disabled'}
+    if endpoint not in ENDPOINTS:
+        return {'error': f"Unknown endpoint: {request.get('endpoint')}"}
+
+    module = importlib.import_module(ENDPOINTS[endpoint])
+    if request.get('args') and hasattr(module, 'input_from_args'):
+        input_data = module.input_from_args([str(arg) for arg in request['args']])
+    else:
+        input_data = request.get('data')
+        if not isinstance(input_data, dict):
+            return {'error': 'Invalid input'}
+
+    result, _ = module.handle(input_data)
+    return result
+
+
+def preload_models():
+    """
+    Load every inference model once (in parallel) so the first request does not pay for it
+
+    Returns:
+        Health report (see src/model_health.py), also served by the 'health' endpoint
+    """
+    from src.model_health import preload_models as load_all
+
+    report = load_all()
+    for name, model in report['models'].items():
+        if model['loaded']:
+            print(f"Loaded {name} in {model['load_ms']:.0f} ms ({model['format']})", file=sys.stderr)
+        else:
+            print(f"Could not load {name}: {model['error']}", file=sys.stderr)
+    print(f"Models preloaded in {report['preload_ms']:.0f} ms ({report['status']})", file=sys.stderr)
+
+    # Import the endpoint modules too, so dispatch never imports on the request path
+    for module_name in ENDPOINTS.values():
+        importlib.import_module(module_name)
+    return report
+
+
+def respond(line: bytes):
+    """Answer one request line; returns the encoded response line"""
+    try:
+        response = dispatch(json.loads(line))
+    except json.JSONDecodeError:
+        response = {'error': 'Invalid input'}
+    except Exception as e:
+        response = {'error': str(e)}
+    return json.dumps(response).encode('utf-8') + b'\n'
+
+
+def enable_micro_batching(window_ms: float = None, max_batch_size: int = None):
+    """
+    Route single-row predictions of the risk, purpose and intent models through MicroBatchers
+
+    Concurrent requests for the same model within window_ms then share one vectorized call.
+
+    Returns:
+        Dict of model name -> MicroBatcher
+    """
+    from src.micro_batcher import MicroBatcher
+    from src.auto_approval_risk import get_risk_model
+    from src.purpose_analysis import get_purpose_model
+    from src.chatbot_intent import get_intent_model
+
+    if window_ms is None:
+        window_ms = config.MICRO_BATCHING['window_ms']
+    if max_batch_size is None:
+        max_batch_size = config.MICRO_BATCHING['max_batch_size']
+
+    # Batches run on the current instance, so a hot-reloaded model (src/model_manager.py)
+    # takes over the batcher it inherits
+    batchers = {
+        'risk': MicroBatcher(lambda rows: get_risk_model().predict_risk_batch(rows),
+                             window_ms, max_batch_size, 'batch-risk'),
+        'purpose_category': MicroBatcher(lambda texts: get_purpose_model().predict_category_batch(texts),
+                                         window_ms, max_batch_size, 'batch-purpose-category'),
+        'purpose_unclear': MicroBatcher(lambda texts: get_purpose_model().predict_unclear_batch(texts),
+                                        window_ms, max_batch_size, 'batch-purpose-unclear'),
+        'intent': MicroBatcher(lambda questions: get_intent_model().classify_intents(questions),
+                               window_ms, max_batch_size, 'batch-intent'),
+    }
+    risk_model = get_risk_model()
+    purpose_model = get_purpose_model()
+    intent_model = get_intent_model()
+    risk_model.batcher = batchers['risk']
+    purpose_model.category_batcher = batchers['purpose_category']
+    purpose_model.unclear_batcher = batchers['purpose_unclear']
+    intent_model.batcher = batchers['intent']
+    return batchers
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers line-delimited JSON requests on one client connection"""
+
+    def handle(self):
+        self.server.connection_opened()
+        try:
+            for line in self.rfile:
+                line = line.strip()
+                if not line:
+                    continue
+                self.wfile.write(respond(line))
+                self.wfile.flush()
+                self.server.touch()
+        finally:
+            self.server.connection_closed()
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server that exits after idle_timeout seconds without traffic"""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen() backlog; socketserver's default of 5 refuses bursts of new connections
+
+    def __init__(self, socket_path: str, idle_timeout: int = 0):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.timeout = 1.0  # handle_request() poll interval
+        self._lock = threading.Lock()
+        self._active_connections = 0
+        self._last_activity = time.monotonic()
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def touch(self):
+        """Record request activity"""
+        with self._lock:
+            self._last_activity = time.monotonic()
+
+    def connection_opened(self):
+        with self._lock:
+            self._active_connections += 1
+            self._last_activity = time.monotonic()
+
+    def connection_closed(self):
+        with self._lock:
+            self._active_connections -= 1
+            self._last_activity = time.monotonic()
+
+    def is_idle(self):
+        """True once idle_timeout seconds passed with no open connections"""
+        if not self.idle_timeout:
+            return False
+        with self._lock:
+            return (self._active_connections == 0
+                    and time.monotonic() - self._last_activity > self.idle_timeout)
+
+    def serve_until_idle(self):
+        """Serve requests until the idle timeout expires"""
+        while not self.is_idle():
+            self.handle_request()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _acquire_server_lock(socket_path: str):
+    """
+    Take the per-socket lock file so only one server binds the path
+
+    Returns:
+        Open lock file, or None if another server already holds it
+    """
+    import fcntl
+
+    lock_file = open(socket_path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def run_server(socket_path: str = None, idle_timeout: int = None, batch_window_ms: float = None):
+    """
+    Preload models and serve until idle
+
+    Concurrent single-row predictions are micro-batched (config.MICRO_BATCHING) unless
+    batch_window_ms is negative or batching is disabled in config.
+
+    Returns:
+        False if another server already owns the socket, True after a clean shutdown
+    """
+    socket_path = socket_path or config.MODEL_SERVER['socket_path']
+    if idle_timeout is None:
+        idle_timeout = config.MODEL_SERVER['idle_timeout']
+
+    lock_file = _acquire_server_lock(socket_path)
+    if lock_file is None:
+        return False
+
+    try:
+        preload_models()
+        if batch_window_ms is None:
+            batch_window_ms = config.MICRO_BATCHING['window_ms'] if config.MICRO_BATCHING['enabled'] else -1
+        if batch_window_ms >= 0:
+            enable_micro_batching(batch_window_ms)
+        if config.MODEL_MANAGER['hot_reload']:
+            from src.model_manager import get_model_manager
+
+            get_model_manager().start_watching()
+
+        # We hold the lock, so any socket file left behind is stale
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        server = ModelServer(socket_path, idle_timeout)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        print(f"Model server listening on {socket_path} (pid {os.getpid()})", file=sys.stderr)
+        try:
+            server.serve_until_idle()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return True
+    finally:
+        lock_file.close()
+
+
+def request(endpoint: str, data: dict = None, args: list = None, socket_path: str = None, timeout: float = 30.0):
+    """
+    Send one request to a running server
+
+    Raises:
+        OSError: If no server is listening on the socket
+    """
+    socket_path = socket_path or config.MODEL_SERVER['socket_path']
+    payload = {'endpoint': endpoint}
+    if args is not None:
+        payload['args'] = list(args)
+    else:
+        payload['data'] = data or {}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError('Model server closed the connection')
+    return json.loads(line)
+
+
+def is_running(socket_path: str = None):
+    """Check whether a server answers on the socket"""
+    try:
+        return request('ping', socket_path=socket_path, timeout=2.0).get('status') == 'ok'
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_server(socket_path: str = None, startup_timeout: float = None):
+    """
+    Start a background server on first use and wait until it answers
+
+    Returns:
+        True if a server is (now) listening
+    """
+    socket_path = socket_path or config.MODEL_SERVER['socket_path']
+    if startup_timeout is None:
+        startup_timeout = config.MODEL_SERVER['startup_timeout']
+
+    if is_running(socket_path):
+        return True
+
+    serve_script = Path(__file__).parent.parent / 'api' / 'serve.py'
+    subprocess.Popen(
+        [sys.executable, str(serve_script), '--socket', socket_path],
+        cwd=str(serve_script.parent.parent),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if is_running(socket_path):
+            return True
+        time.sleep(0.1)
+    return False
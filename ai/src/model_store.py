@@ -0,0 +1,111 @@
+"""
+Model artifact storage
+Writes artifacts so joblib can memory-map their numpy arrays, and loads them with mmap_mode.
+Plain arrays stay mapped, but sklearn copies its tree arrays out of the mapping when a
+forest is unpickled, so pickled models are private to each worker either way; the .npz
+exports of src/forest_arrays.py are what workers actually share.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+def get_mmap_mode():
+    """joblib mmap_mode from config.MODEL_STORE ('none' disables mapping)"""
+    mode = config.MODEL_STORE.get('mmap_mode')
+    if not mode or str(mode).lower() == 'none':
+        return None
+    return mode
+
+
+def atomic_write(path, write_fn):
+    """
+    Write a file next to its destination and rename it into place
+
+    A reader opening the path concurrently sees either the old or the new file,
+    never a partially written one.
+
+    Args:
+        path: Destination file path
+        write_fn: Called with the temporary file path; must write the content there
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        # mkstemp creates 0600 files; give the artifact normal permissions so the web server can read it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def save_artifact(obj, path):
+    """
+    Save an artifact uncompressed so its arrays can be memory-mapped on load
+
+    Args:
+        obj: Object to persist (model, vectorizer, encoders, ...)
+        path: Destination file path
+
+    Returns:
+        Path of the saved artifact
+    """
+    import joblib
+
+    # compress=0: compressed arrays cannot be memory-mapped
+    return atomic_write(path, lambda tmp_path: joblib.dump(obj, tmp_path, compress=0))
+
+
+def load_artifact(path, mmap_mode: str = 'default'):
+    """
+    Load an artifact saved by save_artifact (or a plain joblib.dump)
+
+    Args:
+        path: Artifact file path
+        mmap_mode: joblib mmap_mode; defaults to config.MODEL_STORE['mmap_mode']
+
+    Returns:
+        The loaded object
+    """
+    import joblib
+
+    if mmap_mode == 'default':
+        mmap_mode = get_mmap_mode()
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def artifact_version(paths):
+    """
+    Fingerprint of the artifact files a model was loaded from
+
+    Built from each file's name, size and modification time, so it changes whenever a
+    retrain replaces the files, without hashing their content on every load.
+
+    Returns:
+        Short hex string
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+    return digest.hexdigest()[:16]
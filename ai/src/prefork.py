@@ -0,0 +1,359 @@
+"""
+Pre-forked model server
+The master loads every model once, freezes the GC heap and forks workers that share those
+pages copy-on-write; all workers accept connections on the same listening Unix socket
+
+Workers report busy/idle to the master over a pipe. The master adds a worker whenever all
+of them are busy (new connections are queueing in the listen backlog), up to max_workers,
+retires workers that stayed idle for scale_down_after seconds down to min_workers, and
+replaces workers that die. The listening socket belongs to the master, so it stays open
+while workers come and go.
+
+With hot reload on (config.MODEL_MANAGER), the master also polls the model artifacts.
+After it loads a retrained model (src/model_manager.py) it retires every worker after
+its current request and forks fresh ones, which share the new model.
+
+Speaks the same line-delimited JSON protocol as src/model_server.py.
+"""
+
+import sys
+import os
+import gc
+import time
+import select
+import signal
+import socket
+import struct
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src import model_server
+
+
+# Status message a worker writes to the master: pid + state byte. 5 bytes, well under
+# PIPE_BUF, so concurrent writes from different workers never interleave.
+_STATUS = struct.Struct('=ic')
+_BUSY = b'b'
+_IDLE = b'i'
+
+# How often workers re-check for shutdown while waiting in accept() or for a request, in seconds
+_ACCEPT_POLL = 1.0
+
+# Set by SIGTERM inside a worker; the worker finishes its current request and exits
+_worker_stopping = False
+
+
+def _worker_sigterm(signum, frame):
+    global _worker_stopping
+    _worker_stopping = True
+
+
+def _serve_connection(conn: socket.socket):
+    """Answer requests on one client connection until it closes or the worker is asked to stop"""
+    buffer = b''
+    while not _worker_stopping:
+        # Wait with a timeout, so a worker retired while a persistent client sits idle
+        # notices SIGTERM instead of blocking in recv() (and answering from an old model)
+        readable, _, _ = select.select([conn], [], [], _ACCEPT_POLL)
+        if not readable:
+            continue
+        data = conn.recv(65536)
+        if not data:
+            break
+        buffer += data
+        while b'\n' in buffer and not _worker_stopping:
+            line, buffer = buffer.split(b'\n', 1)
+            line = line.strip()
+            if line:
+                conn.sendall(model_server.respond(line))
+
+
+def _worker_main(listener: socket.socket, status_fd: int, master_pid: int):
+    """Worker loop (runs in the forked child): accept and serve until asked to stop"""
+    signal.signal(signal.SIGTERM, _worker_sigterm)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the master
+
+    pid = os.getpid()
+    while not _worker_stopping and os.getppid() == master_pid:
+        try:
+            conn, _ = listener.accept()
+        except socket.timeout:
+            continue
+
+        os.write(status_fd, _STATUS.pack(pid, _BUSY))
+        try:
+            conn.settimeout(None)
+            _serve_connection(conn)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+            os.write(status_fd, _STATUS.pack(pid, _IDLE))
+
+
+class PreforkServer:
+    """Master process of the pre-fork server"""
+
+    def __init__(self, socket_path: str, min_workers: int, max_workers: int,
+                 idle_timeout: int = 0, scale_down_after: float = 30, reload_interval: float = 0,
+                 retire_grace_period: float = 30):
+        self.socket_path = socket_path
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.idle_timeout = idle_timeout
+        self.scale_down_after = scale_down_after
+        self.reload_interval = reload_interval  # Seconds between model artifact checks (0 = never)
+        self._next_reload_check = time.monotonic() + reload_interval
+        self.listener = None
+        self.workers = {}  # pid -> {'busy': bool, 'since': monotonic time of last state change}
+        self.retire_grace_period = retire_grace_period  # Seconds a retired worker may take to exit
+        self.retiring = {}  # pid -> monotonic time after which it is killed
+        self.stopping = False
+        self._status_r = None
+        self._status_w = None
+        self._status_buffer = b''
+        self._last_activity = time.monotonic()
+
+    def start(self):
+        """Preload models, open the listening socket and fork min_workers workers"""
+        model_server.preload_models()
+
+        # We hold the server lock, so any socket file left behind is stale
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.listener.listen(128)
+        # Workers wait in accept() with a timeout so they notice shutdown requests
+        self.listener.settimeout(_ACCEPT_POLL)
+
+        self._status_r, self._status_w = os.pipe()
+        for _ in range(self.min_workers):
+            self.spawn_worker()
+
+    def spawn_worker(self):
+        """Fork one worker sharing the master's loaded models"""
+        # Move everything allocated so far to the permanent generation, so the collector
+        # in the workers never writes to (and so never un-shares) the model objects
+        gc.collect()
+        gc.freeze()
+
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                os.close(self._status_r)
+                _worker_main(self.listener, self._status_w, master_pid)
+            except BaseException:
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self.workers[pid] = {'busy': False, 'since': time.monotonic()}
+        return pid
+
+    def _read_status(self):
+        """Apply the busy/idle messages waiting on the status pipe"""
+        self._status_buffer += os.read(self._status_r, _STATUS.size * 256)
+        usable = len(self._status_buffer) - len(self._status_buffer) % _STATUS.size
+        now = time.monotonic()
+        for offset in range(0, usable, _STATUS.size):
+            pid, state = _STATUS.unpack_from(self._status_buffer, offset)
+            if pid in self.workers:
+                self.workers[pid] = {'busy': state == _BUSY, 'since': now}
+        self._status_buffer = self._status_buffer[usable:]
+        self._last_activity = now
+
+    def _reap(self):
+        """Collect exited workers and replace the ones that were not retired on purpose"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.workers.pop(pid, None)
+            if pid in self.retiring:
+                del self.retiring[pid]
+            elif not self.stopping:
+                print(f"Worker {pid} exited unexpectedly (status {status}); replacing it", file=sys.stderr)
+                self.spawn_worker()
+
+        if not self.stopping:
+            while len(self.active_workers()) < self.min_workers:
+                self.spawn_worker()
+
+    def active_workers(self):
+        """Workers that are not being retired"""
+        return [pid for pid in self.workers if pid not in self.retiring]
+
+    def busy_count(self):
+        return sum(1 for pid in self.active_workers() if self.workers[pid]['busy'])
+
+    def _scale(self):
+        """Add a worker when all are busy, retire one that has idled for scale_down_after seconds"""
+        active = self.active_workers()
+        if self.busy_count() == len(active):
+            if len(active) < self.max_workers:
+                self.spawn_worker()
+            return
+
+        if len(active) > self.min_workers:
+            now = time.monotonic()
+            for pid in active:
+                info = self.workers[pid]
+                if not info['busy'] and now - info['since'] > self.scale_down_after:
+                    self.retire_worker(pid)
+                    break
+
+    def retire_worker(self, pid: int):
+        """Ask a worker to exit after its current request; it is killed after retire_grace_period"""
+        self.retiring.setdefault(pid, time.monotonic() + self.retire_grace_period)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _kill_overdue(self):
+        """SIGKILL retired workers that are still running after their grace period"""
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                print(f"Worker {pid} did not exit after {self.retire_grace_period}s; killing it", file=sys.stderr)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self.retiring[pid] = float('inf')  # Reaped by _reap like any retired worker
+
+    def recycle_workers(self):
+        """Replace every worker with a fresh fork of the master (after a model reload)"""
+        old_workers = self.active_workers()
+        for pid in old_workers:
+            self.retire_worker(pid)
+        for _ in range(max(len(old_workers), self.min_workers)):
+            self.spawn_worker()
+
+    def _check_for_reload(self):
+        """Reload changed models in the master and recycle the workers onto them"""
+        if not self.reload_interval or time.monotonic() < self._next_reload_check:
+            return
+        from src.model_manager import get_model_manager
+
+        try:
+            reloaded = get_model_manager().check_for_updates()
+        except Exception as e:
+            print(f"Model reload check failed: {e}", file=sys.stderr)
+            reloaded = []
+        if reloaded:
+            print(f"Recycling workers onto reloaded {', '.join(reloaded)}", file=sys.stderr)
+            self.recycle_workers()
+        self._next_reload_check = time.monotonic() + self.reload_interval
+
+    def is_idle(self):
+        """True once idle_timeout seconds passed with no busy workers"""
+        if not self.idle_timeout:
+            return False
+        return (self.busy_count() == 0
+                and time.monotonic() - self._last_activity > self.idle_timeout)
+
+    def serve_until_idle(self):
+        """Supervise the workers until the idle timeout expires"""
+        while not self.is_idle():
+            readable, _, _ = select.select([self._status_r], [], [], 0.5)
+            if readable:
+                self._read_status()
+            self._reap()
+            self._kill_overdue()
+            self._scale()
+            self._check_for_reload()
+
+    def shutdown(self, grace_period: float = 10.0):
+        """Stop all workers, then close and remove the listening socket"""
+        self.stopping = True
+        for pid in list(self.workers):
+            self.retire_worker(pid)
+
+        deadline = time.monotonic() + grace_period
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.workers.clear()
+
+        if self.listener is not None:
+            self.listener.close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        for fd in (self._status_r, self._status_w):
+            if fd is not None:
+                os.close(fd)
+
+
+def parse_workers(value: str):
+    """
+    Parse a worker count: "N" (fixed) or "MIN:MAX"
+
+    Returns:
+        Tuple of (min_workers, max_workers)
+    """
+    value = str(value).strip()
+    if ':' in value:
+        low, high = value.split(':', 1)
+        min_workers = int(low) if low else 1
+        max_workers = int(high) if high else (os.cpu_count() or 1)
+    else:
+        min_workers = max_workers = int(value)
+    if min_workers < 1 or max_workers < min_workers:
+        raise ValueError(f"Invalid worker range: {value}")
+    return min_workers, max_workers
+
+
+def run_prefork_server(socket_path: str = None, min_workers: int = 2, max_workers: int = None,
+                       idle_timeout: int = None):
+    """
+    Preload models, fork workers and supervise them until idle
+
+    Returns:
+        False if another server already owns the socket, True after a clean shutdown
+    """
+    socket_path = socket_path or config.MODEL_SERVER['socket_path']
+    if idle_timeout is None:
+        idle_timeout = config.MODEL_SERVER['idle_timeout']
+    if max_workers is None:
+        max_workers = os.cpu_count() or min_workers
+
+    lock_file = model_server._acquire_server_lock(socket_path)
+    if lock_file is None:
+        return False
+
+    reload_interval = config.MODEL_MANAGER['poll_interval'] if config.MODEL_MANAGER['hot_reload'] else 0
+    server = PreforkServer(socket_path, min_workers, max_workers, idle_timeout,
+                           config.MODEL_SERVER['scale_down_after'], reload_interval,
+                           config.MODEL_SERVER['retire_grace_period'])
+    try:
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        server.start()
+        print(f"Pre-fork model server listening on {socket_path} "
+              f"(pid {os.getpid()}, {server.min_workers}-{server.max_workers} workers)", file=sys.stderr)
+        try:
+            server.serve_until_idle()
+        except KeyboardInterrupt:
+            pass
+        return True
+    finally:
+        server.shutdown()
+        lock_file.close()
@@ -5,20 +5,21 @@ Loads trained models to categorize purposes and detect unclear purposes
 
 import sys
 from pathlib import Path
-import pandas as pd
-import numpy as np
-import joblib
 import re
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import config
+from src.utils import is_missing
+from src.model_store import load_artifact, artifact_version
+from src.forest_arrays import fresh_arrays_path, load_model_arrays
+from src.model_manager import load_once, get_model
 
 
 def clean_text(text: str):
     """Clean and normalize text"""
-    if pd.isna(text) or not text:
+    if is_missing(text) or not text:
         return ""
     
     text = str(text).lower()
@@ -39,47 +40,83 @@ class PurposeAnalysisModel:
         self.unclear_vectorizer = None
         self.category_loaded = False
         self.unclear_loaded = False
+        # MicroBatchers over the *_batch methods, set by the model server
+        self.category_batcher = None
+        self.unclear_batcher = None
+        # Fingerprints of the loaded artifacts (result cache keys)
+        self.category_version = None
+        self.unclear_version = None
+        # Why the last load failed, for the health report
+        self.category_load_error = None
+        self.unclear_load_error = None
     
+    @load_once('category_loaded', 'purpose_category_model.pkl', 'purpose_category_vectorizer.pkl')
     def load_category_model(self):
         """Load purpose category classification model"""
         try:
             model_path = config.MODELS_DIR / 'purpose_category_model.pkl'
             vectorizer_path = config.MODELS_DIR / 'purpose_category_vectorizer.pkl'
             
-            if not model_path.exists() or not vectorizer_path.exists():
-                return False
-            
-            self.category_model = joblib.load(model_path)
-            self.category_vectorizer = joblib.load(vectorizer_path)
+            # Prefer the pickle-free export (scripts/export_model_arrays.py), which loads without sklearn
+            arrays_path = fresh_arrays_path(model_path)
+            if arrays_path is not None:
+                bundle = load_model_arrays(arrays_path)
+                self.category_model = bundle['model']
+                self.category_vectorizer = bundle['vectorizer']
+                self.category_version = artifact_version([arrays_path])
+            else:
+                if not model_path.exists() or not vectorizer_path.exists():
+                    return False
+                
+                self.category_model = load_artifact(model_path)
+                self.category_vectorizer = load_artifact(vectorizer_path)
+                self.category_version = artifact_version([model_path, vectorizer_path])
             self.category_loaded = True
+            self.category_load_error = None
             return True
         except Exception as e:
-            print(f"Error loading category model: {e}")
+            self.category_load_error = str(e)
+            print(f"Error loading category model: {e}", file=sys.stderr)
             return False
     
+    @load_once('unclear_loaded', 'purpose_unclear_model.pkl', 'purpose_unclear_vectorizer.pkl')
     def load_unclear_model(self):
         """Load unclear purpose detection model"""
         try:
             model_path = config.MODELS_DIR / 'purpose_unclear_model.pkl'
             vectorizer_path = config.MODELS_DIR / 'purpose_unclear_vectorizer.pkl'
             
-            if not model_path.exists() or not vectorizer_path.exists():
-                return False
-            
-            self.unclear_model = joblib.load(model_path)
-            self.unclear_vectorizer = joblib.load(vectorizer_path)
+            # Prefer the pickle-free export (scripts/export_model_arrays.py), which loads without sklearn
+            arrays_path = fresh_arrays_path(model_path)
+            if arrays_path is not None:
+                bundle = load_model_arrays(arrays_path)
+                self.unclear_model = bundle['model']
+                self.unclear_vectorizer = bundle['vectorizer']
+                self.unclear_version = artifact_version([arrays_path])
+            else:
+                if not model_path.exists() or not vectorizer_path.exists():
+                    return False
+                
+                self.unclear_model = load_artifact(model_path)
+                self.unclear_vectorizer = load_artifact(vectorizer_path)
+                self.unclear_version = artifact_version([model_path, vectorizer_path])
             self.unclear_loaded = True
+            self.unclear_load_error = None
             return True
         except Exception as e:
-            print(f"Error loading unclear model: {e}")
+            self.unclear_load_error = str(e)
+            print(f"Error loading unclear model: {e}", file=sys.stderr)
             return False
     
-    def classify_purpose_category(self, purpose: str):
+    def classify_purpose_category(self, purpose: str, purpose_clean: str = None, fallback: bool = True):
         """
         Classify purpose into a category
         
         Args:
             purpose: Purpose text string
+            purpose_clean: clean_text(purpose), if the caller already has it
+            fallback: Answer category_fallback() when the model cannot; False raises
+                instead, so a failure is not mistaken for a prediction (result cache)
         
         Returns:
             Dictionary with:
@@ -88,6 +125,8 @@ class PurposeAnalysisModel:
         """
         if not self.category_loaded:
             if not self.load_category_model():
+                if not fallback:
+                    raise RuntimeError(f"Category model not loaded: {self.category_load_error}")
                 return {
                     'category': 'private',
                     'confidence': 0.0
@@ -95,7 +134,8 @@ class PurposeAnalysisModel:
         
         try:
             # Clean and vectorize purpose
-            purpose_clean = clean_text(purpose)
+            if purpose_clean is None:
+                purpose_clean = clean_text(purpose)
             
             if not purpose_clean or len(purpose_clean) < 3:
                 return {
@@ -103,33 +143,32 @@ class PurposeAnalysisModel:
                     'confidence': 1.0
                 }
             
-            # Vectorize
-            X = self.category_vectorizer.transform([purpose_clean])
-            
-            # Predict
-            category = self.category_model.predict(X)[0]
-            proba = self.category_model.predict_proba(X)[0]
-            
-            # Get confidence (max probability)
-            confidence = float(max(proba))
-            
-            return {
-                'category': str(category),
-                'confidence': confidence
-            }
+            if self.category_batcher is not None:
+                return self.category_batcher.submit(purpose_clean)
+            return self.predict_category_batch([purpose_clean])[0]
         except Exception as e:
-            print(f"Error classifying purpose: {e}")
-            return {
-                'category': 'private',
-                'confidence': 0.0
-            }
+            if not fallback:
+                raise
+            return self.category_fallback(e)
+    
+    def category_fallback(self, error: Exception):
+        """classify_purpose_category's answer when the model failed with error"""
+        if self.category_loaded:  # A model that did not load was already reported
+            print(f"Error classifying purpose: {error}")
+        return {
+            'category': 'private',
+            'confidence': 0.0
+        }
     
-    def detect_unclear_purpose(self, purpose: str):
+    def detect_unclear_purpose(self, purpose: str, purpose_clean: str = None, fallback: bool = True):
         """
         Detect if purpose is unclear or suspicious
         
         Args:
             purpose: Purpose text string
+            purpose_clean: clean_text(purpose), if the caller already has it
+            fallback: Answer unclear_fallback() when the model cannot; False raises
+                instead, so a failure is not mistaken for a prediction (result cache)
         
         Returns:
             Dictionary with:
@@ -139,12 +178,15 @@ class PurposeAnalysisModel:
         """
         if not self.unclear_loaded:
             if not self.load_unclear_model():
+                if not fallback:
+                    raise RuntimeError(f"Unclear model not loaded: {self.unclear_load_error}")
                 # Fallback to rule-based detection
                 return self._rule_based_unclear_detection(purpose)
         
         try:
             # Clean and vectorize purpose
-            purpose_clean = clean_text(purpose)
+            if purpose_clean is None:
+                purpose_clean = clean_text(purpose)
             
             if not purpose_clean or len(purpose_clean) < 3:
                 return {
@@ -153,29 +195,71 @@ class PurposeAnalysisModel:
                     'confidence': 1.0
                 }
             
-            # Vectorize
-            X = self.unclear_vectorizer.transform([purpose_clean])
-            
-            # Predict
-            is_unclear = self.unclear_model.predict(X)[0]
-            proba = self.unclear_model.predict_proba(X)[0]
-            
+            if self.unclear_batcher is not None:
+                return self.unclear_batcher.submit(purpose_clean)
+            return self.predict_unclear_batch([purpose_clean])[0]
+        except Exception as e:
+            if not fallback:
+                raise
+            return self.unclear_fallback(purpose, e)
+    
+    def unclear_fallback(self, purpose: str, error: Exception):
+        """detect_unclear_purpose's answer when the model failed with error (rule-based)"""
+        if self.unclear_loaded:  # A model that did not load was already reported
+            print(f"Error detecting unclear purpose: {error}")
+        return self._rule_based_unclear_detection(purpose)
+    
+    def predict_category_batch(self, cleaned_purposes: list):
+        """
+        Classify many cleaned purposes with one vectorizer and one model call
+        
+        Args:
+            cleaned_purposes: Purposes already passed through clean_text
+        
+        Returns:
+            List of {'category', 'confidence'} dictionaries in input order
+        """
+        # Vectorize
+        X = self.category_vectorizer.transform(cleaned_purposes)
+        
+        # predict() is argmax over predict_proba, so one pass gives both
+        probas = self.category_model.predict_proba(X)
+        categories = self.category_model.classes_.take(probas.argmax(axis=1))
+        
+        return [
+            {'category': str(category), 'confidence': float(max(proba))}
+            for category, proba in zip(categories, probas)
+        ]
+    
+    def predict_unclear_batch(self, cleaned_purposes: list):
+        """
+        Score many cleaned purposes for unclearness with one vectorizer and one model call
+        
+        Args:
+            cleaned_purposes: Purposes already passed through clean_text
+        
+        Returns:
+            List of {'is_unclear', 'probability', 'confidence'} dictionaries in input order
+        """
+        X = self.unclear_vectorizer.transform(cleaned_purposes)
+        
+        probas = self.unclear_model.predict_proba(X)
+        labels = self.unclear_model.classes_.take(probas.argmax(axis=1))
+        
+        results = []
+        for is_unclear, proba in zip(labels, probas):
             # Get probability of unclear (class 1)
             unclear_prob = float(proba[1] if len(proba) > 1 else proba[0])
-            confidence = float(max(proba))
-            
-            return {
+            results.append({
                 'is_unclear': bool(is_unclear == 1),
                 'probability': unclear_prob,
-                'confidence': confidence
-            }
-        except Exception as e:
-            print(f"Error detecting unclear purpose: {e}")
-            return self._rule_based_unclear_detection(purpose)
+                'confidence': float(max(proba))
+            })
+        return results
     
     def _rule_based_unclear_detection(self, purpose: str):
         """Fallback rule-based unclear detection"""
-        if pd.isna(purpose) or not purpose:
+        if is_missing(purpose) or not purpose:
             return {
                 'is_unclear': True,
                 'probability': 1.0,
@@ -208,13 +292,6 @@ class PurposeAnalysisModel:
         }
 
 
-# Global model instance
-_model_instance = None
-
-
 def get_purpose_model():
-    """Get or create global model instance"""
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = PurposeAnalysisModel()
-    return _model_instance
+    """Get the current global model instance (see src/model_manager.py; replaced when the artifacts change)"""
+    return get_model('purpose_analysis')
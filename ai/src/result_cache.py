@@ -0,0 +1,281 @@
+"""
+Cross-process result cache for the api/ endpoints
+SQLite database in WAL mode shared by the per-request scripts and the model server
+
+Entries are keyed by endpoint, model version and normalized input (the clean_text
+output), so identical purposes and questions are answered without running the model.
+The model version is a fingerprint of the artifact files the model was loaded from,
+so a retrain that writes new artifacts starts a fresh set of keys and the old ones
+age out. Entries expire after ttl_seconds; beyond max_entries the least recently used
+are evicted, in a sweep that runs at most every evict_interval seconds. Hit and miss
+counters are kept per endpoint.
+
+Lookups only read, so concurrent readers never queue for SQLite's single writer lock:
+counters and LRU times are buffered in memory and written in one transaction every
+flush_interval seconds, with the next put, or at exit. An entry's LRU time is refreshed
+only when it is older than touch_after seconds.
+
+The cache never fails a request: if the database cannot be opened or is locked for
+too long, lookups miss and stores are skipped.
+"""
+
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    endpoint TEXT NOT NULL,
+    version TEXT NOT NULL,
+    input TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (endpoint, version, input)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE TABLE IF NOT EXISTS stats (
+    endpoint TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class ResultCache:
+    """SQLite-backed TTL + LRU cache of endpoint results"""
+
+    def __init__(self, path, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000,
+                 evict_interval: float = 60, touch_after: float = 60, flush_interval: float = 5):
+        """
+        Args:
+            evict_interval: Seconds between expiry/LRU sweeps (run by whichever put is due)
+            touch_after: A hit refreshes an entry's LRU time only if it is older than this
+            flush_interval: Seconds hit/miss counters and LRU times are buffered in memory
+        """
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_interval = evict_interval
+        self.touch_after = touch_after
+        self.flush_interval = flush_interval
+        self._local = threading.local()  # sqlite3 connections cannot be shared between threads
+
+        # Hits only read; their counters and LRU times are written in one batch per flush_interval
+        self._pending_lock = threading.Lock()
+        self._pending_counts = {}  # endpoint -> [hits, misses]
+        self._pending_touches = {}  # (endpoint, version, input) -> accessed
+        self._flushed = time.monotonic()
+        atexit.register(self.flush)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, endpoint: str, column: int):
+        with self._pending_lock:
+            self._pending_counts.setdefault(endpoint, [0, 0])[column] += 1
+
+    def _write_pending(self, conn):
+        """Write the buffered counters and LRU times (inside the caller's transaction)"""
+        with self._pending_lock:
+            counts, self._pending_counts = self._pending_counts, {}
+            touches, self._pending_touches = self._pending_touches, {}
+            self._flushed = time.monotonic()
+        try:
+            conn.executemany(
+                "INSERT INTO stats (endpoint, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT (endpoint) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                [(endpoint, hits, misses) for endpoint, (hits, misses) in counts.items()],
+            )
+            conn.executemany(
+                "UPDATE entries SET accessed = MAX(accessed, ?) WHERE endpoint = ? AND version = ? AND input = ?",
+                [(accessed,) + key for key, accessed in touches.items()],
+            )
+        except sqlite3.Error:
+            # Put them back for the next attempt
+            with self._pending_lock:
+                for endpoint, (hits, misses) in counts.items():
+                    pending = self._pending_counts.setdefault(endpoint, [0, 0])
+                    pending[0] += hits
+                    pending[1] += misses
+                for key, accessed in touches.items():
+                    self._pending_touches.setdefault(key, accessed)
+            raise
+
+    def flush(self):
+        """Write the buffered hit/miss counters and LRU times now"""
+        if not self._pending_counts and not self._pending_touches:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                self._write_pending(conn)
+        except sqlite3.Error as e:
+            print(f"Result cache unavailable: {e}", file=sys.stderr)
+
+    def get(self, endpoint: str, version: str, normalized_input: str):
+        """
+        Look up a cached result
+
+        A lookup only reads the database; hit/miss counters and LRU times are buffered
+        and written every flush_interval seconds (see flush()).
+
+        Returns:
+            The cached result, or None on a miss (or if the cache is unavailable)
+        """
+        now = time.time()
+        result = None
+        try:
+            row = self._connection().execute(
+                "SELECT value, created, accessed FROM entries WHERE endpoint = ? AND version = ? AND input = ?",
+                (endpoint, version, normalized_input),
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                result = json.loads(row[0])
+                if now - row[2] > self.touch_after:
+                    with self._pending_lock:
+                        self._pending_touches[(endpoint, version, normalized_input)] = now
+        except sqlite3.Error as e:
+            print(f"Result cache unavailable: {e}", file=sys.stderr)
+        self._count(endpoint, 0 if result is not None else 1)
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+        return result
+
+    def put(self, endpoint: str, version: str, normalized_input: str, value):
+        """Store a result; every evict_interval seconds also drop expired and least recently used entries"""
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (endpoint, version, input, value, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (endpoint, version, normalized_input, json.dumps(value), now, now),
+                )
+                self._write_pending(conn)  # The transaction writes anyway
+                row = conn.execute("SELECT value FROM meta WHERE key = 'evicted'").fetchone()
+                if row is None or now - row[0] >= self.evict_interval:
+                    self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Result cache unavailable: {e}", file=sys.stderr)
+
+    def _evict(self, conn, now: float):
+        """Drop expired entries, then the least recently used ones over max_entries"""
+        conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,))
+        excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('evicted', ?)", (now,))
+
+    def stats(self):
+        """
+        Hit/miss counters per endpoint plus the number of cached entries
+
+        Returns:
+            {'entries': n, 'endpoints': {endpoint: {'hits', 'misses', 'hit_rate'}}}
+        """
+        self.flush()
+        conn = self._connection()
+        endpoints = {}
+        for endpoint, hits, misses in conn.execute("SELECT endpoint, hits, misses FROM stats ORDER BY endpoint"):
+            total = hits + misses
+            endpoints[endpoint] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / total if total else 0.0,
+            }
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'entries': entries, 'endpoints': endpoints}
+
+    def clear(self, reset_stats: bool = False):
+        """Remove all entries (and optionally the counters)"""
+        if reset_stats:
+            with self._pending_lock:
+                self._pending_counts, self._pending_touches = {}, {}
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            if reset_stats:
+                conn.execute("DELETE FROM stats")
+
+
+# Global cache instance
+_cache_instance = None
+_cache_failed = False
+
+
+def get_result_cache():
+    """Get the process-wide cache, or None if it is disabled or cannot be opened"""
+    global _cache_instance, _cache_failed
+    if _cache_instance is None and not _cache_failed:
+        settings = config.RESULT_CACHE
+        if not settings['enabled']:
+            _cache_failed = True
+            return None
+        cache = ResultCache(settings['path'], settings['ttl_seconds'], settings['max_entries'],
+                            settings['evict_interval'], settings['touch_after'], settings['flush_interval'])
+        try:
+            cache._connection()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Result cache disabled: {e}", file=sys.stderr)
+            _cache_failed = True
+            return None
+        _cache_instance = cache
+    return _cache_instance
+
+
+def cached(endpoint: str, version, normalized_input: str, compute, fallback=None):
+    """
+    Return the cached result for (endpoint, version, normalized_input), computing and storing it on a miss
+
+    Args:
+        endpoint: Endpoint name, e.g. 'classify_purpose'
+        version: Model version (see model_store.artifact_version); None skips the cache
+        normalized_input: Input as the model sees it (clean_text output)
+        compute: Called without arguments on a miss; returns the result dict, or raises
+            if the model could not answer
+        fallback: Called with compute's exception; its answer is returned but never stored,
+            so a one-off failure is not served from the cache. None lets the exception through.
+    """
+    cache = get_result_cache() if version else None
+    result = cache.get(endpoint, version, normalized_input) if cache is not None else None
+    if result is not None:
+        return result
+
+    try:
+        result = compute()
+    except Exception as e:
+        if fallback is None:
+            raise
+        return fallback(e)
+    if cache is not None:
+        cache.put(endpoint, version, normalized_input, result)
+    return result
@@ -0,0 +1,144 @@
+"""
+Pickle-free TF-IDF vectorizer
+Exports a fitted sklearn TfidfVectorizer (word analyzer) to arrays and reproduces its
+transform() with the standard library and numpy, so the text models load without sklearn
+
+The output is the dense equivalent of sklearn's sparse matrix, computed in the same
+order (sorted term indices, tf * idf, then row normalization) so the values match
+sklearn's exactly.
+"""
+
+import re
+import math
+
+import numpy as np
+
+
+def export_tfidf(vectorizer):
+    """
+    Flatten a fitted TfidfVectorizer
+
+    Raises:
+        ValueError: For settings this module does not reproduce (custom analyzers,
+            tokenizers or preprocessors, accent stripping, non-word analyzers)
+
+    Returns:
+        Tuple of (arrays dict, metadata dict) for ArrayTfidf
+    """
+    unsupported = []
+    if vectorizer.analyzer != 'word':
+        unsupported.append(f"analyzer={vectorizer.analyzer!r}")
+    for attribute in ('tokenizer', 'preprocessor', 'strip_accents'):
+        if getattr(vectorizer, attribute) is not None:
+            unsupported.append(attribute)
+    if getattr(vectorizer, 'input', 'content') != 'content':
+        unsupported.append(f"input={vectorizer.input!r}")
+    if vectorizer.norm not in (None, 'l1', 'l2'):
+        unsupported.append(f"norm={vectorizer.norm!r}")
+    if unsupported:
+        raise ValueError(f"Cannot export TfidfVectorizer with {', '.join(unsupported)}")
+
+    vocabulary = vectorizer.vocabulary_
+    terms = [None] * len(vocabulary)
+    for term, index in vocabulary.items():
+        terms[index] = term
+
+    stop_words = vectorizer.get_stop_words()
+    arrays = {
+        'terms': np.array(terms, dtype=str),
+        'stop_words': np.array(sorted(stop_words or []), dtype=str),
+    }
+    if vectorizer.use_idf:
+        arrays['idf'] = np.asarray(vectorizer.idf_, dtype=np.float64)
+
+    metadata = {
+        'lowercase': bool(vectorizer.lowercase),
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'use_stop_words': stop_words is not None,
+        'binary': bool(vectorizer.binary),
+        'sublinear_tf': bool(vectorizer.sublinear_tf),
+        'norm': vectorizer.norm,
+    }
+    return arrays, metadata
+
+
+class ArrayTfidf:
+    """transform()-compatible stand-in for a fitted TfidfVectorizer"""
+
+    def __init__(self, arrays: dict, metadata: dict):
+        self.vocabulary_ = {str(term): index for index, term in enumerate(arrays['terms'].tolist())}
+        self.idf_ = arrays.get('idf')
+        self.stop_words = set(arrays['stop_words'].tolist()) if metadata['use_stop_words'] else None
+        self.lowercase = metadata['lowercase']
+        self.token_pattern = re.compile(metadata['token_pattern'])
+        self.ngram_range = tuple(metadata['ngram_range'])
+        self.binary = metadata['binary']
+        self.sublinear_tf = metadata['sublinear_tf']
+        self.norm = metadata['norm']
+
+    def _analyze(self, doc: str):
+        """Tokens and word n-grams of one document, as sklearn's word analyzer builds them"""
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = self.token_pattern.findall(doc)
+        if self.stop_words is not None:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+            for i in range(len(original_tokens) - n + 1):
+                tokens.append(' '.join(original_tokens[i:i + n]))
+        return tokens
+
+    def transform(self, raw_documents):
+        """
+        TF-IDF matrix of the documents
+
+        Returns:
+            Dense float64 array of shape (documents, vocabulary size)
+        """
+        X = np.zeros((len(raw_documents), len(self.vocabulary_)), dtype=np.float64)
+        for row, doc in enumerate(raw_documents):
+            counts = {}
+            for term in self._analyze(doc):
+                index = self.vocabulary_.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+            if not counts:
+                continue
+
+            indices = sorted(counts)
+            if self.binary:
+                data = np.ones(len(indices), dtype=np.float64)
+            else:
+                data = np.array([counts[index] for index in indices], dtype=np.float64)
+            if self.sublinear_tf:
+                data = np.log(data) + 1.0
+            if self.idf_ is not None:
+                data = data * self.idf_[indices]
+
+            # Row norm accumulated in index order, as sklearn's inplace_csr_row_normalize_l*
+            if self.norm == 'l2':
+                total = 0.0
+                for value in data.tolist():
+                    total += value * value
+                if total != 0.0:
+                    data = data / math.sqrt(total)
+            elif self.norm == 'l1':
+                total = 0.0
+                for value in data.tolist():
+                    total += abs(value)
+                if total != 0.0:
+                    data = data / total
+
+            X[row, indices] = data
+        return X
@@ -0,0 +1,157 @@
+"""
+Time slot parsing shared by training and inference
+Turns reservation time slots ("08:00 - 12:00", "8:30 AM - 1:00 PM", "14:00-16:00",
+"08:00:00 - 12:00:00", "Morning") into start and end minutes of the day
+
+parse_time_slot() handles one slot and is memoized, since a deployment only ever sees a
+few dozen distinct slots. time_slot_features() handles a whole column: the distinct
+slots are parsed once and mapped back to the rows through a categorical, and the slots
+that could not be parsed are counted instead of silently becoming 08:00-17:00.
+
+Kept free of pandas at import time so the api/ endpoints do not pay for it.
+"""
+
+import re
+import functools
+from typing import NamedTuple
+
+import numpy as np
+
+
+# Used when a slot cannot be parsed
+DEFAULT_START_MINUTE = 8 * 60
+DEFAULT_END_MINUTE = 17 * 60
+
+# Named periods: (name, start hour, end hour)
+NAMED_PERIODS = (
+    ('Morning', 8, 12),
+    ('Afternoon', 13, 17),
+    ('Evening', 18, 22),
+)
+
+# H, H:MM or H:MM:SS (seconds are ignored), optionally with AM/PM
+_CLOCK = r'(\d{1,2})(?::(\d{2})(?::[0-5]\d)?)?\s*([AaPp][Mm])?'
+_RANGE = re.compile(rf'^\s*{_CLOCK}\s*-\s*{_CLOCK}\s*$')
+
+
+class TimeSlot(NamedTuple):
+    """A parsed time slot; parsed is False when the defaults were used"""
+    start_minute: int
+    end_minute: int
+    parsed: bool
+
+    @property
+    def duration_minutes(self):
+        return self.end_minute - self.start_minute
+
+    # Whole-hour features the models are trained on
+    @property
+    def start_hour(self):
+        return self.start_minute // 60
+
+    @property
+    def end_hour(self):
+        return self.end_minute // 60
+
+    @property
+    def duration_hours(self):
+        return self.end_hour - self.start_hour
+
+
+UNPARSED = TimeSlot(DEFAULT_START_MINUTE, DEFAULT_END_MINUTE, False)
+
+
+def _clock_minute(hour: str, minute: str, meridiem: str):
+    """Minute of the day of a clock time, or None if it is not one"""
+    hour = int(hour)
+    minute = int(minute) if minute else 0
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse(time_slot: str):
+    match = _RANGE.match(time_slot)
+    if match:
+        start = _clock_minute(*match.group(1, 2, 3))
+        end = _clock_minute(*match.group(4, 5, 6))
+        if start is None or end is None:
+            return UNPARSED
+        return TimeSlot(start, end, True)
+    if ' - ' in time_slot:
+        return UNPARSED
+
+    for name, start_hour, end_hour in NAMED_PERIODS:
+        if name in time_slot:
+            return TimeSlot(start_hour * 60, end_hour * 60, True)
+    return UNPARSED
+
+
+def parse_time_slot(time_slot):
+    """
+    Parse one time slot
+
+    Returns:
+        TimeSlot; UNPARSED (08:00-17:00, parsed=False) for anything that is not a slot
+    """
+    if not isinstance(time_slot, str):
+        return UNPARSED
+    return _parse(time_slot)
+
+
+def time_slot_features(time_slots):
+    """
+    Time features for a whole column of time slots
+
+    Args:
+        time_slots: pandas Series, array or list of slot strings (missing values allowed)
+
+    Returns:
+        Tuple of (dict of arrays: start_minute, end_minute, duration_minutes, start_hour,
+        end_hour, duration_hours as int64 and parsed as bool,
+        {unparsed slot: row count})
+    """
+    import pandas as pd
+
+    slots = pd.Categorical(time_slots)
+    parsed_slots = [parse_time_slot(slot) for slot in slots.categories]
+    # Code -1 (a missing value) indexes the UNPARSED row appended at the end
+    table = np.array([(slot.start_minute, slot.end_minute, slot.parsed) for slot in parsed_slots + [UNPARSED]],
+                     dtype=np.int64)
+    rows = table[slots.codes]
+
+    start_minute = rows[:, 0]
+    end_minute = rows[:, 1]
+    start_hour = start_minute // 60
+    end_hour = end_minute // 60
+    features = {
+        'start_minute': start_minute,
+        'end_minute': end_minute,
+        'duration_minutes': end_minute - start_minute,
+        'start_hour': start_hour,
+        'end_hour': end_hour,
+        'duration_hours': end_hour - start_hour,
+        'parsed': rows[:, 2].astype(bool),
+    }
+
+    counts = np.bincount(slots.codes + 1, minlength=len(parsed_slots) + 1)
+    failures = {str(category): int(counts[code + 1])
+                for code, (category, slot) in enumerate(zip(slots.categories, parsed_slots))
+                if not slot.parsed and counts[code + 1]}
+    if counts[0]:
+        failures['(missing)'] = int(counts[0])
+    return features, failures
+
+
+def report_unparsed(failures: dict, total: int):
+    """Print how many time slots fell back to 08:00-17:00, for the training logs"""
+    if not failures:
+        return
+    count = sum(failures.values())
+    examples = ', '.join(f"{slot!r} x{n}" for slot, n in sorted(failures.items(), key=lambda item: -item[1])[:5])
+    print(f"  {count} of {total} time slots could not be parsed and use 08:00-17:00: {examples}")
@@ -0,0 +1,81 @@
+"""
+Training data shared by the training scripts
+Each script's train() takes a TrainingData instead of querying the database itself, so
+scripts/train_all.py can load the reservations window and facilities once and hand the
+same frames to every model.
+
+The reservations come from DataLoader.load_training_view(): each row already carries the
+user's booking and violation counts, verification status and the facility's auto-approval
+settings, computed by the database, so the scripts do not merge user tables in pandas.
+
+- load_training_data(loader) loads the whole window (the last TRAINING_WINDOW_DAYS days).
+- load_training_data(loader, changed_since=watermark) loads only the reservations changed
+  since the watermark, plus the window's context columns (see src/incremental_training.py),
+  for a script that runs on its own.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.training_jobs import StageTimings
+
+TRAINING_WINDOW_DAYS = 365
+
+
+class TrainingData(NamedTuple):
+    """Frames the training scripts learn from"""
+    reservations: pd.DataFrame  # With the user and facility attributes of load_training_view()
+    facilities: pd.DataFrame
+    start_date: str
+    end_date: str
+    # The window's context columns when reservations holds only changed rows
+    context: Optional[pd.DataFrame] = None
+
+    @property
+    def window(self):
+        """Every reservation of the window (context columns only when loaded incrementally)"""
+        return self.reservations if self.context is None else self.context
+
+
+def training_window(days: int = TRAINING_WINDOW_DAYS):
+    """(start_date, end_date) of the training window ending today, as YYYY-MM-DD"""
+    now = datetime.now()
+    return (now - timedelta(days=days)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+
+def load_training_data(loader, changed_since: dict = None, load_context: bool = True,
+                       timings: StageTimings = None):
+    """
+    Load everything the training scripts need in one pass
+
+    Args:
+        loader: Connected DataLoader
+        changed_since: Watermark to load only changed reservations from (plus the window's
+            context columns); None loads the whole window
+        load_context: Load the context columns with changed_since (not needed by models
+            whose features and labels depend on the row alone)
+        timings: Records the seconds each query takes
+
+    Returns:
+        TrainingData
+    """
+    start_date, end_date = training_window()
+    timings = timings or StageTimings()
+
+    with timings.stage('reservations'):
+        reservations_df = loader.load_training_view(start_date=start_date, end_date=end_date,
+                                                    changed_since=changed_since)
+    context_df = None
+    if changed_since and load_context:
+        with timings.stage('reservation context'):
+            context_df = loader.load_reservation_context(start_date=start_date, end_date=end_date)
+    with timings.stage('facilities'):
+        facilities_df = loader.load_facilities()
+    return TrainingData(reservations_df, facilities_df, start_date, end_date, context_df)
@@ -0,0 +1,119 @@
+"""
+Runtime helpers for running training jobs side by side (scripts/train_all.py)
+
+- StageTimings records how long each stage of a job took, for one combined report.
+- available_cpus() is the number of cores the process may actually use: its CPU affinity,
+  capped by a cgroup CPU quota (containers), which os.cpu_count() ignores.
+- core_budgets() splits those cores between concurrent jobs, so each forest is fitted
+  with its own share (n_jobs) instead of every job asking for all of them (n_jobs=-1).
+- Jobs write their artifacts to a staging directory; publish() moves a finished job's
+  files into the models directory with os.replace, so the model server never sees a
+  half-written artifact or a model from one run next to encoders from another for
+  longer than the moves take.
+"""
+
+import os
+import math
+import time
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StageTimings:
+    """Seconds per named stage, in the order the stages ran"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self):
+        return sum(self.stages.values())
+
+
+def _cgroup_cpu_limit():
+    """Cores allowed by the cgroup CPU quota, or None without a quota"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        quota, period = Path('/sys/fs/cgroup/cpu.max').read_text().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    # cgroup v1: quota -1 means no limit
+    try:
+        quota = int(Path('/sys/fs/cgroup/cpu/cpu.cfs_quota_us').read_text())
+        period = int(Path('/sys/fs/cgroup/cpu/cpu.cfs_period_us').read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    """Cores this process can use: CPU affinity capped by the cgroup quota (at least 1)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows and macOS
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+
+def core_budgets(jobs: list, cpus: int, workers: int):
+    """
+    Cores for each job when workers of them run at once
+
+    Every job gets cpus // workers cores; the remainder goes to the first jobs (the
+    caller lists the heaviest first).
+
+    Returns:
+        {job: cores}
+    """
+    share, extra = divmod(cpus, workers)
+    return {job: max(1, share + (1 if index < extra else 0)) for index, job in enumerate(jobs)}
+
+
+def staging_dir(models_dir, job: str):
+    """Fresh staging directory for one job's artifacts, inside the models directory"""
+    path = Path(models_dir) / '.staging' / job
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    return path
+
+
+def publish(staging: Path, models_dir):
+    """
+    Move a job's staged artifacts into the models directory
+
+    Watermarks go last: they record what the published model was trained on.
+
+    Returns:
+        Names of the published files
+    """
+    files = sorted((path for path in Path(staging).iterdir() if path.is_file()),
+                   key=lambda path: (path.name.endswith('.watermark.json'), path.name))
+    for path in files:
+        os.replace(path, Path(models_dir) / path.name)
+    discard(staging)
+    return [path.name for path in files]
+
+
+def discard(staging: Path):
+    """Remove a job's staging directory (and the staging root once it is empty)"""
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        Path(staging).parent.rmdir()
+    except OSError:  # Other jobs are still staging
+        pass
@@ -0,0 +1,60 @@
+"""
+Utility functions shared by the inference modules
+Kept free of pandas so the api/ endpoints do not pay for importing it
+"""
+
+import math
+from datetime import date, datetime
+
+
+# Formats tried before falling back to pandas' parser
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+)
+
+
+def is_missing(value):
+    """True for None and NaN (the cases pd.isna covers for scalar inputs)"""
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    # pandas NA/NaT and numpy NaN scalars, without importing either
+    try:
+        return bool(value != value)
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_date(value):
+    """
+    Parse a reservation date into a datetime
+
+    Handles the formats PHP sends without pandas; anything else goes through
+    pd.to_datetime, imported only on that path.
+
+    Raises:
+        ValueError: If the value is not a date
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+
+    import pandas as pd
+
+    parsed = pd.to_datetime(text)
+    if pd.isna(parsed):
+        raise ValueError(f"Invalid date: {value}")
+    return parsed.to_pydatetime()
@@ -446,6 +446,34 @@ function detectUnclearPurpose(string $purpose): array {
     return $result;
 }
 
+/**
+ * Analyze a reservation request in one call: risk, purpose category,
+ * unclear purpose and holiday lookup
+ * 
+ * Each section has the same shape as the result of assessRiskML(),
+ * classifyPurposeCategory(), detectUnclearPurpose() and the holiday API,
+ * and carries its own 'error' if it could not be answered.
+ * 
+ * @param array $reservation Reservation fields accepted by api/predict_risk.py plus 'purpose'
+ * @return array Result with 'risk', 'purpose_category', 'unclear_purpose' and 'holiday' keys
+ */
+function analyzeReservationML(array $reservation): array {
+    $result = callPythonModel('api/analyze_reservation.py', [], $reservation);
+    
+    // Whole call failed: return every section's default
+    if (isset($result['error'])) {
+        return [
+            'risk' => ['risk_level' => 1, 'risk_probability' => 0.5, 'confidence' => 0.0, 'is_high_risk' => true],
+            'purpose_category' => ['category' => 'private', 'confidence' => 0.0],
+            'unclear_purpose' => ['is_unclear' => true, 'probability' => 0.5, 'confidence' => 0.0],
+            'holiday' => ['is_holiday' => false, 'holiday' => null],
+            'error' => $result['error'],
+        ];
+    }
+    
+    return $result;
+}
+
 /**
  * Get facility recommendations using ML model
  * 
@@ -532,6 +560,35 @@ function checkMLModelsStatus(): array {
     return $status;
 }
 
+/**
+ * Check whether the ML models are loaded and ready to serve
+ * 
+ * Runs api/health.py, which loads every model and reports, per model, the load
+ * time, artifact size and modification time, memory footprint and feature count.
+ * 
+ * @param int $timeoutSeconds Loading falls back to the pickles when a model has no array export, which takes longer
+ * @return array Health report with 'status' (ready, degraded or unavailable), 'ready' and 'models'
+ */
+function getMLModelsHealth(int $timeoutSeconds = 30): array {
+    $result = callPythonModel('api/health.py', [], null, $timeoutSeconds);
+    
+    // Not ready exits with status 1, but the report is still on stdout
+    if (isset($result['error'])) {
+        $report = json_decode($result['stdout'] ?? '', true);
+        if (is_array($report) && isset($report['models'])) {
+            return $report;
+        }
+        return [
+            'status' => 'unavailable',
+            'ready' => false,
+            'models' => [],
+            'error' => $result['error'],
+        ];
+    }
+    
+    return $result;
+}
+
 /**
  * Detect Philippines holidays for a given date or date range
  * 
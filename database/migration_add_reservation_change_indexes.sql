@@ -0,0 +1,36 @@
+-- Migration: Indexes for the AI module's incremental training
+-- Nightly retrains load only the reservations changed since the last run
+-- (updated_at, id after the watermark) or dated since it; both lookups use an index.
+-- Safe to run multiple times.
+
+SET @index_exists = (
+    SELECT COUNT(1)
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'reservations'
+    AND INDEX_NAME = 'idx_reservations_updated'
+);
+
+SET @sql1 = IF(@index_exists = 0,
+    'CREATE INDEX idx_reservations_updated ON reservations (updated_at, id)',
+    'SELECT ''Index idx_reservations_updated already exists'' AS message'
+);
+PREPARE stmt1 FROM @sql1;
+EXECUTE stmt1;
+DEALLOCATE PREPARE stmt1;
+
+SET @index_exists = (
+    SELECT COUNT(1)
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'reservations'
+    AND INDEX_NAME = 'idx_reservations_date'
+);
+
+SET @sql2 = IF(@index_exists = 0,
+    'CREATE INDEX idx_reservations_date ON reservations (reservation_date)',
+    'SELECT ''Index idx_reservations_date already exists'' AS message'
+);
+PREPARE stmt2 FROM @sql2;
+EXECUTE stmt2;
+DEALLOCATE PREPARE stmt2;